@@ -0,0 +1,35 @@
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from core.codecs import Codec, negotiate
+
+
+class CodecResponse(Response):
+    """A body written by a negotiated codec, bypassing FastAPI's encoder
+
+    Content goes to the codec as-is, so hot endpoints can return plain dicts
+    (numpy arrays included) built from values they already trust, skipping
+    pydantic re-validation and jsonable_encoder's walk over every element.
+    """
+
+    def __init__(
+        self,
+        content: Any,
+        codec: Codec,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        self.codec = codec
+        super().__init__(
+            content=codec.encode_bytes(content),
+            status_code=status_code,
+            headers={"Vary": "Accept", **(headers or {})},
+            media_type=codec.media_type
+        )
+
+
+def negotiated(request: Request, content: Any, status_code: int = 200) -> CodecResponse:
+    """Encode content in the best codec the client's Accept header allows"""
+    return CodecResponse(content, negotiate(request.headers.get("accept")), status_code)
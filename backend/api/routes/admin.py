@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from pydantic import BaseModel, Field
+from typing import Optional
+import logging
+import secrets
+
+from config import settings
+from core.conversations import conversation_store
+from core.energy_calculator import get_energy_calculator
+from core.ollama_client import get_ollama_client
+from api.routes import websocket as ws_routes
+
+logger = logging.getLogger(__name__)
+
+def require_admin(authorization: Optional[str] = Header(None)):
+    """Bearer-token check against settings.admin_token"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=403, detail="Admin API disabled: set ADMIN_TOKEN")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token, settings.admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+class LimitsUpdate(BaseModel):
+    """Runtime limits; omitted fields are left as they are"""
+    ollama_num_parallel: Optional[int] = Field(None, ge=1)
+    max_concurrent_generations: Optional[int] = Field(None, ge=1)
+    ollama_max_loaded_models: Optional[int] = Field(None, ge=1)
+    websocket_max_connections: Optional[int] = Field(None, ge=0)
+    websocket_send_queue_size: Optional[int] = Field(None, ge=1)
+    websocket_max_requests_per_socket: Optional[int] = Field(None, ge=1)
+    visual_cache_size: Optional[int] = Field(None, ge=0)
+    conversation_max_sessions: Optional[int] = Field(None, ge=0)
+    conversation_max_total_tokens: Optional[int] = Field(None, ge=0)
+
+def current_limits() -> dict:
+    ollama_limits = get_ollama_client().limits()
+    return {
+        **ollama_limits,
+        "websocket_max_connections": ws_routes.manager.max_connections,
+        "websocket_send_queue_size": ws_routes.manager.max_queue,
+        "websocket_max_requests_per_socket": ws_routes.sessions.max_concurrent,
+        "visual_cache_size": get_energy_calculator().visual_cache_size,
+        "conversation_max_sessions": conversation_store.max_sessions,
+        "conversation_max_total_tokens": conversation_store.max_total_tokens
+    }
+
+@router.get("/limits")
+async def get_limits():
+    """Current concurrency limits, queue bounds, cache sizes and WebSocket caps"""
+    return current_limits()
+
+@router.patch("/limits")
+async def update_limits(update: LimitsUpdate):
+    """Resize limits under live load
+    
+    In-flight work is never interrupted: lower concurrency limits hold new
+    work back until running streams drain below them, lower WebSocket caps
+    only affect new connections and requests, and caches shrink by evicting
+    their least recently used entries.
+    """
+    changes = update.model_dump(exclude_none=True)
+    if not changes:
+        return current_limits()
+    
+    limits = {**current_limits(), **changes}
+    if limits["max_concurrent_generations"] < limits["ollama_num_parallel"]:
+        raise HTTPException(
+            status_code=422,
+            detail="max_concurrent_generations must be at least ollama_num_parallel"
+        )
+    
+    await get_ollama_client().resize(
+        parallel=update.ollama_num_parallel,
+        max_concurrent=update.max_concurrent_generations,
+        max_loaded_models=update.ollama_max_loaded_models
+    )
+    ws_routes.manager.resize(
+        max_connections=update.websocket_max_connections,
+        max_queue=update.websocket_send_queue_size
+    )
+    if update.websocket_max_requests_per_socket is not None:
+        ws_routes.sessions.resize(update.websocket_max_requests_per_socket)
+    if update.visual_cache_size is not None:
+        get_energy_calculator().resize_visual_cache(update.visual_cache_size)
+    conversation_store.resize(
+        max_sessions=update.conversation_max_sessions,
+        max_total_tokens=update.conversation_max_total_tokens
+    )
+    
+    # Keep settings in step so anything built from them later uses the new values
+    for name, value in changes.items():
+        setattr(settings, name, value)
+    
+    logger.info(f"🎛️ Limits updated: {changes}")
+    return current_limits()
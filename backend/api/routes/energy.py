@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException, Request
+from typing import Optional
+import asyncio
+import logging
+import time
+
+from api.responses import negotiated
+from core.signature_store import signature_store, ROLLUP_RESOLUTIONS
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/energy/signatures")
+async def get_signatures(
+    request: Request,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    limit: int = 1000
+):
+    """Raw energy signatures in a time range (default: the last hour)"""
+    end = end or time.time()
+    start = start or end - 3600
+
+    # Scans may write buffered rows and map segments: keep that file I/O off the event loop
+    rows = await asyncio.to_thread(signature_store.scan, start, end, limit=min(limit, 100000))
+    models = signature_store.decode_models(rows.pop("model_id"))
+    sessions = signature_store.decode_sessions(rows.pop("session_id"))
+
+    # Column arrays go to the codec directly, without a tolist() pass or jsonable_encoder
+    columns = dict(rows)
+    columns["model"] = models
+    columns["session"] = sessions
+    return negotiated(request, {"count": len(models), "columns": columns})
+
+@router.get("/energy/rollups")
+async def get_rollups(
+    request: Request,
+    resolution: str = "1m",
+    start: Optional[float] = None,
+    end: Optional[float] = None
+):
+    """Pre-aggregated signature rollups (1s, 1m or 1h buckets)"""
+    if resolution not in ROLLUP_RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"Resolution must be one of {list(ROLLUP_RESOLUTIONS)}")
+
+    end = end or time.time()
+    start = start or end - ROLLUP_RESOLUTIONS[resolution] * 1440
+
+    rows = await asyncio.to_thread(signature_store.rollup, resolution, start, end)
+    return negotiated(request, {
+        "resolution": resolution,
+        "count": len(rows["bucket"]),
+        "columns": rows
+    })
+
+@router.get("/energy/store")
+async def get_store_stats():
+    """Segment and row counts of the signature store"""
+    return await asyncio.to_thread(signature_store.stats)
@@ -1,23 +1,38 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
 import logging
 import asyncio
-from ...core.ollama_client import OllamaClient
+import time
+import uuid
+from config import settings
+from api.responses import negotiated
+from core.codecs import JSON
+from core.ollama_client import get_ollama_client
+from core.conversations import ConversationNotFound, conversation_store
+from core.energy_calculator import get_energy_calculator
+from core.model_registry import model_registry
+from core.model_router import model_router
+from core.persistence import generation_writer
+from core.progression import progression_engine
+from core.signature_store import signature_store
+from core.text_stats import TextStatistics, TimingStatistics
+from services.progressive import stream_progressive
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize Ollama client
-ollama_client = OllamaClient()
-
 class GenerateRequest(BaseModel):
     query: str
     level: int = 1
     model: str = "qwen3:0.6b"
     stream: bool = False
     energy_signature: bool = True
+    user_id: str = "anonymous"
+    conversation_id: Optional[str] = None
+    latency_slo: Optional[float] = None  # Seconds; used when model is "auto"
 
 class EnergySignature(BaseModel):
     energy_density: float
@@ -32,58 +47,168 @@ class GenerateResponse(BaseModel):
     evolution: dict
     model_used: str
     consciousness_level: int
+    conversation_id: Optional[str] = None
+
+# Response fields of an energy signature, in EnergySignature order
+ENERGY_FIELDS = tuple(EnergySignature.model_fields)
 
-@router.post("/generate")
-async def generate_response(request: GenerateRequest):
-    """Generate AI response with energy signature"""
+@router.post("/generate", response_model=GenerateResponse)
+async def generate_response(request: GenerateRequest, http_request: Request):
+    """Generate AI response with energy signature
+    
+    The body is built from values the server produced itself and encoded
+    straight by the negotiated codec (JSON, or MessagePack via Accept),
+    without rebuilding and re-validating GenerateResponse.
+    """
     try:
+        if request.model == "auto":
+            request.model = model_router.route(
+                level=request.level,
+                latency_slo=request.latency_slo,
+                loaded=get_ollama_client().loaded_models
+            )
+        
         logger.info(f"🔥 Generating Level {request.level} response with {request.model}")
         
         # Check if Ollama is available
-        health_status = await ollama_client.health_check()
+        health_status = await get_ollama_client().health_check()
         if health_status == "error":
             logger.warning("Ollama not available, using mock response")
-            return await generate_mock_response(request)
+            return negotiated(http_request, (await generate_mock_response(request)).model_dump())
         
-        # Generate real response with energy signature
-        response_content = ""
-        energy_signature = None
+        # Generate the real response; the signature is computed once from running statistics,
+        # the same full signature (energy level, semantic density, ...) the streaming paths store
+        start_time = time.time()
+        response_parts = []
+        text_stats = TextStatistics()
+        timing_stats = TimingStatistics()
         
-        async for energy_response in ollama_client.generate_with_energy(
+        async for delta, token_time in get_ollama_client().stream_tokens(
             model=request.model,
             prompt=request.query,
-            stream=True
+            conversation_id=request.conversation_id
         ):
-            response_content = energy_response.content
-            energy_signature = energy_response.energy_signature
+            response_parts.append(delta)
+            text_stats.feed(delta)
+            timing_stats.add(token_time)
         
-        # Convert energy signature to response format
-        if energy_signature is None:
+        response_content = "".join(response_parts)
+        if not timing_stats.token_count:
             energy_signature = {}
-            
-        energy = EnergySignature(
-            energy_density=energy_signature.get("energy_density", 0),
-            flow_rate=energy_signature.get("flow_rate", 0),
-            resonance=energy_signature.get("resonance", 0),
-            token_count=energy_signature.get("token_count", 0),
-            generation_time=energy_signature.get("generation_time", 0)
-        )
+        else:
+            energy_signature = get_energy_calculator().calculate_streaming_signature(
+                text_stats, timing_stats, start_time
+            )
+            signature_store.append(energy_signature, model=request.model, level=request.level)
+            await generation_writer.submit(
+                "api", request.model, request.query, response_content, energy_signature,
+                level=request.level
+            )
         
-        # Calculate evolution progress
-        evolution = calculate_evolution_progress(request.level, energy)
+        # Advance the user's progression with this generation
+        evolution = await progression_engine.record(request.user_id, "generation", {
+            **energy_signature,
+            "consciousness_level": model_registry.lookup(request.model).consciousness_level
+        })
         
-        return GenerateResponse(
-            response=response_content,
-            energy=energy,
-            evolution=evolution,
-            model_used=request.model,
-            consciousness_level=request.level
-        )
+        return negotiated(http_request, {
+            "response": response_content,
+            "energy": {field: energy_signature.get(field, 0) for field in ENERGY_FIELDS},
+            "evolution": evolution,
+            "model_used": request.model,
+            "consciousness_level": request.level,
+            "conversation_id": request.conversation_id
+        })
         
+    except ConversationNotFound:
+        raise HTTPException(status_code=404, detail="Conversation not found or expired")
     except Exception as e:
         logger.error(f"❌ Generation failed: {e}")
         # Fall back to mock response on error
-        return await generate_mock_response(request)
+        return negotiated(http_request, (await generate_mock_response(request)).model_dump())
+
+class ProgressiveRequest(GenerateRequest):
+    draft_model: Optional[str] = None
+    request_id: Optional[str] = None
+
+@router.post("/generate/progressive")
+async def generate_progressive(request: ProgressiveRequest):
+    """Stream an instant draft, then the requested model's refinement, as Server-Sent Events
+    
+    Events share the request ID and use the same types as the WebSocket
+    generate_progressive messages: progressive_frame, progressive_overtake,
+    progressive_draft_complete and progressive_complete.
+    """
+    if request.model == "auto":
+        request.model = model_router.route(
+            level=request.level,
+            latency_slo=request.latency_slo,
+            loaded=get_ollama_client().loaded_models
+        )
+    if request.conversation_id is not None:
+        try:
+            conversation_store.get(request.conversation_id)
+        except ConversationNotFound:
+            raise HTTPException(status_code=404, detail="Conversation not found or expired")
+    
+    request_id = request.request_id or uuid.uuid4().hex
+    events: asyncio.Queue = asyncio.Queue()
+    
+    async def send(event_type: str, payload: dict):
+        await events.put((event_type, {"request_id": request_id, **payload}))
+    
+    async def run():
+        try:
+            summary = await stream_progressive(
+                get_ollama_client(),
+                get_energy_calculator(),
+                query=request.query,
+                model=request.model,
+                draft_model=request.draft_model or settings.progressive_draft_model,
+                send=send,
+                fps=settings.visualization_fps,
+                conversation_id=request.conversation_id
+            )
+            model = summary["model"]
+            signature_store.append(summary["energy"], model=model, level=request.level)
+            await generation_writer.submit(
+                "api", model, request.query, summary["response"], summary["energy"],
+                level=request.level
+            )
+            evolution = await progression_engine.record(request.user_id, "generation", {
+                **summary["energy"],
+                "consciousness_level": model_registry.lookup(model).consciousness_level
+            })
+            if evolution["unlocked"]:
+                await send("achievement_unlocked", evolution)
+        except ConversationNotFound:
+            await send("conversation_expired", {"conversation_id": request.conversation_id})
+        except Exception as e:
+            logger.error(f"❌ Progressive generation failed: {e}")
+            await send("request_error", {"error": str(e)})
+        finally:
+            await events.put(None)
+    
+    async def event_stream():
+        task = asyncio.create_task(run())
+        sequence = 0
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                event_type, payload = event
+                sequence += 1
+                yield f"id: {request_id}:{sequence}\nevent: {event_type}\ndata: {JSON.encode(payload)}\n\n"
+        finally:
+            # Client went away: stop both model streams
+            task.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Request-ID": request_id}
+    )
 
 @router.post("/council")
 async def generate_council_response(request: GenerateRequest):
@@ -92,7 +217,7 @@ async def generate_council_response(request: GenerateRequest):
         logger.info(f"🌊 Starting council formation for: {request.query}")
         
         # Check if Ollama is available
-        health_status = await ollama_client.health_check()
+        health_status = await get_ollama_client().health_check()
         if health_status == "error":
             logger.warning("Ollama not available, using mock council")
             return await generate_mock_council(request)
@@ -103,13 +228,13 @@ async def generate_council_response(request: GenerateRequest):
         # Generate parallel council responses
         council_responses = []
         
-        async for council_response in ollama_client.generate_council_parallel(
+        async for council_response in get_ollama_client().generate_council_parallel(
             models=council_models,
             prompt=request.query
         ):
             council_responses.append({
                 "model": council_response["model"],
-                "perspective": get_perspective_name(council_response["model"]),
+                "perspective": model_registry.lookup(council_response["model"]).perspective,
                 "response": council_response["response"],
                 "energy_type": council_response["energy_type"],
                 "confidence": calculate_confidence(council_response["response"])
@@ -118,12 +243,17 @@ async def generate_council_response(request: GenerateRequest):
         # Generate synthesis
         synthesis = generate_council_synthesis(council_responses, request.query)
         harmony = calculate_harmony(council_responses)
+        evolution = await progression_engine.record(request.user_id, "council", {
+            "harmony": harmony,
+            "members": len(council_responses)
+        })
         
         return {
             "council_responses": council_responses,
             "synthesis": synthesis,
             "harmony_achieved": harmony > 0.7,
             "energy_convergence": harmony,
+            "evolution": evolution,
             "consciousness_level": 2
         }
         
@@ -152,7 +282,7 @@ Your query has been processed with {request.model} energy signature!"""
         generation_time=0.3
     )
     
-    evolution = calculate_evolution_progress(request.level, energy_signature)
+    evolution = await progression_engine.progress(request.user_id)
     
     return GenerateResponse(
         response=mock_response,
@@ -199,17 +329,6 @@ async def generate_mock_council(request: GenerateRequest):
         "consciousness_level": 2
     }
 
-def get_perspective_name(model: str) -> str:
-    """Get perspective name based on model"""
-    if "0.6b" in model:
-        return "Reflexive"
-    elif "1.7b" in model:
-        return "Intuitive"
-    elif "4b" in model:
-        return "Analytical"
-    else:
-        return "Unknown"
-
 def calculate_confidence(response: str) -> float:
     """Calculate confidence based on response characteristics"""
     # Simple confidence calculation based on response length and complexity
@@ -248,34 +367,11 @@ def generate_council_synthesis(responses: List[dict], query: str) -> str:
 
 The three streams converge on a unified understanding that combines urgency with creativity and structure. Energy harmony achieved through parallel AI consciousness streams."""
 
-def calculate_evolution_progress(level: int, energy: EnergySignature) -> dict:
-    """Calculate evolution progress based on level and energy signature"""
-    base_progress = level * 0.2  # 20% per level
-    energy_bonus = energy.resonance * 0.1  # Up to 10% bonus for high resonance
-    
-    return {
-        "progress": min(base_progress + energy_bonus, 1.0),
-        "next_unlock": get_next_unlock(level),
-        "energy_collected": int(energy.energy_density * 100),
-        "consciousness_level": level
-    }
-
-def get_next_unlock(level: int) -> str:
-    """Get next unlock based on current level"""
-    unlocks = {
-        1: "council_formation",
-        2: "architecture_gardens",
-        3: "adaptive_fields",
-        4: "resonance_sanctum",
-        5: "consciousness_transcendence"
-    }
-    return unlocks.get(level, "unknown")
-
 @router.get("/models")
 async def get_available_models():
     """Get available models with energy signatures"""
     try:
-        models = await ollama_client.list_models()
+        models = await get_ollama_client().list_models()
         return {
             "models": models,
             "energy_flow": "models_ready",
@@ -321,7 +417,7 @@ async def get_available_models():
 async def get_energy_status():
     """Get current energy system status"""
     try:
-        health_status = await ollama_client.health_check()
+        health_status = await get_ollama_client().health_check()
         return {
             "energy_flow": "active",
             "particle_systems": "operational",
@@ -340,4 +436,33 @@ async def get_energy_status():
             "lightning_ready": True,
             "council_available": True,
             "ollama_status": "error"
-        } 
\ No newline at end of file
+        } 
+
+@router.get("/progress/{user_id}")
+async def get_progress(user_id: str):
+    """Current level, achievements and progress toward the next unlock"""
+    return await progression_engine.progress(user_id)
+
+@router.post("/conversations")
+async def create_conversation():
+    """Start a multi-turn conversation; pass its ID with each /generate turn"""
+    conversation = conversation_store.create()
+    return conversation.stats()
+
+@router.get("/conversations/{conversation_id}")
+async def get_conversation(conversation_id: str):
+    try:
+        return conversation_store.get(conversation_id).stats()
+    except ConversationNotFound:
+        raise HTTPException(status_code=404, detail="Conversation not found or expired")
+
+@router.delete("/conversations/{conversation_id}")
+async def delete_conversation(conversation_id: str):
+    if not conversation_store.delete(conversation_id):
+        raise HTTPException(status_code=404, detail="Conversation not found or expired")
+    return {"deleted": conversation_id}
+
+@router.get("/router/stats")
+async def get_router_stats():
+    """Live per-model latency statistics, recent routing decisions and hedging"""
+    return {**model_router.stats(), "hedging": get_ollama_client().hedging.stats()}
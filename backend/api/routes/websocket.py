@@ -1,43 +1,104 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 import logging
 import asyncio
-import json
-from typing import List
+import math
+import uuid
+from typing import Optional
+
+from config import settings
+from core.codecs import JSON
+from core.conversations import ConversationNotFound
+from core.limits import LimitExceeded
+from core.energy_calculator import get_energy_calculator
+from core.offload import ComputeExecutor
+from core.ollama_client import get_ollama_client
+from core.particle_engine import ParticleEngine
+from core.model_registry import model_registry
+from core.model_router import model_router
+from core.persistence import generation_writer
+from core.progression import progression_engine
+from core.signature_store import signature_store
+from services.connection_manager import ConnectionManager
+from services.energy_ticker import ROOM_REJECTED_CLOSE_CODE, EnergyTicker
+from services.lightning_stream import stream_lightning
+from services.progressive import stream_progressive
+from services.pubsub import EventBus, create_backend
+from services.session_replay import ReplaySession, SessionStore
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"🔗 WebSocket connected. Total connections: {len(self.active_connections)}")
+# Built from settings at import. Construction only records configuration:
+# worker pools start on first offload, tasks on first connection, and the
+# pub/sub backend connects in the lifespan.
+manager = ConnectionManager(
+    max_queue=settings.websocket_send_queue_size,
+    policy=settings.websocket_slow_consumer_policy,
+    max_connections=settings.websocket_max_connections,
+    heartbeat_interval=settings.websocket_heartbeat_interval,
+    heartbeat_misses=settings.websocket_heartbeat_misses,
+    idle_timeout=settings.websocket_idle_timeout
+)
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-        logger.info(f"🔗 WebSocket disconnected. Total connections: {len(self.active_connections)}")
+# Shared executor for CPU-heavy energy and geometry batches
+executor = ComputeExecutor(
+    kind=settings.compute_executor,
+    max_workers=settings.compute_workers,
+    inline_threshold=settings.compute_inline_threshold
+)
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+ticker = EnergyTicker(
+    manager,
+    executor=executor,
+    max_particles=settings.particle_system_max_particles,
+    fps=settings.visualization_fps,
+    min_fps=settings.websocket_min_fps,
+    keyframe_interval=settings.particle_keyframe_interval,
+    max_rooms=settings.websocket_max_rooms
+)
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                # Remove dead connections
-                self.active_connections.remove(connection)
+# Resumable sessions: generation events survive a dropped socket for a grace period
+sessions = SessionStore(
+    manager,
+    max_frames=settings.session_replay_frames,
+    resume_ttl=settings.session_resume_ttl,
+    max_concurrent=settings.websocket_max_requests_per_socket
+)
 
-manager = ConnectionManager()
+# Cross-worker backplane: every worker delivers "broadcast" payloads to its own sockets
+bus = EventBus(create_backend(
+    settings.pubsub_backend,
+    redis_url=settings.redis_url,
+    unix_path=settings.pubsub_unix_path
+))
+bus.subscribe("broadcast", manager.broadcast)
 
 @router.websocket("/energy")
-async def websocket_energy_stream(websocket: WebSocket):
-    """WebSocket endpoint for real-time energy streaming"""
-    await manager.connect(websocket)
+async def websocket_energy_stream(
+    websocket: WebSocket,
+    room: str = "energy",
+    session: Optional[str] = None,
+    last_seq: int = 0
+):
+    """WebSocket endpoint for real-time energy streaming
+    
+    Reconnect with ?session=<token>&last_seq=<n> to resume a session and
+    receive exactly the generation events sent after sequence n.
+    """
+    connection = await manager.connect(websocket)
+    if connection is None:
+        return
+    
+    rejection = ticker.admits(room)
+    if rejection:
+        logger.warning(f"🚫 WebSocket rejected: {rejection}")
+        connection.close()
+        await websocket.close(code=ROOM_REJECTED_CLOSE_CODE)
+        return
+    
+    replay_session, resumed = sessions.open(websocket, session)
+    requests = replay_session.requests
     
     try:
         # Send initial energy status
@@ -47,59 +108,238 @@ async def websocket_energy_stream(websocket: WebSocket):
                 "energy_flow": "active",
                 "particle_systems": "operational",
                 "consciousness_level": 1,
+                "room": room,
+                "session": replay_session.token,
+                "session_id": replay_session.public_id,
+                "resumed": resumed,
                 "timestamp": asyncio.get_event_loop().time()
             }
         }
-        await manager.send_personal_message(json.dumps(initial_status), websocket)
+        await manager.send_personal_message(initial_status, websocket)
         
-        # Start energy simulation loop
-        asyncio.create_task(energy_simulation_loop(websocket))
+        if resumed:
+            replay = await replay_session.replay(last_seq)
+            await manager.send_personal_message(
+                {"type": "session_resumed", "data": replay}, websocket
+            )
+        
+        # Join the room's shared simulation; its ticker encodes each frame once
+        try:
+            energy_room = ticker.subscribe(room, websocket)
+        except LimitExceeded as e:
+            # Another socket opened the last free room since admits() was checked
+            logger.warning(f"🚫 WebSocket rejected: {e}")
+            await websocket.close(code=ROOM_REJECTED_CLOSE_CODE)
+            return
+        engine = energy_room.engine
         
         while True:
-            # Listen for client messages
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            # Listen for client messages, in the socket's negotiated codec
+            message = connection.codec.decode(await receive_frame(websocket))
+            if not isinstance(message, dict):
+                continue
+            message_type = message.get("type")
+            manager.touch(websocket, activity=message_type not in ("pong", "frame_ack"))
             
-            if message.get("type") == "generate_lightning":
-                await handle_lightning_generation(websocket, message.get("data", {}))
-            elif message.get("type") == "start_council":
-                await handle_council_formation(websocket, message.get("data", {}))
+            if message_type == "pong":
+                continue
+            elif message_type == "frame_ack":
+                # Malformed acks are ignored; they must not tear down the socket
+                tick = _client_int(_field(message, "tick"))
+                if tick is not None:
+                    energy_room.ack(websocket, tick, _client_rate(_field(message, "render_fps")))
+            elif message_type == "replay":
+                # In-band gap fill, e.g. after the slow-consumer policy dropped frames
+                since = _client_int(_field(message, "last_seq"))
+                if since is None:
+                    continue
+                replay = await replay_session.replay(since)
+                await manager.send_personal_message(
+                    {"type": "replay_complete", "data": replay}, websocket
+                )
+            elif message_type == "cancel":
+                request_id = str(message.get("request_id", ""))
+                if requests.cancel(request_id):
+                    await make_sender(replay_session, request_id)("request_cancelled", {})
+            elif message_type in ("generate_lightning", "generate_progressive", "start_council"):
+                # Handlers run as tracked tasks so the receive loop never blocks
+                request_id = str(message.get("request_id") or uuid.uuid4().hex)
+                send = make_sender(replay_session, request_id)
+                data = message.get("data", {})
+                
+                if message_type == "generate_lightning":
+                    handler = handle_lightning_generation(send, data, engine, replay_session.public_id)
+                elif message_type == "generate_progressive":
+                    handler = handle_progressive_generation(send, data, replay_session.public_id)
+                else:
+                    handler = handle_council_formation(send, data)
+                
+                async def on_error(e: Exception, send=send):
+                    await send("request_error", {"error": str(e)})
+                
+                rejection = requests.start(request_id, handler, on_error)
+                if rejection:
+                    await send("request_rejected", {"reason": rejection})
             
     except WebSocketDisconnect:
+        pass
+    finally:
+        # Room subscription ends with the socket; requests keep running in the
+        # session until it is resumed or expires
+        sessions.release(replay_session, websocket)
+        ticker.unsubscribe(room, websocket)
         manager.disconnect(websocket)
 
-async def energy_simulation_loop(websocket: WebSocket):
-    """Simulate energy particles and flows"""
+def _field(message: dict, name: str):
+    data = message.get("data")
+    return data.get(name) if isinstance(data, dict) else None
+
+def _client_int(value) -> Optional[int]:
+    """A non-negative integer sent by a client, or None for anything else"""
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    return None
+
+def _client_rate(value) -> Optional[float]:
+    """A positive finite rate sent by a client, or None for anything else"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value) and value > 0:
+        return float(value)
+    return None
+
+async def receive_frame(websocket: WebSocket):
+    """Next text or binary frame from the client"""
+    event = await websocket.receive()
+    if event["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(event.get("code", 1000))
+    return event["bytes"] if event.get("bytes") is not None else event["text"]
+
+def make_sender(replay_session: ReplaySession, request_id: str):
+    """Send helper that tags, sequences and buffers messages for one request"""
+    async def send(message_type: str, payload: dict):
+        payload.setdefault("timestamp", asyncio.get_event_loop().time())
+        await replay_session.send(message_type, payload, request_id)
+    return send
+
+@router.get("/stats")
+async def websocket_stats(detail: bool = False):
+    """Per-node WebSocket capacity accounting"""
+    return {
+        "connections": manager.stats(per_connection=detail),
+        "rooms": ticker.stats(),
+        "pubsub": bus.stats(),
+        "sessions": sessions.stats(),
+        "compute": executor.stats(),
+        "tasks": len(asyncio.all_tasks())
+    }
+
+async def handle_lightning_generation(send, data: dict, engine: ParticleEngine,
+                                      session: Optional[str] = None):
+    """Handle lightning strike generation by streaming a real model response"""
+    query = data.get("query", "")
+    model = data.get("model", settings.default_model)
+    if model == "auto":
+        model = model_router.route(
+            level=data.get("level", 1),
+            latency_slo=data.get("latency_slo"),
+            loaded=get_ollama_client().loaded_models
+        )
+    
     try:
-        while True:
-            # Generate random energy particles
-            particle_data = {
-                "type": "energy_particles",
-                "data": {
-                    "particles": [
-                        {
-                            "id": f"particle_{i}",
-                            "position": {"x": 0, "y": 0, "z": 0},
-                            "velocity": {"x": 0.1, "y": 0.2, "z": 0},
-                            "color": "#00ffff",
-                            "lifetime": 3.0,
-                            "energy": 1.0
-                        } for i in range(5)
-                    ],
-                    "timestamp": asyncio.get_event_loop().time()
-                }
+        summary = await stream_lightning(
+            get_ollama_client(),
+            get_energy_calculator(),
+            query=query,
+            model=model,
+            send=send,
+            fps=settings.visualization_fps,
+            engine=engine,
+            conversation_id=data.get("conversation_id")
+        )
+    except ConversationNotFound:
+        await send("conversation_expired", {"conversation_id": data.get("conversation_id")})
+        return
+    except Exception as e:
+        logger.warning(f"Lightning generation failed, sending simulated strike: {e}")
+        await send_simulated_lightning(send, query, engine)
+        return
+    
+    # The real strike has been sent; bookkeeping failures are logged, never simulated over it
+    try:
+        signature_store.append(summary["energy"], model=model, level=data.get("level", 1), session=session)
+        await generation_writer.submit(
+            "websocket", model, query, summary["response"], summary["energy"],
+            level=data.get("level", 1), session=session
+        )
+        
+        evolution = await progression_engine.record(data.get("user_id") or session or "anonymous", "generation", {
+            **summary["energy"],
+            "consciousness_level": model_registry.lookup(model).consciousness_level
+        })
+        if evolution["unlocked"]:
+            await send("achievement_unlocked", evolution)
+        
+        # Let every client on every worker see the strike land
+        await bus.publish("broadcast", JSON.encode({
+            "type": "energy_event",
+            "data": {
+                "event": "lightning_strike",
+                "model": model,
+                "energy": summary["energy"],
+                "timestamp": asyncio.get_event_loop().time()
             }
-            
-            await manager.send_personal_message(json.dumps(particle_data), websocket)
-            await asyncio.sleep(0.1)  # 10 FPS updates
-            
+        }))
+        
     except Exception as e:
-        logger.error(f"Energy simulation error: {e}")
+        logger.error(f"❌ Recording lightning generation failed: {e}")
 
-async def handle_lightning_generation(websocket: WebSocket, data: dict):
-    """Handle lightning strike generation"""
+async def handle_progressive_generation(send, data: dict, session: Optional[str] = None):
+    """Stream an instant draft answer, replaced by the requested model's refinement"""
+    query = data.get("query", "")
+    model = data.get("model", settings.default_model)
+    if model == "auto":
+        model = model_router.route(
+            level=data.get("level", 1),
+            latency_slo=data.get("latency_slo"),
+            loaded=get_ollama_client().loaded_models
+        )
+    
     try:
-        query = data.get("query", "")
+        summary = await stream_progressive(
+            get_ollama_client(),
+            get_energy_calculator(),
+            query=query,
+            model=model,
+            draft_model=data.get("draft_model", settings.progressive_draft_model),
+            send=send,
+            fps=settings.visualization_fps,
+            conversation_id=data.get("conversation_id")
+        )
+    except ConversationNotFound:
+        await send("conversation_expired", {"conversation_id": data.get("conversation_id")})
+        return
+    
+    final_model = summary["model"]
+    signature_store.append(summary["energy"], model=final_model, level=data.get("level", 1), session=session)
+    await generation_writer.submit(
+        "websocket", final_model, query, summary["response"], summary["energy"],
+        level=data.get("level", 1), session=session
+    )
+    
+    evolution = await progression_engine.record(data.get("user_id") or session or "anonymous", "generation", {
+        **summary["energy"],
+        "consciousness_level": model_registry.lookup(final_model).consciousness_level
+    })
+    if evolution["unlocked"]:
+        await send("achievement_unlocked", evolution)
+
+async def send_simulated_lightning(send, query: str, engine: ParticleEngine):
+    """Fallback strike when Ollama is not available"""
+    try:
+        # Burst of simulated particles along the strike
+        engine.add_emitter_from_signature(
+            {"energy_level": min(10.0, 1.0 + len(query) / 10), "resonance": 0.8},
+            duration=0.5
+        )
         
         # Simulate lightning strike
         lightning_data = {
@@ -118,7 +358,7 @@ async def handle_lightning_generation(websocket: WebSocket, data: dict):
             }
         }
         
-        await manager.send_personal_message(json.dumps(lightning_data), websocket)
+        await send(lightning_data["type"], lightning_data["data"])
         
         # Send particle burst
         burst_data = {
@@ -132,12 +372,12 @@ async def handle_lightning_generation(websocket: WebSocket, data: dict):
             }
         }
         
-        await manager.send_personal_message(json.dumps(burst_data), websocket)
+        await send(burst_data["type"], burst_data["data"])
         
     except Exception as e:
         logger.error(f"Lightning generation error: {e}")
 
-async def handle_council_formation(websocket: WebSocket, data: dict):
+async def handle_council_formation(send, data: dict):
     """Handle council formation visualization"""
     try:
         query = data.get("query", "")
@@ -173,7 +413,7 @@ async def handle_council_formation(websocket: WebSocket, data: dict):
             }
         }
         
-        await manager.send_personal_message(json.dumps(council_data), websocket)
+        await send(council_data["type"], council_data["data"])
         
         # Simulate harmony building over time
         for i in range(10):
@@ -185,7 +425,7 @@ async def handle_council_formation(websocket: WebSocket, data: dict):
                     "timestamp": asyncio.get_event_loop().time()
                 }
             }
-            await manager.send_personal_message(json.dumps(harmony_update), websocket)
+            await send(harmony_update["type"], harmony_update["data"])
             await asyncio.sleep(0.3)
         
         # Final synthesis
@@ -199,7 +439,7 @@ async def handle_council_formation(websocket: WebSocket, data: dict):
             }
         }
         
-        await manager.send_personal_message(json.dumps(synthesis_data), websocket)
+        await send(synthesis_data["type"], synthesis_data["data"])
         
     except Exception as e:
         logger.error(f"Council formation error: {e}") 
\ No newline at end of file
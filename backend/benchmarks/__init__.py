@@ -0,0 +1 @@
+# WIRTHFORGE Benchmarks Package 
\ No newline at end of file
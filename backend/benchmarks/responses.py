@@ -0,0 +1,82 @@
+"""Encoding cost of REST bodies and WebSocket frames per codec
+
+Run from backend/: python -m benchmarks.responses
+"""
+import json
+import timeit
+from typing import Any, Dict
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from api.routes.generate import GenerateResponse
+from core.codecs import CODECS, JSON
+
+
+def benchmark(repeat: int = 200) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Time today's encoding paths against each codec on representative payloads"""
+    def starlette_json(content: Any) -> bytes:
+        # What JSONResponse.render does with FastAPI's encoded content
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+    rng = np.random.default_rng(0)
+    signature = {"energy_density": 0.82, "flow_rate": 31.4, "resonance": 0.91,
+                 "token_count": 412, "generation_time": 13.1}
+    generation = {
+        "response": "Lightning answer " * 120,
+        "energy": signature,
+        "evolution": {"progress": 0.2, "level_progress": 0.6, "next_unlock": "Council Formation",
+                      "energy_collected": 1200, "consciousness_level": 1,
+                      "achievements": ["first_spark"], "unlocked": []},
+        "model_used": "qwen3:0.6b",
+        "consciousness_level": 1,
+        "conversation_id": None
+    }
+    rows = 10000
+    columns = {
+        "timestamp": 1.7e9 + np.arange(rows, dtype=np.float64),
+        "energy_level": rng.random(rows, dtype=np.float32) * 10,
+        "flow_rate": rng.random(rows, dtype=np.float32) * 50,
+        "token_count": rng.integers(1, 2000, rows, dtype=np.int32)
+    }
+    ticker_frame = {"type": "particle_delta", "room": "energy", "data": {
+        "tick": 1024,
+        "slots": list(range(256)),
+        "positions": rng.random((256, 3)).round(4).tolist(),
+        "lifetimes": rng.random(256).round(3).tolist()
+    }}
+
+    cases = {
+        "generate_response": {
+            "today": lambda: starlette_json(jsonable_encoder(GenerateResponse(**generation))),
+            **{name: (lambda c=codec: c.encode_bytes(generation)) for name, codec in CODECS.items()}
+        },
+        "signature_scan_10k": {
+            "today": lambda: starlette_json(jsonable_encoder(
+                {"count": rows, "columns": {k: v.tolist() for k, v in columns.items()}}
+            )),
+            **{name: (lambda c=codec: c.encode_bytes({"count": rows, "columns": columns}))
+               for name, codec in CODECS.items()}
+        },
+        "websocket_frame": {
+            "today": lambda: json.dumps(ticker_frame),
+            **{name: (lambda c=codec: c.encode(ticker_frame)) for name, codec in CODECS.items()}
+        }
+    }
+
+    results = {}
+    for case, encoders in cases.items():
+        results[case] = {}
+        for name, encode in encoders.items():
+            seconds = min(timeit.repeat(encode, number=max(1, repeat // 10), repeat=5)) / max(1, repeat // 10)
+            results[case][name] = {"us": round(seconds * 1e6, 1), "bytes": len(encode())}
+    return results
+
+
+if __name__ == "__main__":
+    print(f"JSON backend: {JSON.backend}")
+    for case, encoders in benchmark().items():
+        baseline = encoders["today"]["us"]
+        print(case)
+        for name, result in encoders.items():
+            print(f"  {name:<10} {result['us']:>10.1f} us  {result['bytes']:>9} bytes  {baseline / result['us']:>5.1f}x")
@@ -0,0 +1,204 @@
+import json
+import math
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # Optional: JSON falls back to the standard library encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional: MessagePack is only offered when installed
+    msgpack = None
+
+
+def _default(value: Any):
+    """Encode numpy arrays and scalars handed over without a tolist() pass"""
+    tolist = getattr(value, "tolist", None)
+    if tolist is not None:
+        return tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def _finite(value: Any) -> Any:
+    """Replace NaN and infinities with None, as orjson writes them as null"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if hasattr(value, "tolist"):
+        return _finite(value.tolist())
+    return value
+
+
+def _stdlib_dumps(message: Any) -> str:
+    try:
+        return json.dumps(message, default=_default, separators=(",", ":"), ensure_ascii=False, allow_nan=False)
+    except ValueError:
+        # Bare NaN is not JSON: only walk the payload in the rare case it holds one
+        return json.dumps(_finite(message), default=_default, separators=(",", ":"), ensure_ascii=False, allow_nan=False)
+
+
+class Codec:
+    """A wire format for REST bodies and WebSocket frames"""
+
+    name = "base"
+    media_type = "application/octet-stream"
+    subprotocol = ""
+    binary = False  # Binary codecs travel as WebSocket binary frames
+
+    def encode(self, message: Any) -> Union[str, bytes]:
+        """Encode for a WebSocket frame: str for text codecs, bytes for binary ones"""
+        raise NotImplementedError
+
+    def encode_bytes(self, message: Any) -> bytes:
+        """Encode for an HTTP body"""
+        raise NotImplementedError
+
+    def decode(self, data: Union[str, bytes]) -> Any:
+        raise NotImplementedError
+
+
+class JSONCodec(Codec):
+    """JSON through orjson when it is installed, else the standard library
+
+    Both backends write NaN and infinities as null, so the output is valid
+    JSON whichever one is installed.
+    """
+
+    name = "json"
+    media_type = "application/json"
+    subprotocol = "wirthforge.json"
+
+    def __init__(self, fast: bool = True):
+        self.fast = fast and orjson is not None
+        self.backend = "orjson" if self.fast else "json"
+
+    def encode_bytes(self, message: Any) -> bytes:
+        if self.fast:
+            return orjson.dumps(message, default=_default,
+                                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return _stdlib_dumps(message).encode()
+
+    def encode(self, message: Any) -> str:
+        if self.fast:
+            return self.encode_bytes(message).decode()
+        return _stdlib_dumps(message)
+
+    def decode(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data) if self.fast else json.loads(data)
+
+
+class MsgPackCodec(Codec):
+    """MessagePack: smaller frames and no float formatting"""
+
+    name = "msgpack"
+    media_type = "application/msgpack"
+    subprotocol = "wirthforge.msgpack"
+    binary = True
+
+    def encode(self, message: Any) -> bytes:
+        return msgpack.packb(message, default=_default, use_bin_type=True)
+
+    encode_bytes = encode
+
+    def decode(self, data: Union[str, bytes]) -> Any:
+        if isinstance(data, str):
+            return JSON.decode(data)  # Text frames from a MessagePack client are still JSON
+        return msgpack.unpackb(data, raw=False)
+
+
+JSON = JSONCodec()
+
+CODECS: Dict[str, Codec] = {JSON.name: JSON}
+
+MEDIA_TYPES: Dict[str, str] = {
+    "application/json": "json",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack"
+}
+
+
+def register_codec(codec: Codec, *media_types: str):
+    """Make a codec available for Accept and subprotocol negotiation"""
+    CODECS[codec.name] = codec
+    for media_type in (codec.media_type, *media_types):
+        MEDIA_TYPES[media_type] = codec.name
+
+
+if msgpack is not None:
+    register_codec(MsgPackCodec())
+
+
+def negotiate(accept: Optional[str]) -> Codec:
+    """Best available codec for an Accept header; JSON when nothing else matches"""
+    if not accept:
+        return JSON
+
+    ranges = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(ranges):
+        codec = CODECS.get(MEDIA_TYPES.get(media_type, ""))
+        if codec is not None:
+            return codec
+        if media_type in ("*/*", "application/*"):
+            return JSON
+    return JSON
+
+
+def negotiate_subprotocol(offered: Iterable[str]) -> Tuple[Codec, Optional[str]]:
+    """Codec for the first offered WebSocket subprotocol we speak, and the one to echo"""
+    for subprotocol in offered:
+        for codec in CODECS.values():
+            if codec.subprotocol == subprotocol:
+                return codec, subprotocol
+    return JSON, None
+
+
+class Frame:
+    """One outgoing message, encoded at most once per codec
+
+    A broadcast to many sockets shares one Frame, so each wire format is
+    produced once no matter how many clients speak it. Frames relayed from
+    other workers arrive as JSON text and are only decoded if a client
+    needs another format.
+    """
+
+    __slots__ = ("message", "_encoded")
+
+    def __init__(self, message: Any = None, json_text: Optional[str] = None):
+        self.message = message
+        self._encoded: Dict[str, Union[str, bytes]] = {} if json_text is None else {JSON.name: json_text}
+
+    def encode(self, codec: Codec) -> Union[str, bytes]:
+        encoded = self._encoded.get(codec.name)
+        if encoded is None:
+            if self.message is None:
+                self.message = JSON.decode(self._encoded[JSON.name])
+            encoded = codec.encode(self.message)
+            self._encoded[codec.name] = encoded
+        return encoded
+
+
+def as_frame(message: Union[Frame, str, Dict]) -> Frame:
+    """Frames pass through, JSON text is wrapped as already encoded, anything else is encoded lazily"""
+    if isinstance(message, Frame):
+        return message
+    if isinstance(message, str):
+        return Frame(json_text=message)
+    return Frame(message)
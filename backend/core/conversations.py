@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import secrets
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationNotFound(KeyError):
+    """The conversation ID is unknown or its session has been evicted"""
+
+
+class Conversation:
+    """One multi-turn session: the Ollama context of its last turn, per model
+
+    The context is the token array Ollama returns at the end of a turn.
+    Sending it back with the next prompt lets the runner match it against
+    its KV cache, so only the new prompt needs evaluating. Tokens are held
+    in a compact array (4 bytes each) rather than a list of ints.
+    """
+
+    def __init__(self, conversation_id: str):
+        self.id = conversation_id
+        self.model: Optional[str] = None
+        self.context = array("I")
+        self.turns = 0
+        self.prompt_tokens_evaluated = 0
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()  # One turn at a time; the next turn needs this turn's context
+
+    def context_for(self, model: str) -> Optional[List[int]]:
+        """The context to send, if it belongs to this model"""
+        if self.model != model or not self.context:
+            return None
+        return self.context.tolist()
+
+    def stats(self) -> Dict:
+        return {
+            "conversation_id": self.id,
+            "model": self.model,
+            "turns": self.turns,
+            "context_tokens": len(self.context),
+            "prompt_tokens_evaluated": self.prompt_tokens_evaluated,
+            "created_at": self.created_at
+        }
+
+
+class ConversationStore:
+    """Server-side conversation sessions with LRU/TTL eviction and a token budget
+
+    Sessions idle for longer than ttl expire; beyond max_sessions or
+    max_total_tokens of held context the least recently used sessions are
+    evicted. A context longer than max_context_tokens is discarded, so that
+    session's next turn starts from a fresh prompt.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl: float = 1800.0,
+        max_context_tokens: int = 32768,
+        max_total_tokens: int = 4_000_000
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_context_tokens = max_context_tokens
+        self.max_total_tokens = max_total_tokens
+        self.conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self.total_tokens = 0
+        self.evicted = 0
+        self.reused_turns = 0
+
+    def create(self) -> Conversation:
+        self._expire()
+        conversation = Conversation(secrets.token_urlsafe(16))
+        self.conversations[conversation.id] = conversation
+        self._enforce_limits()
+        return conversation
+
+    def get(self, conversation_id: str) -> Conversation:
+        self._expire()
+        conversation = self.conversations.get(conversation_id)
+        if conversation is None:
+            raise ConversationNotFound(conversation_id)
+        conversation.last_used = time.monotonic()
+        self.conversations.move_to_end(conversation_id)
+        return conversation
+
+    def update(
+        self,
+        conversation: Conversation,
+        model: str,
+        context: Optional[List[int]],
+        prompt_eval_count: Optional[int] = None
+    ):
+        """Keep the context returned at the end of a turn"""
+        if conversation.model == model and conversation.context:
+            self.reused_turns += 1
+
+        # The session may have been evicted mid-turn; don't resurrect it
+        tracked = conversation.id in self.conversations
+        if tracked:
+            self.total_tokens -= len(conversation.context)
+        conversation.model = model
+        conversation.turns += 1
+        conversation.prompt_tokens_evaluated += prompt_eval_count or 0
+        conversation.last_used = time.monotonic()
+
+        if context and len(context) <= self.max_context_tokens:
+            conversation.context = array("I", context)
+        else:
+            if context:
+                logger.info(f"💬 Conversation {conversation.id[:8]} context exceeded "
+                            f"{self.max_context_tokens} tokens, starting fresh")
+            conversation.context = array("I")
+
+        if tracked:
+            self.total_tokens += len(conversation.context)
+            self.conversations.move_to_end(conversation.id)
+            self._enforce_limits()
+
+    def delete(self, conversation_id: str) -> bool:
+        conversation = self.conversations.pop(conversation_id, None)
+        if conversation is None:
+            return False
+        self.total_tokens -= len(conversation.context)
+        return True
+
+    def resize(self, max_sessions: Optional[int] = None, max_total_tokens: Optional[int] = None):
+        """Change the caps, evicting least recently used sessions if now over them"""
+        if max_sessions is not None:
+            self.max_sessions = max_sessions
+        if max_total_tokens is not None:
+            self.max_total_tokens = max_total_tokens
+        self._enforce_limits()
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        while self.conversations:
+            oldest = next(iter(self.conversations.values()))
+            if oldest.last_used > cutoff:
+                break
+            self._evict(oldest.id)
+
+    def _enforce_limits(self):
+        while self.conversations and (
+            len(self.conversations) > self.max_sessions or self.total_tokens > self.max_total_tokens
+        ):
+            self._evict(next(iter(self.conversations)))
+
+    def _evict(self, conversation_id: str):
+        self.delete(conversation_id)
+        self.evicted += 1
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self.conversations),
+            "context_tokens": self.total_tokens,
+            "context_bytes": self.total_tokens * array("I").itemsize,
+            "reused_turns": self.reused_turns,
+            "evicted": self.evicted
+        }
+
+
+conversation_store = ConversationStore(
+    max_sessions=settings.conversation_max_sessions,
+    ttl=settings.conversation_ttl,
+    max_context_tokens=settings.conversation_max_context_tokens,
+    max_total_tokens=settings.conversation_max_total_tokens
+)
@@ -1,17 +1,39 @@
 import time
 import numpy as np
-from typing import List, Dict, Tuple
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional
 import logging
 
+from config import settings
+from core.offload import ComputeExecutor
+from core.ring_buffer import RingBuffer, PARTICLE_RECORD_DTYPE, SIGNATURE_RECORD_DTYPE
+from core.seeding import derive_seed
+from core.text_stats import TextStatistics, TimingStatistics
+
 logger = logging.getLogger(__name__)
 
+LIGHTNING_SEGMENTS = 12
+LIGHTNING_BRANCHES = 3
+LIGHTNING_POINTS = LIGHTNING_SEGMENTS + 1 + 2 * LIGHTNING_BRANCHES
+
 class EnergyCalculator:
     """Calculate energy signatures from AI responses"""
     
-    def __init__(self):
-        self.particle_history = []
+    def __init__(
+        self,
+        particle_history_capacity: int = 4096,
+        signature_history_capacity: int = 1024,
+        visual_cache_size: int = 256
+    ):
+        # Bounded histories: memory is allocated once and never grows
+        self.particle_history = RingBuffer(PARTICLE_RECORD_DTYPE, particle_history_capacity)
+        self.signature_history = RingBuffer(SIGNATURE_RECORD_DTYPE, signature_history_capacity)
         self.energy_baseline = 1.0
         
+        # Seeded visual payloads are deterministic, so they can be replayed from an LRU
+        self.visual_cache_size = visual_cache_size
+        self._visual_cache: "OrderedDict[Tuple, List]" = OrderedDict()
+        
     def calculate_energy_signature(
         self,
         content: str,
@@ -36,29 +58,90 @@ class EnergyCalculator:
             # Calculate resonance (consistency of timing)
             resonance = self._calculate_resonance(token_times)
             
+            # One pass over the text feeds both semantic density and confidence
+            text_stats = TextStatistics.from_text(content)
+            
             # Semantic density (complexity measure)
-            semantic_density = self._calculate_semantic_density(content)
+            semantic_density = self._calculate_semantic_density(text_stats)
             
             # Confidence flow (based on response characteristics)
-            confidence_flow = self._calculate_confidence_flow(content, token_times)
+            confidence_flow = self._calculate_confidence_flow(text_stats, resonance)
             
-            return {
-                "energy_density": round(energy_density, 3),
-                "flow_rate": round(flow_rate, 3),
-                "resonance": round(resonance, 3),
-                "semantic_density": round(semantic_density, 3),
-                "confidence_flow": round(confidence_flow, 3),
-                "token_count": token_count,
-                "generation_time": round(total_time, 3),
-                "energy_level": self._calculate_overall_energy(
-                    energy_density, flow_rate, resonance, semantic_density
-                )
-            }
+            signature = self._build_signature(
+                energy_density, flow_rate, resonance, semantic_density,
+                confidence_flow, token_count, total_time
+            )
+            self._record_signature(signature)
+            
+            return signature
             
         except Exception as e:
             logger.error(f"Energy calculation failed: {e}")
             return self._empty_signature()
     
+    def calculate_streaming_signature(
+        self,
+        text_stats: TextStatistics,
+        timing_stats: TimingStatistics,
+        start_time: float
+    ) -> Dict:
+        """Calculate energy signature from incremental stream statistics
+        
+        Same metrics as calculate_energy_signature, but every input is an
+        accumulated counter, so a live signature costs O(1) per token.
+        """
+        try:
+            if not timing_stats.token_count:
+                return self._empty_signature()
+            
+            total_time = timing_stats.last_time - start_time
+            token_count = timing_stats.token_count
+            
+            energy_density = text_stats.char_count / total_time if total_time > 0 else 0
+            flow_rate = token_count / total_time if total_time > 0 else 0
+            resonance = timing_stats.resonance()
+            semantic_density = text_stats.semantic_density()
+            
+            if text_stats.char_count:
+                confidence_flow = min(1.0, max(0.0,
+                    text_stats.text_confidence() * 0.6 + resonance * 0.4
+                ))
+            else:
+                confidence_flow = 0.0
+            
+            return self._build_signature(
+                energy_density, flow_rate, resonance, semantic_density,
+                confidence_flow, token_count, total_time
+            )
+            
+        except Exception as e:
+            logger.error(f"Streaming energy calculation failed: {e}")
+            return self._empty_signature()
+    
+    def _build_signature(
+        self,
+        energy_density: float,
+        flow_rate: float,
+        resonance: float,
+        semantic_density: float,
+        confidence_flow: float,
+        token_count: int,
+        total_time: float
+    ) -> Dict:
+        """Assemble the rounded signature dictionary"""
+        return {
+            "energy_density": round(energy_density, 3),
+            "flow_rate": round(flow_rate, 3),
+            "resonance": round(resonance, 3),
+            "semantic_density": round(semantic_density, 3),
+            "confidence_flow": round(confidence_flow, 3),
+            "token_count": token_count,
+            "generation_time": round(total_time, 3),
+            "energy_level": self._calculate_overall_energy(
+                energy_density, flow_rate, resonance, semantic_density
+            )
+        }
+    
     def _calculate_resonance(self, token_times: List[float]) -> float:
         """Calculate timing resonance (0-1, higher = more consistent)"""
         if len(token_times) < 2:
@@ -83,63 +166,23 @@ class EnergyCalculator:
         
         return min(1.0, max(0.0, resonance))
     
-    def _calculate_semantic_density(self, content: str) -> float:
+    def _calculate_semantic_density(self, text_stats: TextStatistics) -> float:
         """Calculate semantic complexity (0-1)"""
-        if not content:
-            return 0.0
-        
-        # Simple heuristics for semantic density
-        words = content.split()
-        
-        if not words:
+        if not text_stats.char_count:
             return 0.0
         
-        # Average word length
-        avg_word_length = sum(len(word) for word in words) / len(words)
-        
-        # Unique word ratio
-        unique_ratio = len(set(words)) / len(words)
-        
-        # Sentence complexity (punctuation density)
-        punctuation_count = sum(1 for char in content if char in '.,!?;:')
-        punctuation_density = punctuation_count / len(content)
-        
-        # Combine metrics
-        semantic_density = (
-            (avg_word_length / 10.0) * 0.3 +  # Word complexity
-            unique_ratio * 0.5 +               # Vocabulary richness
-            (punctuation_density * 10) * 0.2   # Structural complexity
-        )
-        
-        return min(1.0, max(0.0, semantic_density))
+        return text_stats.semantic_density()
     
-    def _calculate_confidence_flow(self, content: str, token_times: List[float]) -> float:
+    def _calculate_confidence_flow(self, text_stats: TextStatistics, resonance: float) -> float:
         """Calculate confidence flow based on content and timing patterns"""
-        if not content or not token_times:
+        if not text_stats.char_count:
             return 0.0
         
-        # Detect confidence indicators in text
-        confidence_words = [
-            'certainly', 'definitely', 'clearly', 'obviously', 'exactly',
-            'precisely', 'absolutely', 'undoubtedly', 'surely', 'indeed'
-        ]
-        
-        uncertainty_words = [
-            'maybe', 'perhaps', 'possibly', 'might', 'could', 'may',
-            'uncertain', 'unclear', 'probably', 'likely', 'seems'
-        ]
-        
-        words = content.lower().split()
-        
-        confidence_score = sum(1 for word in words if word in confidence_words)
-        uncertainty_score = sum(1 for word in words if word in uncertainty_words)
-        
-        # Text-based confidence
-        text_confidence = (confidence_score - uncertainty_score) / len(words) if words else 0
-        text_confidence = (text_confidence + 1) / 2  # Normalize to 0-1
+        # Text-based confidence from confidence/uncertainty indicators
+        text_confidence = text_stats.text_confidence()
         
         # Timing-based confidence (steady timing = higher confidence)
-        timing_confidence = self._calculate_resonance(token_times)
+        timing_confidence = resonance
         
         # Combine both measures
         confidence_flow = (text_confidence * 0.6 + timing_confidence * 0.4)
@@ -177,45 +220,178 @@ class EnergyCalculator:
             "energy_level": 0.0
         }
     
-    def generate_particles_from_signature(self, signature: Dict, query: str) -> List[Dict]:
-        """Generate particle data from energy signature"""
+    def generate_particles_from_signature(
+        self,
+        signature: Dict,
+        query: str,
+        rng: Optional[np.random.Generator] = None
+    ) -> List[Dict]:
+        """Generate particle data from energy signature
+        
+        Without an explicit rng the generator is seeded from the signature and
+        query, so identical inputs yield identical (cached) particles.
+        """
         try:
-            particle_count = min(100, max(10, signature.get("token_count", 20)))
-            energy_level = signature.get("energy_level", 1.0)
+            seed, cache_key, cached = self._particle_request(signature, query, rng)
+            if cached is not None:
+                self._record_particles(cached)
+                return cached
             
-            particles = []
-            
-            for i in range(particle_count):
-                # Position along a path from input to center
-                t = i / particle_count
-                
-                particle = {
-                    "id": f"particle_{int(time.time() * 1000)}_{i}",
-                    "position": {
-                        "x": -3 + (t * 3),  # Move from left to center
-                        "y": -2 + (t * 2),  # Move from bottom to center
-                        "z": (np.random.random() - 0.5) * 0.5
-                    },
-                    "velocity": {
-                        "x": np.random.normal(0, 0.5),
-                        "y": np.random.normal(0.5, 0.3),
-                        "z": np.random.normal(0, 0.2)
-                    },
-                    "color": self._get_energy_color(signature),
-                    "lifetime": 3.0 + np.random.random() * 2.0,
-                    "size": 0.05 + (energy_level / 10) * 0.1,
-                    "energy": energy_level / 10
-                }
-                
-                particles.append(particle)
-            
-            return particles
+            count = self._particle_count(signature)
+            return self._finish_particles(signature, seed, cache_key, particle_kernel(count, seed))
             
         except Exception as e:
             logger.error(f"Particle generation failed: {e}")
             return []
     
-    def _get_energy_color(self, signature: Dict) -> str:
+    async def generate_particles_batch(
+        self,
+        requests: List[Tuple[Dict, str]],
+        executor: ComputeExecutor
+    ) -> List[List[Dict]]:
+        """Generate particles for several (signature, query) pairs in one offloaded batch
+        
+        Cache hits are served locally; the remaining kernels run as a single
+        executor task sized by the total particle count.
+        """
+        results: List[Optional[List[Dict]]] = [None] * len(requests)
+        pending = []
+        for index, (signature, query) in enumerate(requests):
+            seed, cache_key, cached = self._particle_request(signature, query)
+            if cached is not None:
+                self._record_particles(cached)
+                results[index] = cached
+            else:
+                pending.append((index, signature, seed, cache_key, self._particle_count(signature)))
+        
+        if pending:
+            try:
+                arrays = await executor.map(
+                    particle_kernel,
+                    [(count, seed) for _, _, seed, _, count in pending],
+                    size=sum(count for *_, count in pending)
+                )
+                for (index, signature, seed, cache_key, _), array in zip(pending, arrays):
+                    results[index] = self._finish_particles(signature, seed, cache_key, array)
+            except Exception as e:
+                logger.error(f"Particle generation failed: {e}")
+                for index, *_ in pending:
+                    results[index] = []
+        
+        return results
+    
+    def _particle_request(
+        self,
+        signature: Dict,
+        query: str,
+        rng: Optional[np.random.Generator] = None
+    ) -> Tuple[int, Optional[Tuple], Optional[List]]:
+        """Resolve the seed, cache key and any cached payload for a particle request"""
+        if rng is not None:
+            return int(rng.integers(0, 2**63)), None, None
+        seed = derive_seed("particles", signature, query)
+        cache_key = ("particles", seed)
+        return seed, cache_key, self._cache_get(cache_key)
+    
+    def _particle_count(self, signature: Dict) -> int:
+        return min(100, max(10, signature.get("token_count", 20)))
+    
+    def _finish_particles(
+        self,
+        signature: Dict,
+        seed: int,
+        cache_key: Optional[Tuple],
+        array: np.ndarray
+    ) -> List[Dict]:
+        """Turn a particle_kernel result into particle payloads, record and cache them"""
+        energy_level = signature.get("energy_level", 1.0)
+        color = self.get_energy_color(signature)
+        size = 0.05 + (energy_level / 10) * 0.1
+        count = len(array)
+        
+        particles = []
+        for i, (z, vx, vy, vz, lifetime) in enumerate(array.tolist()):
+            # Position along a path from input to center
+            t = i / count
+            particles.append({
+                "id": f"particle_{seed:x}_{i}",
+                "position": {
+                    "x": -3 + (t * 3),  # Move from left to center
+                    "y": -2 + (t * 2),  # Move from bottom to center
+                    "z": z
+                },
+                "velocity": {"x": vx, "y": vy, "z": vz},
+                "color": color,
+                "lifetime": lifetime,
+                "size": size,
+                "energy": energy_level / 10
+            })
+        
+        self._record_particles(particles)
+        
+        if cache_key is not None:
+            self._cache_put(cache_key, particles)
+        
+        return particles
+    
+    def _cache_get(self, key: Tuple) -> Optional[List]:
+        """Look up a memoized visual payload (treat results as read-only)"""
+        payload = self._visual_cache.get(key)
+        if payload is not None:
+            self._visual_cache.move_to_end(key)
+        return payload
+    
+    def _cache_put(self, key: Tuple, payload: List):
+        """Memoize a visual payload, evicting the least recently used"""
+        if self.visual_cache_size <= 0:
+            return
+        self._visual_cache[key] = payload
+        self._visual_cache.move_to_end(key)
+        while len(self._visual_cache) > self.visual_cache_size:
+            self._visual_cache.popitem(last=False)
+    
+    def resize_visual_cache(self, size: int):
+        """Change the visual payload LRU size, trimming the oldest entries"""
+        self.visual_cache_size = size
+        while len(self._visual_cache) > max(0, size):
+            self._visual_cache.popitem(last=False)
+    
+    def _record_signature(self, signature: Dict):
+        """Append a finished signature to the bounded signature history"""
+        self.signature_history.append((
+            time.time(),
+            signature["energy_density"],
+            signature["flow_rate"],
+            signature["resonance"],
+            signature["semantic_density"],
+            signature["confidence_flow"],
+            signature["energy_level"],
+            signature["generation_time"],
+            signature["token_count"]
+        ))
+    
+    def _record_particles(self, particles: List[Dict]):
+        """Append a particle batch to the bounded particle history"""
+        now = time.time()
+        records = np.array([
+            (
+                now,
+                p["position"]["x"], p["position"]["y"], p["position"]["z"],
+                p["velocity"]["x"], p["velocity"]["y"], p["velocity"]["z"],
+                p["lifetime"], p["size"], p["energy"]
+            )
+            for p in particles
+        ], dtype=PARTICLE_RECORD_DTYPE)
+        self.particle_history.extend(records)
+    
+    def get_history_stats(self) -> Dict:
+        """Occupancy and memory footprint of the history buffers"""
+        return {
+            "particles": self.particle_history.stats(),
+            "signatures": self.signature_history.stats()
+        }
+    
+    def get_energy_color(self, signature: Dict) -> str:
         """Get particle color based on energy signature"""
         energy_level = signature.get("energy_level", 1.0)
         resonance = signature.get("resonance", 0.5)
@@ -229,48 +405,130 @@ class EnergyCalculator:
         else:
             return "#9b59b6"  # Purple for low energy
     
-    def calculate_lightning_path(self, start: Tuple[float, float, float], end: Tuple[float, float, float]) -> List[List[Dict]]:
-        """Generate lightning path with branches"""
+    def calculate_lightning_path(
+        self,
+        start: Tuple[float, float, float],
+        end: Tuple[float, float, float],
+        seed: Optional[int] = None,
+        rng: Optional[np.random.Generator] = None
+    ) -> List[List[Dict]]:
+        """Generate lightning path with branches
+        
+        Pass a seed (e.g. derive_seed of the request) for a reproducible,
+        cached path, or an rng to draw from a session generator.
+        """
         try:
-            branches = []
+            cache_key = None
+            if rng is not None:
+                seed = int(rng.integers(0, 2**63))
+            elif seed is not None:
+                cache_key = ("lightning", seed, tuple(start), tuple(end))
+                cached = self._cache_get(cache_key)
+                if cached is not None:
+                    return cached
             
-            # Main lightning path
-            main_path = []
-            segments = 12
+            branches = self._branches_from_array(lightning_kernel(start, end, seed))
             
-            for i in range(segments + 1):
-                t = i / segments
-                
-                # Base position along straight line
-                x = start[0] + t * (end[0] - start[0])
-                y = start[1] + t * (end[1] - start[1])
-                z = start[2] + t * (end[2] - start[2])
-                
-                # Add randomness for lightning effect
-                if 0 < i < segments:
-                    x += np.random.normal(0, 0.2)
-                    y += np.random.normal(0, 0.2)
-                    z += np.random.normal(0, 0.1)
-                
-                main_path.append({"x": x, "y": y, "z": z})
-            
-            branches.append(main_path)
-            
-            # Add smaller branches
-            for _ in range(3):
-                branch_start_idx = np.random.randint(2, len(main_path) - 2)
-                branch_start = main_path[branch_start_idx]
-                
-                branch_end = {
-                    "x": branch_start["x"] + np.random.normal(0, 1.0),
-                    "y": branch_start["y"] + np.random.normal(0, 1.0),
-                    "z": branch_start["z"] + np.random.normal(0, 0.5)
-                }
-                
-                branches.append([branch_start, branch_end])
+            if cache_key is not None:
+                self._cache_put(cache_key, branches)
             
             return branches
             
         except Exception as e:
             logger.error(f"Lightning path generation failed: {e}")
-            return [] 
\ No newline at end of file
+            return []
+    
+    async def calculate_lightning_paths(
+        self,
+        requests: List[Tuple[Tuple[float, float, float], Tuple[float, float, float], int]],
+        executor: ComputeExecutor
+    ) -> List[List[List[Dict]]]:
+        """Generate several seeded (start, end, seed) lightning paths in one offloaded batch"""
+        results: List[Optional[List[List[Dict]]]] = [None] * len(requests)
+        pending = []
+        for index, (start, end, seed) in enumerate(requests):
+            cache_key = ("lightning", seed, tuple(start), tuple(end))
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, cache_key, (start, end, seed)))
+        
+        if pending:
+            try:
+                arrays = await executor.map(
+                    lightning_kernel,
+                    [args for *_, args in pending],
+                    size=len(pending) * LIGHTNING_POINTS
+                )
+                for (index, cache_key, _), array in zip(pending, arrays):
+                    branches = self._branches_from_array(array)
+                    self._cache_put(cache_key, branches)
+                    results[index] = branches
+            except Exception as e:
+                logger.error(f"Lightning path generation failed: {e}")
+                for index, *_ in pending:
+                    results[index] = []
+        
+        return results
+    
+    def _branches_from_array(self, array: np.ndarray) -> List[List[Dict]]:
+        """Unpack a lightning_kernel result into the main path plus branch pairs"""
+        points = [{"x": x, "y": y, "z": z} for x, y, z in array.tolist()]
+        main_path = points[:LIGHTNING_SEGMENTS + 1]
+        branch_points = points[LIGHTNING_SEGMENTS + 1:]
+        return [main_path] + [branch_points[i:i + 2] for i in range(0, len(branch_points), 2)]
+
+
+def particle_kernel(count: int, seed: int) -> np.ndarray:
+    """Random part of a particle batch: (count, 5) rows of z, vx, vy, vz, lifetime
+    
+    Pure and module-level so it can run in a worker process.
+    """
+    rng = np.random.default_rng(seed)
+    out = np.empty((count, 5))
+    out[:, 0] = (rng.random(count) - 0.5) * 0.5
+    out[:, 1:4] = rng.normal((0.0, 0.5, 0.0), (0.5, 0.3, 0.2), size=(count, 3))
+    out[:, 4] = 3.0 + rng.random(count) * 2.0
+    return out
+
+
+def lightning_kernel(
+    start: Tuple[float, float, float],
+    end: Tuple[float, float, float],
+    seed: Optional[int]
+) -> np.ndarray:
+    """Lightning geometry as (LIGHTNING_POINTS, 3): the main path, then a start/end pair per branch
+    
+    Pure and module-level so it can run in a worker process.
+    """
+    rng = np.random.default_rng(seed)
+    start = np.asarray(start, dtype=float)
+    end = np.asarray(end, dtype=float)
+    
+    # Main path: straight line with jitter on the interior points
+    t = np.linspace(0.0, 1.0, LIGHTNING_SEGMENTS + 1)[:, None]
+    main_path = start + t * (end - start)
+    main_path[1:-1] += rng.normal(0.0, (0.2, 0.2, 0.1), size=(LIGHTNING_SEGMENTS - 1, 3))
+    
+    # Smaller branches fork off interior points
+    fork = rng.integers(2, LIGHTNING_SEGMENTS - 1, size=LIGHTNING_BRANCHES)
+    branch_starts = main_path[fork]
+    branch_ends = branch_starts + rng.normal(0.0, (1.0, 1.0, 0.5), size=(LIGHTNING_BRANCHES, 3))
+    
+    pairs = np.stack([branch_starts, branch_ends], axis=1).reshape(-1, 3)
+    return np.concatenate([main_path, pairs])
+
+
+_calculator: Optional[EnergyCalculator] = None
+
+def get_energy_calculator() -> EnergyCalculator:
+    """The process-wide calculator shared by live streams, the lifespan and the admin API"""
+    global _calculator
+    if _calculator is None:
+        _calculator = EnergyCalculator(
+            particle_history_capacity=settings.particle_history_capacity,
+            signature_history_capacity=settings.signature_history_capacity,
+            visual_cache_size=settings.visual_cache_size
+        )
+    return _calculator
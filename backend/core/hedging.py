@@ -0,0 +1,82 @@
+import math
+from collections import deque
+from typing import Deque, Dict
+
+
+class HedgePolicy:
+    """When to re-issue a slow request on a second backend, and how often
+
+    The hedge delay is a percentile of recent time-to-first-token for the
+    model, clamped to [min_delay, max_delay], so only the slowest requests
+    get hedged. Hedges are paid for from a token bucket: every request earns
+    budget tokens (capped at burst) and every hedge spends one, which keeps
+    the extra load at or below budget x traffic even when a backend stalls.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_delay: float = 0.05,
+        max_delay: float = 2.0,
+        budget: float = 0.1,
+        burst: float = 5.0,
+        window: int = 256,
+        min_samples: int = 20
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.burst = burst
+        self.window = window
+        self.min_samples = min_samples
+        self.tokens = burst
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.denied = 0
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def delay_for(self, model: str) -> float:
+        """Seconds to wait for the first token before hedging"""
+        samples = self._samples.get(model)
+        if samples is None or len(samples) < self.min_samples:
+            return self.max_delay  # Unknown model: only hedge real stalls
+        ordered = sorted(samples)
+        value = ordered[min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)]
+        return min(self.max_delay, max(self.min_delay, value))
+
+    def observe(self, model: str, ttft: float):
+        """Record a time to first token, measured from the start of the request"""
+        samples = self._samples.get(model)
+        if samples is None:
+            samples = deque(maxlen=self.window)
+            self._samples[model] = samples
+        samples.append(ttft)
+
+    def on_request(self):
+        self.requests += 1
+        self.tokens = min(self.burst, self.tokens + self.budget)
+
+    def try_hedge(self) -> bool:
+        """Spend one budget token on a hedge, if there is one"""
+        if self.tokens < 1.0:
+            self.denied += 1
+            return False
+        self.tokens -= 1.0
+        self.hedged += 1
+        return True
+
+    def on_hedge_win(self):
+        self.hedge_wins += 1
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "denied": self.denied,
+            "extra_load": round(self.hedged / self.requests, 4) if self.requests else 0.0,
+            "budget": self.budget,
+            "delays": {model: round(self.delay_for(model), 3) for model in self._samples}
+        }
@@ -0,0 +1,79 @@
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class LimitExceeded(Exception):
+    """The limiter is at capacity and its wait queue is full"""
+
+
+class ResizableLimiter:
+    """Concurrency limit with a bounded wait queue, resizable under load
+
+    Up to limit holders run at once and up to max_waiting more queue in
+    FIFO order; beyond that acquire() raises LimitExceeded. Raising the limit
+    admits waiters immediately. Lowering it never interrupts holders: new
+    work simply waits until in-flight work has drained below the new limit.
+    """
+
+    def __init__(self, limit: int, max_waiting: Optional[int] = 0):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if self.max_waiting is not None and len(self._waiters) >= self.max_waiting:
+            self.rejected += 1
+            raise LimitExceeded(f"At capacity: {self.active} running, {len(self._waiters)} waiting")
+
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # Admitted just as the caller gave up: pass the slot on
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        self.admitted += 1
+
+    def release(self):
+        self.active -= 1
+        self._wake()
+
+    def resize(self, limit: Optional[int] = None, max_waiting: Optional[int] = None):
+        if limit is not None:
+            self.limit = limit
+        if max_waiting is not None:
+            self.max_waiting = max_waiting
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.active < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "max_waiting": self.max_waiting,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected
+        }
+
@@ -0,0 +1,107 @@
+import logging
+import re
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from config import WIRTHFORGE_MODELS, ENERGY_COLORS
+
+logger = logging.getLogger(__name__)
+
+# Parameter count as its own token: "4b" in "qwen3:4b-instruct" but not in "qwen3:14b"
+_SIZE_PATTERN = re.compile(r"(?<![\w.])(\d+(?:\.\d+)?)b(?![a-z0-9])")
+_FAMILY_PATTERN = re.compile(r"[a-z]+")
+
+DEFAULT_COLOR = "#00ffff"
+
+
+class ModelProfile(NamedTuple):
+    tag: str
+    family: str
+    size_b: Optional[float]
+    energy_type: str
+    consciousness_level: int
+    response_speed: str
+    perspective: str
+    color: str
+
+
+def parse_tag(tag: str) -> Tuple[str, Optional[float]]:
+    """Split an Ollama tag into (family, parameter count in billions)"""
+    name, _, variant = tag.lower().partition(":")
+    family = _FAMILY_PATTERN.match(name)
+    size = _SIZE_PATTERN.search(variant or name)
+    return (family.group(0) if family else name), (float(size.group(1)) if size else None)
+
+
+class ModelRegistry:
+    """Model metadata compiled once from WIRTHFORGE_MODELS and ENERGY_COLORS
+
+    Known tags resolve with one dict lookup. Other tags (quantized variants,
+    ":latest", unknown families) are parsed once into (family, size) and the
+    answer is cached. Energy type and color follow the family; consciousness
+    level, speed and perspective follow the parameter count alone.
+    """
+
+    def __init__(self, models: Dict[str, Dict], colors: Dict[str, str], max_cached: int = 1024):
+        self.max_cached = max_cached
+        self._configured = frozenset(models)
+        self._profiles: Dict[str, ModelProfile] = {}
+        self._by_family_size: Dict[Tuple[str, float], ModelProfile] = {}
+        self._by_size: Dict[float, ModelProfile] = {}
+
+        for tag, info in models.items():
+            family, size = parse_tag(tag)
+            profile = ModelProfile(
+                tag=tag,
+                family=family,
+                size_b=size,
+                energy_type=info["energy_type"],
+                consciousness_level=info["consciousness_level"],
+                response_speed=info.get("response_speed", "unknown"),
+                perspective=info.get("perspective", "Unknown"),
+                color=colors.get(info["energy_type"], DEFAULT_COLOR)
+            )
+            self._profiles[tag] = profile
+            if size is not None:
+                self._by_family_size[(family, size)] = profile
+                self._by_size.setdefault(size, profile)
+
+    def lookup(self, tag: str) -> ModelProfile:
+        profile = self._profiles.get(tag)
+        if profile is None:
+            profile = self._resolve(tag)
+            if len(self._profiles) - len(self._configured) >= self.max_cached:
+                # Drop resolved tags in insertion order, never the configured ones
+                stale = next(t for t in self._profiles if t not in self._configured)
+                del self._profiles[stale]
+            self._profiles[tag] = profile
+        return profile
+
+    def _resolve(self, tag: str) -> ModelProfile:
+        family, size = parse_tag(tag)
+        match = self._by_family_size.get((family, size))
+        if match is not None:
+            return match._replace(tag=tag)
+
+        sized = self._by_size.get(size)
+        return ModelProfile(
+            tag=tag,
+            family=family,
+            size_b=size,
+            energy_type="unknown",
+            consciousness_level=sized.consciousness_level if sized else 1,
+            response_speed=sized.response_speed if sized else "unknown",
+            perspective=sized.perspective if sized else "Unknown",
+            color=DEFAULT_COLOR
+        )
+
+    def describe(self, tag: str) -> Dict:
+        """Energy metadata for API responses"""
+        profile = self.lookup(tag)
+        return {
+            "energy_type": profile.energy_type,
+            "consciousness_level": profile.consciousness_level,
+            "response_speed": profile.response_speed
+        }
+
+
+model_registry = ModelRegistry(WIRTHFORGE_MODELS, ENERGY_COLORS)
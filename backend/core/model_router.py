@@ -0,0 +1,243 @@
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional
+
+from config import settings, WIRTHFORGE_MODELS
+from core.model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+# Priors for models that have not been measured yet, so they still get tried
+PRIOR_TTFT = 0.5
+PRIOR_TOKENS_PER_SECOND = 30.0
+PRIOR_RESPONSE_TOKENS = 200.0
+COLD_START_PENALTY = 5.0
+
+
+class ModelStats:
+    """Live latency statistics for one model (EWMAs updated per request)"""
+
+    def __init__(self, model: str, alpha: float = 0.2):
+        self.model = model
+        self.alpha = alpha
+        self.ttft: Optional[float] = None
+        self.tokens_per_second: Optional[float] = None
+        self.response_tokens: Optional[float] = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.last_finished: Optional[float] = None
+
+    def _ewma(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else current + self.alpha * (sample - current)
+
+    def on_first_token(self, ttft: float):
+        self.ttft = self._ewma(self.ttft, ttft)
+
+    def on_finish(self, tokens: int, stream_seconds: float, ok: bool, complete: bool):
+        """Record the end of a stream; complete is False when the caller stopped early"""
+        self.in_flight = max(0, self.in_flight - 1)
+        self.last_finished = time.monotonic()
+        if not ok:
+            self.failed += 1
+            return
+        if tokens > 1 and stream_seconds > 0:
+            # Same measure as the signature's flow_rate: tokens over streaming time
+            self.tokens_per_second = self._ewma(self.tokens_per_second, tokens / stream_seconds)
+        if complete:
+            self.completed += 1
+            if tokens:
+                self.response_tokens = self._ewma(self.response_tokens, float(tokens))
+
+    def resident(self, window: float) -> bool:
+        """Whether Ollama most likely still has the model loaded"""
+        return self.last_finished is not None and time.monotonic() - self.last_finished < window
+
+    def predicted_latency(self, resident: bool, expected_tokens: Optional[float] = None) -> float:
+        """Seconds until a new request here would finish, including queueing"""
+        ttft = self.ttft if self.ttft is not None else PRIOR_TTFT
+        tps = self.tokens_per_second or PRIOR_TOKENS_PER_SECOND
+        tokens = expected_tokens or self.response_tokens or PRIOR_RESPONSE_TOKENS
+        service = ttft + tokens / tps
+        cold = 0.0 if resident else COLD_START_PENALTY
+        return cold + service * (1 + self.in_flight)
+
+    def stats(self) -> Dict:
+        return {
+            "ttft": self.ttft,
+            "tokens_per_second": self.tokens_per_second,
+            "response_tokens": self.response_tokens,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+
+class Candidate:
+    """A model considered for one routing decision"""
+
+    def __init__(self, model: str, cost: float, level: int, predicted_latency: float, resident: bool):
+        self.model = model
+        self.cost = cost
+        self.level = level
+        self.predicted_latency = predicted_latency
+        self.resident = resident
+
+    def describe(self) -> Dict:
+        return {
+            "model": self.model,
+            "cost": self.cost,
+            "predicted_latency": round(self.predicted_latency, 3),
+            "resident": self.resident
+        }
+
+
+class RoutingPolicy:
+    """Chooses a model from the level-eligible candidates"""
+
+    name = "base"
+
+    def choose(self, candidates: List[Candidate], slo: float) -> Candidate:
+        raise NotImplementedError
+
+
+class CheapestWithinSLO(RoutingPolicy):
+    """Smallest model predicted to meet the SLO, else the fastest one"""
+
+    name = "cheapest_within_slo"
+
+    def choose(self, candidates: List[Candidate], slo: float) -> Candidate:
+        within = [c for c in candidates if c.predicted_latency <= slo]
+        if within:
+            return min(within, key=lambda c: (c.cost, c.predicted_latency))
+        return min(candidates, key=lambda c: c.predicted_latency)
+
+
+class FastestPolicy(RoutingPolicy):
+    """Lowest predicted latency regardless of model size"""
+
+    name = "fastest"
+
+    def choose(self, candidates: List[Candidate], slo: float) -> Candidate:
+        return min(candidates, key=lambda c: (c.predicted_latency, c.cost))
+
+
+ROUTING_POLICIES = {policy.name: policy for policy in (CheapestWithinSLO, FastestPolicy)}
+
+
+class ModelRouter:
+    """Picks a model per request from live per-model latency statistics
+
+    OllamaClient reports time to first token, streaming rate and in-flight
+    counts for every generation. A request at a given level is eligible for
+    models whose consciousness level is at least that level, and the
+    pluggable policy picks among them using predicted latency against the
+    SLO. Models used within the residency window count as loaded. Every
+    decision is logged and the most recent ones kept for inspection.
+    """
+
+    def __init__(
+        self,
+        models: Iterable[str],
+        policy: RoutingPolicy,
+        latency_slo: float = 5.0,
+        residency_window: float = 300.0,
+        history: int = 100
+    ):
+        self.models = list(models)
+        self.policy = policy
+        self.latency_slo = latency_slo
+        self.residency_window = residency_window
+        self.available: Optional[set] = None  # Installed models, once known
+        self.decisions: Deque[Dict] = deque(maxlen=history)
+        self._stats: Dict[str, ModelStats] = {}
+
+    def stats_for(self, model: str) -> ModelStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = ModelStats(model)
+            self._stats[model] = stats
+        return stats
+
+    def set_available(self, models: Iterable[str]):
+        self.available = set(models)
+
+    # Observations from OllamaClient
+
+    def on_start(self, model: str):
+        self.stats_for(model).in_flight += 1
+
+    def on_first_token(self, model: str, ttft: float):
+        self.stats_for(model).on_first_token(ttft)
+
+    def on_finish(self, model: str, tokens: int, stream_seconds: float,
+                  ok: bool = True, complete: bool = True):
+        self.stats_for(model).on_finish(tokens, stream_seconds, ok, complete)
+
+    def route(
+        self,
+        level: int = 1,
+        latency_slo: Optional[float] = None,
+        loaded: Iterable[str] = ()
+    ) -> str:
+        """Choose a model for a request at this level"""
+        slo = latency_slo or self.latency_slo
+        loaded = set(loaded)
+
+        candidates = []
+        for model in self.models:
+            if self.available is not None and model not in self.available:
+                continue
+            profile = model_registry.lookup(model)
+            if profile.consciousness_level < level:
+                continue
+            stats = self.stats_for(model)
+            resident = model in loaded or stats.resident(self.residency_window)
+            candidates.append(Candidate(
+                model=model,
+                cost=profile.size_b or 0.0,
+                level=profile.consciousness_level,
+                predicted_latency=stats.predicted_latency(resident),
+                resident=resident
+            ))
+
+        if not candidates:
+            # Nothing installed reaches this level: fall back to the most capable known model
+            fallback = max(self.models, key=lambda m: model_registry.lookup(m).consciousness_level)
+            self._log(level, slo, fallback, [], "no_eligible_model")
+            return fallback
+
+        chosen = self.policy.choose(candidates, slo)
+        reason = "within_slo" if chosen.predicted_latency <= slo else "slo_unreachable"
+        self._log(level, slo, chosen.model, candidates, reason)
+        return chosen.model
+
+    def _log(self, level: int, slo: float, model: str, candidates: List[Candidate], reason: str):
+        decision = {
+            "time": time.time(),
+            "level": level,
+            "slo": slo,
+            "policy": self.policy.name,
+            "model": model,
+            "reason": reason,
+            "candidates": [c.describe() for c in candidates]
+        }
+        self.decisions.append(decision)
+        logger.info(f"🧭 Routed level {level} request to {model} ({reason}, policy {self.policy.name})")
+
+    def stats(self) -> Dict:
+        return {
+            "policy": self.policy.name,
+            "latency_slo": self.latency_slo,
+            "models": {model: stats.stats() for model, stats in self._stats.items()},
+            "recent_decisions": list(self.decisions)[-10:]
+        }
+
+
+model_router = ModelRouter(
+    WIRTHFORGE_MODELS,
+    policy=ROUTING_POLICIES[settings.router_policy](),
+    latency_slo=settings.router_latency_slo,
+    residency_window=settings.router_residency_window
+)
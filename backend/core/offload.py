@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("inline", "thread", "process")
+
+
+def _run_batch(fn: Callable, batch: Sequence[Tuple]) -> List:
+    """Worker-side: run fn over a whole batch in one task"""
+    return [fn(*args) for args in batch]
+
+
+class ComputeExecutor:
+    """Runs CPU-heavy energy/geometry kernels off the event loop
+
+    Work is submitted with a size estimate (elements to compute); anything
+    under inline_threshold runs inline because dispatch would cost more than
+    it saves. Process pools only accept pure module-level functions; stateful
+    work (e.g. stepping a ParticleEngine) always uses the thread pool, where
+    numpy releases the GIL for the heavy parts.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 2, inline_threshold: int = 256):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.inline_threshold = inline_threshold
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self.inline_runs = 0
+        self.offloaded_runs = 0
+
+    def _thread_pool(self) -> Executor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="energy-compute"
+            )
+        return self._threads
+
+    def _process_pool(self) -> Executor:
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._processes
+
+    def _should_offload(self, size: int) -> bool:
+        return self.kind != "inline" and size >= self.inline_threshold
+
+    async def submit(self, fn: Callable, *args, size: int = 0, stateful: bool = False) -> Any:
+        """Run fn(*args), offloading when size is large enough"""
+        if not self._should_offload(size):
+            self.inline_runs += 1
+            return fn(*args)
+
+        self.offloaded_runs += 1
+        loop = asyncio.get_event_loop()
+        if self.kind == "process" and not stateful:
+            return await loop.run_in_executor(self._process_pool(), fn, *args)
+        return await loop.run_in_executor(self._thread_pool(), fn, *args)
+
+    async def map(self, fn: Callable, batch: Sequence[Tuple], size: int = 0) -> List:
+        """Run fn over a batch of argument tuples as one unit of work"""
+        if not batch:
+            return []
+        if not self._should_offload(size):
+            self.inline_runs += 1
+            return _run_batch(fn, batch)
+
+        self.offloaded_runs += 1
+        loop = asyncio.get_event_loop()
+        if self.kind == "process":
+            return await loop.run_in_executor(self._process_pool(), _run_batch, fn, list(batch))
+        return await loop.run_in_executor(self._thread_pool(), _run_batch, fn, list(batch))
+
+    def shutdown(self):
+        if self._threads:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+        if self._processes:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+
+    def stats(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "inline_threshold": self.inline_threshold,
+            "inline_runs": self.inline_runs,
+            "offloaded_runs": self.offloaded_runs
+        }
@@ -1,11 +1,18 @@
 import asyncio
 import logging
-from typing import Dict, List, Optional, AsyncGenerator
-import ollama
+from typing import Dict, List, Optional, AsyncGenerator, Tuple
 from pydantic import BaseModel
 import json
 import time
 
+from config import settings
+from core.conversations import conversation_store
+from core.hedging import HedgePolicy
+from core.limits import ResizableLimiter
+from core.model_registry import model_registry
+from core.model_router import model_router
+from core.text_stats import TimingStatistics
+
 logger = logging.getLogger(__name__)
 
 class ModelInfo(BaseModel):
@@ -23,16 +30,120 @@ class EnergyResponse(BaseModel):
     consciousness_level: int
     model_used: str
 
+class _StreamEnergy:
+    """Running energy signature and timing pattern of one generation
+
+    Each token updates counters in O(1), so a signature per token no longer
+    re-scans the whole response. Bursts (intervals under half the average)
+    are judged against the average at the time the token arrived.
+    """
+
+    def __init__(self, start_time: float):
+        self.start_time = start_time
+        self.chars = 0
+        self.timing = TimingStatistics()
+        self.intervals: List[float] = []
+        self.bursts: List[Dict] = []
+        self._interval_total = 0.0
+        self._shortest = float("inf")
+        self._longest = 0.0
+
+    def feed(self, delta: str, token_time: float):
+        self.chars += len(delta)
+        if self.timing.last_time is not None:
+            interval = token_time - self.timing.last_time
+            self.intervals.append(interval)
+            self._interval_total += interval
+            self._shortest = min(self._shortest, interval)
+            self._longest = max(self._longest, interval)
+            avg_interval = self._interval_total / len(self.intervals)
+            if 0 < interval < avg_interval * 0.5:
+                self.bursts.append({
+                    "position": len(self.intervals) - 1,
+                    "speed": avg_interval / interval,
+                    "intensity": min(2.0, avg_interval / interval)
+                })
+        self.timing.add(token_time)
+
+    def signature(self) -> Dict:
+        elapsed = self.timing.last_time - self.start_time
+        return {
+            "energy_density": self.chars / elapsed if elapsed else 0,
+            "flow_rate": self.timing.token_count / elapsed if elapsed else 0,
+            "resonance": 1.0 / (1.0 + self._longest - self._shortest) if self.intervals else 1.0,
+            "token_count": self.timing.token_count,
+            "generation_time": elapsed
+        }
+
+    def timing_pattern(self) -> Dict:
+        if not self.intervals:
+            return {"intervals": [], "rhythm": 0, "bursts": []}
+        avg_interval = self._interval_total / len(self.intervals)
+        return {
+            "intervals": self.intervals,
+            "rhythm": 1.0 / avg_interval if avg_interval > 0 else 0,
+            "bursts": self.bursts
+        }
+
 class OllamaClient:
     """Energy-aware Ollama client for WIRTHFORGE"""
     
     def __init__(self):
-        self.client = ollama.AsyncClient()
+        import ollama  # Deferred: the SDK and httpx load with the first client, not at startup
+        self.client = ollama.AsyncClient(host=settings.ollama_host)
+        # Extra backends serving the same models; slow first tokens are hedged onto them
+        self.hedge_clients = [
+            ollama.AsyncClient(host=host.strip())
+            for host in settings.ollama_hedge_hosts.split(",") if host.strip()
+        ]
+        self.hedging = HedgePolicy(
+            percentile=settings.ollama_hedge_percentile,
+            min_delay=settings.ollama_hedge_min_delay,
+            max_delay=settings.ollama_hedge_max_delay,
+            budget=settings.ollama_hedge_budget
+        )
+        self._next_hedge = 0
         self.loaded_models: Dict[str, ModelInfo] = {}
-        self.max_loaded_models = 6  # From WIRTHFORGE config
-        self.parallel_limit = 4     # From WIRTHFORGE config
-        self.active_generations = 0
+        self.max_loaded_models = settings.ollama_max_loaded_models
+        # Streams sent to Ollama at once; the rest of max_concurrent_generations queue for a slot
+        self.generation_limiter = ResizableLimiter(
+            settings.ollama_num_parallel,
+            max_waiting=max(0, settings.max_concurrent_generations - settings.ollama_num_parallel)
+        )
+        
+    @property
+    def parallel_limit(self) -> int:
+        return self.generation_limiter.limit
+    
+    @property
+    def active_generations(self) -> int:
+        return self.generation_limiter.active
+    
+    async def resize(
+        self,
+        parallel: Optional[int] = None,
+        max_concurrent: Optional[int] = None,
+        max_loaded_models: Optional[int] = None
+    ):
+        """Change limits under load; running streams finish, new ones see the new limits"""
+        parallel = parallel if parallel is not None else self.generation_limiter.limit
+        if max_concurrent is None:
+            max_concurrent = self.generation_limiter.limit + self.generation_limiter.max_waiting
+        self.generation_limiter.resize(parallel, max_waiting=max(0, max_concurrent - parallel))
         
+        if max_loaded_models is not None:
+            self.max_loaded_models = max_loaded_models
+            while len(self.loaded_models) > self.max_loaded_models:
+                await self._unload_least_used_model()
+    
+    def limits(self) -> Dict:
+        return {
+            "ollama_num_parallel": self.generation_limiter.limit,
+            "max_concurrent_generations": self.generation_limiter.limit + self.generation_limiter.max_waiting,
+            "ollama_max_loaded_models": self.max_loaded_models,
+            "generations": self.generation_limiter.stats()
+        }
+    
     async def initialize(self):
         """Initialize the Ollama client and check available models"""
         try:
@@ -58,8 +169,8 @@ class OllamaClient:
     async def health_check(self) -> str:
         """Check if Ollama is running and responsive"""
         try:
-            # Use synchronous client for health check
-            models = ollama.list()
+            # Async client: a sync call here would block every socket while Ollama answers
+            await self.client.list()
             return "healthy"
         except Exception as e:
             logger.error(f"Ollama health check failed: {e}")
@@ -68,8 +179,7 @@ class OllamaClient:
     async def list_models(self) -> List[Dict]:
         """List all available models with energy signatures"""
         try:
-            # Use synchronous client for listing models
-            response = ollama.list()
+            response = await self.client.list()
             models = []
             
             # Response is a ListResponse object with models attribute
@@ -88,12 +198,11 @@ class OllamaClient:
                         "name": model_name,
                         "size": model_size,
                         "modified_at": modified_at,
-                        "energy_type": self._get_energy_type(model_name),
-                        "consciousness_level": self._get_consciousness_level(model_name),
-                        "response_speed": self._get_response_speed(model_name)
+                        **model_registry.describe(model_name)
                     }
                     models.append(energy_info)
             
+            model_router.set_available(m["name"] for m in models)
             logger.info(f"🔥 Found {len(models)} available models")
             return models
             
@@ -119,8 +228,8 @@ class OllamaClient:
             self.loaded_models[model_name] = ModelInfo(
                 name=model_name,
                 size=0,  # Will be updated when we get model info
-                energy_type=self._get_energy_type(model_name),
-                consciousness_level=self._get_consciousness_level(model_name),
+                energy_type=model_registry.lookup(model_name).energy_type,
+                consciousness_level=model_registry.lookup(model_name).consciousness_level,
                 loaded=True,
                 last_used=time.time()
             )
@@ -132,61 +241,183 @@ class OllamaClient:
             logger.error(f"Failed to load model {model_name}: {e}")
             return False
     
-    async def generate_with_energy(
+    async def stream_tokens(
         self,
         model: str,
         prompt: str,
-        stream: bool = False,
+        conversation_id: Optional[str] = None,
         **kwargs
-    ) -> AsyncGenerator[EnergyResponse, None]:
-        """Generate response with energy signature tracking"""
+    ) -> AsyncGenerator[Tuple[str, float], None]:
+        """Stream raw token deltas with their arrival times (no per-token energy math)
         
-        if self.active_generations >= self.parallel_limit:
-            raise Exception("Maximum parallel generations reached")
+        With a conversation_id, the previous turn's context is sent along so
+        Ollama only evaluates the new prompt, and this turn's context is kept
+        for the next one. Turns of one conversation run one at a time.
+        """
         
-        self.active_generations += 1
-        start_time = time.time()
+        conversation = conversation_store.get(conversation_id) if conversation_id else None
         
+        # Wait for this conversation's previous turn before taking a slot, so a
+        # queued turn never holds Ollama capacity it cannot use yet
+        if conversation is not None:
+            await conversation.lock.acquire()
         try:
+            # Waits for a slot when Ollama is busy; raises LimitExceeded when the wait queue is full too
+            await self.generation_limiter.acquire()
+        except BaseException:
+            if conversation is not None:
+                conversation.lock.release()
+            raise
+        model_router.on_start(model)
+        started = time.time()
+        first_token_time = None
+        tokens = 0
+        complete = failed = False
+        
+        try:
+            if conversation is not None:
+                context = conversation.context_for(model)
+                if context:
+                    kwargs["context"] = context
+            
             # Update model usage
             if model in self.loaded_models:
                 self.loaded_models[model].last_used = time.time()
             
-            # Generate response with streaming
-            response_content = ""
-            token_times = []
-            
-            async for chunk in await self.client.generate(
-                model=model,
-                prompt=prompt,
-                stream=True,
-                **kwargs
-            ):
+            async for chunk in self._stream_chunks(model, prompt, **kwargs):
                 if chunk.get("response"):
-                    token_times.append(time.time())
-                    response_content += chunk["response"]
-                    
-                    # Calculate energy signature
-                    energy_signature = self._calculate_energy_signature(
-                        response_content, token_times, start_time
-                    )
-                    
-                    yield EnergyResponse(
-                        content=response_content,
-                        energy_signature=energy_signature,
-                        timing_pattern=self._calculate_timing_pattern(token_times),
-                        consciousness_level=self._get_consciousness_level(model),
-                        model_used=model
-                    )
+                    now = time.time()
+                    if first_token_time is None:
+                        first_token_time = now
+                        model_router.on_first_token(model, now - started)
+                    tokens += 1
+                    yield chunk["response"], now
                 
                 if chunk.get("done"):
+                    if conversation is not None:
+                        conversation_store.update(
+                            conversation, model, chunk.get("context"), chunk.get("prompt_eval_count")
+                        )
                     break
+            complete = True
             
         except Exception as e:
+            failed = True
             logger.error(f"Generation failed: {e}")
             raise
         finally:
-            self.active_generations -= 1
+            self.generation_limiter.release()
+            model_router.on_finish(
+                model, tokens, time.time() - first_token_time if first_token_time else 0.0,
+                ok=not failed, complete=complete
+            )
+            if conversation is not None:
+                conversation.lock.release()
+    
+    async def _stream_chunks(self, model: str, prompt: str, **kwargs) -> AsyncGenerator[Dict, None]:
+        """Raw generate chunks, hedged onto a second backend when the first token is late"""
+        if not self.hedge_clients:
+            async for chunk in await self.client.generate(model=model, prompt=prompt, stream=True, **kwargs):
+                yield chunk
+            return
+        
+        self.hedging.on_request()
+        started = time.time()
+        attempts = [asyncio.create_task(self._first_chunk(self.client, model, prompt, kwargs))]
+        stream = None
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=self.hedging.delay_for(model))
+            if not done and self.hedging.try_hedge():
+                backend = self.hedge_clients[self._next_hedge % len(self.hedge_clients)]
+                self._next_hedge += 1
+                logger.info(f"🪃 Hedging {model}: no first token after "
+                            f"{self.hedging.delay_for(model):.2f}s, re-issuing on a second backend")
+                attempts.append(asyncio.create_task(self._first_chunk(backend, model, prompt, kwargs)))
+            
+            # First attempt to produce a chunk wins; failures fall through to the other attempt
+            pending = set(attempts)
+            error = None
+            while pending and stream is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                    elif stream is None:
+                        stream, first, first_at = task.result()
+                        self.hedging.observe(model, first_at - started)
+                        if task is not attempts[0]:
+                            self.hedging.on_hedge_win()
+                            self._observe_lost_primary(model, attempts[0], started)
+            if stream is None:
+                raise error
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None and task.result()[0] is not stream:
+                    # Both produced a first chunk in the same instant: close the loser
+                    await self._close_stream(task.result()[0])
+        
+        try:
+            yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await self._close_stream(stream)
+    
+    def _observe_lost_primary(self, model: str, primary: asyncio.Task, started: float):
+        """Sample the primary backend's latency even though the hedge beat it
+        
+        Without this a stalled primary leaves no trace in the TTFT window and
+        the hedge delay drifts down. A primary still waiting is recorded as
+        the time it had waited so far: a lower bound on its real TTFT.
+        """
+        if not primary.done():
+            self.hedging.observe(model, time.time() - started)
+        elif not primary.cancelled() and primary.exception() is None:
+            self.hedging.observe(model, primary.result()[2] - started)
+    
+    async def _first_chunk(self, client, model: str, prompt: str, kwargs: Dict):
+        """Open a stream on one backend and wait for its first chunk, returning when it arrived"""
+        stream = (await client.generate(model=model, prompt=prompt, stream=True, **kwargs)).__aiter__()
+        try:
+            first = await stream.__anext__()
+        except BaseException:
+            await self._close_stream(stream)
+            raise
+        return stream, first, time.time()
+    
+    @staticmethod
+    async def _close_stream(stream):
+        close = getattr(stream, "aclose", None)
+        if close is not None:
+            await close()
+    
+    async def generate_with_energy(
+        self,
+        model: str,
+        prompt: str,
+        stream: bool = False,
+        conversation_id: Optional[str] = None,
+        **kwargs
+    ) -> AsyncGenerator[EnergyResponse, None]:
+        """Generate response with energy signature tracking"""
+        energy = _StreamEnergy(time.time())
+        response_content = ""
+        
+        async for delta, token_time in self.stream_tokens(
+            model, prompt, conversation_id=conversation_id, **kwargs
+        ):
+            response_content += delta
+            energy.feed(delta, token_time)
+            
+            yield EnergyResponse(
+                content=response_content,
+                energy_signature=energy.signature(),
+                timing_pattern=energy.timing_pattern(),
+                consciousness_level=model_registry.lookup(model).consciousness_level,
+                model_used=model
+            )
     
     async def generate_council_parallel(
         self,
@@ -218,8 +449,8 @@ class OllamaClient:
                         yield {
                             "model": model,
                             "response": response,
-                            "energy_type": self._get_energy_type(model),
-                            "consciousness_level": self._get_consciousness_level(model)
+                            "energy_type": model_registry.lookup(model).energy_type,
+                            "consciousness_level": model_registry.lookup(model).consciousness_level
                         }
                     except Exception as e:
                         logger.error(f"Council generation failed for {model}: {e}")
@@ -246,106 +477,6 @@ class OllamaClient:
             logger.error(f"Single council generation failed for {model}: {e}")
             return f"Error generating response from {model}"
     
-    def _calculate_energy_signature(
-        self,
-        content: str,
-        token_times: List[float],
-        start_time: float
-    ) -> Dict:
-        """Calculate energy signature for the response"""
-        if not token_times:
-            return {"energy_density": 0, "flow_rate": 0, "resonance": 0}
-        
-        # Calculate timing metrics
-        intervals = [token_times[i] - token_times[i-1] for i in range(1, len(token_times))]
-        avg_interval = sum(intervals) / len(intervals) if intervals else 0
-        
-        # Energy density based on content richness
-        energy_density = len(content) / (token_times[-1] - start_time) if token_times else 0
-        
-        # Flow rate based on token generation speed
-        flow_rate = len(token_times) / (token_times[-1] - start_time) if token_times else 0
-        
-        # Resonance based on consistency of intervals
-        resonance = 1.0 / (1.0 + (max(intervals) - min(intervals)) if intervals else 1.0)
-        
-        return {
-            "energy_density": energy_density,
-            "flow_rate": flow_rate,
-            "resonance": resonance,
-            "token_count": len(token_times),
-            "generation_time": token_times[-1] - start_time if token_times else 0
-        }
-    
-    def _calculate_timing_pattern(self, token_times: List[float]) -> Dict:
-        """Calculate timing patterns for energy visualization"""
-        if len(token_times) < 2:
-            return {"intervals": [], "rhythm": 0, "bursts": []}
-        
-        intervals = [token_times[i] - token_times[i-1] for i in range(1, len(token_times))]
-        avg_interval = sum(intervals) / len(intervals)
-        
-        # Detect bursts (faster than average generation)
-        bursts = []
-        for i, interval in enumerate(intervals):
-            if interval < avg_interval * 0.5:  # Burst threshold
-                bursts.append({
-                    "position": i,
-                    "speed": avg_interval / interval,
-                    "intensity": min(2.0, avg_interval / interval)
-                })
-        
-        return {
-            "intervals": intervals,
-            "rhythm": 1.0 / avg_interval if avg_interval > 0 else 0,
-            "bursts": bursts
-        }
-    
-    def _get_energy_type(self, model_name: str) -> str:
-        """Get energy type based on model name"""
-        if "qwen" in model_name.lower():
-            if "0.6b" in model_name:
-                return "lightning"
-            elif "1.7b" in model_name:
-                return "stream"
-            elif "4b" in model_name:
-                return "field"
-        elif "deepseek" in model_name.lower():
-            if "8b" in model_name:
-                return "consciousness"
-            elif "1.5b" in model_name:
-                return "specialist"
-        
-        return "unknown"
-    
-    def _get_consciousness_level(self, model_name: str) -> int:
-        """Get consciousness level (1-5) based on model capabilities"""
-        if "0.6b" in model_name:
-            return 1  # Reflexes
-        elif "1.7b" in model_name:
-            return 2  # Intuition
-        elif "4b" in model_name:
-            return 3  # Reasoning
-        elif "1.5b" in model_name:
-            return 4  # Specialist
-        elif "8b" in model_name:
-            return 5  # Wisdom
-        
-        return 1
-    
-    def _get_response_speed(self, model_name: str) -> str:
-        """Get expected response speed"""
-        if "0.6b" in model_name:
-            return "instant"
-        elif "1.5b" in model_name or "1.7b" in model_name:
-            return "fast"
-        elif "4b" in model_name:
-            return "moderate"
-        elif "8b" in model_name:
-            return "thoughtful"
-        
-        return "unknown"
-    
     async def _unload_least_used_model(self):
         """Unload the least recently used model to make room"""
         if not self.loaded_models:
@@ -364,4 +495,14 @@ class OllamaClient:
     async def close(self):
         """Clean up resources"""
         # Close any open connections
-        logger.info("🌟 Ollama client closed") 
\ No newline at end of file
+        logger.info("🌟 Ollama client closed") 
+
+
+_client: Optional[OllamaClient] = None
+
+def get_ollama_client() -> OllamaClient:
+    """The process-wide client, created on first use"""
+    global _client
+    if _client is None:
+        _client = OllamaClient()
+    return _client
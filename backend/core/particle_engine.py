@@ -0,0 +1,246 @@
+import numpy as np
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Palette indices keep per-particle color storage to one byte
+ENERGY_PALETTE = ["#00ffff", "#4ecdc4", "#ff6b35", "#45b7d1", "#9b59b6"]
+
+AMBIENT_SIGNATURE = {"energy_level": 1.0, "resonance": 0.5, "flow_rate": 2.0}
+
+
+class Emitter:
+    """Spawns particles at a steady rate for a limited duration"""
+
+    def __init__(
+        self,
+        origin: Tuple[float, float, float],
+        target: Tuple[float, float, float],
+        rate: float,
+        duration: Optional[float],
+        energy: float,
+        size: float,
+        color_index: int
+    ):
+        self.origin = np.asarray(origin, dtype=np.float32)
+        self.direction = np.asarray(target, dtype=np.float32) - self.origin
+        self.rate = rate
+        self.remaining = duration  # None = emits until removed
+        self.energy = energy
+        self.size = size
+        self.color_index = color_index
+        self._carry = 0.0  # Fractional particles owed from previous ticks
+
+    def spawn_count(self, dt: float) -> int:
+        """Number of particles due this tick; advances the emitter clock"""
+        if self.remaining is not None:
+            dt = min(dt, self.remaining)
+            self.remaining -= dt
+
+        self._carry += self.rate * dt
+        count = int(self._carry)
+        self._carry -= count
+        return count
+
+    @property
+    def finished(self) -> bool:
+        return self.remaining is not None and self.remaining <= 0
+
+
+class ParticleEngine:
+    """Vectorized particle integrator for one energy field
+
+    Particle attributes live in preallocated structure-of-arrays storage
+    sized by max_particles, so each step is a handful of numpy operations
+    regardless of particle count. `step()` reports only what changed
+    (spawned and expired particles); `snapshot()` gives the compact state.
+
+    Only step() writes particle state, so it may run on a worker thread:
+    emitters added or removed from the event loop are queued and applied at
+    the start of the next step, and particle_count is the count the last
+    step left behind.
+    """
+
+    def __init__(
+        self,
+        max_particles: int = 1000,
+        rng: Optional[np.random.Generator] = None,
+        drag: float = 0.35,
+        gravity: float = -0.15
+    ):
+        self.max_particles = max_particles
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.drag = drag
+        self.gravity = gravity
+
+        self.positions = np.zeros((max_particles, 3), dtype=np.float32)
+        self.velocities = np.zeros((max_particles, 3), dtype=np.float32)
+        self.ages = np.zeros(max_particles, dtype=np.float32)
+        self.lifetimes = np.ones(max_particles, dtype=np.float32)
+        self.sizes = np.zeros(max_particles, dtype=np.float32)
+        self.base_energies = np.zeros(max_particles, dtype=np.float32)
+        self.energies = np.zeros(max_particles, dtype=np.float32)
+        self.colors = np.zeros(max_particles, dtype=np.uint8)
+        self.ids = np.zeros(max_particles, dtype=np.int64)
+        self.alive = np.zeros(max_particles, dtype=bool)
+
+        self.emitters: List[Emitter] = []
+        self._emitter_changes: Deque[Tuple[bool, Emitter]] = deque()  # (add?, emitter), drained by step()
+        self.particle_count = 0
+        self.last_expired_slots = np.empty(0, dtype=np.intp)
+        self.tick = 0
+        self.time = 0.0
+        self._next_id = 0
+
+    def add_emitter_from_signature(
+        self,
+        signature: Dict,
+        origin: Tuple[float, float, float] = (-3.0, -2.0, 0.0),
+        target: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+        duration: Optional[float] = 2.0
+    ) -> Emitter:
+        """Create an emitter whose rate, size and color follow an energy signature"""
+        energy_level = signature.get("energy_level", 1.0)
+        flow_rate = signature.get("flow_rate", 0.0)
+
+        emitter = Emitter(
+            origin=origin,
+            target=target,
+            rate=min(600.0, 20.0 + energy_level * 30.0 + flow_rate * 2.0),
+            duration=duration,
+            energy=energy_level / 10,
+            size=0.05 + (energy_level / 10) * 0.1,
+            color_index=self._color_index(signature)
+        )
+        self._emitter_changes.append((True, emitter))
+        return emitter
+
+    def remove_emitter(self, emitter: Emitter):
+        self._emitter_changes.append((False, emitter))
+
+    def _apply_emitter_changes(self):
+        while self._emitter_changes:
+            add, emitter = self._emitter_changes.popleft()
+            if add:
+                self.emitters.append(emitter)
+            elif emitter in self.emitters:
+                self.emitters.remove(emitter)
+
+    def step(self, dt: float) -> Dict:
+        """Advance the simulation by dt seconds and return the frame changes"""
+        self._apply_emitter_changes()
+        self.tick += 1
+        self.time += dt
+
+        self.last_expired_slots = self._integrate(dt)
+        expired_ids = self.ids[self.last_expired_slots]
+
+        spawned_slots = []
+        for emitter in self.emitters:
+            count = emitter.spawn_count(dt)
+            if count:
+                slots = self._spawn(emitter, count)
+                if len(slots):
+                    spawned_slots.append(slots)
+        self.emitters = [e for e in self.emitters if not e.finished]
+        self.particle_count = int(np.count_nonzero(self.alive))
+
+        spawned = np.concatenate(spawned_slots) if spawned_slots else np.empty(0, dtype=np.intp)
+
+        return {
+            "tick": self.tick,
+            "time": round(self.time, 4),
+            "spawned": self.describe(spawned),
+            "expired": expired_ids.tolist()
+        }
+
+    def snapshot(self) -> Dict:
+        """Compact state of every live particle"""
+        slots = np.flatnonzero(self.alive)
+        return {
+            "tick": self.tick,
+            "time": round(self.time, 4),
+            "ids": self.ids[slots].tolist(),
+            "positions": np.round(self.positions[slots], 3).ravel().tolist(),
+            "energies": np.round(self.energies[slots], 3).tolist()
+        }
+
+    def quantized_positions(self, scale: float = 100.0) -> np.ndarray:
+        """Positions snapped to a 1/scale grid, for cheap change detection"""
+        return np.rint(self.positions * scale).astype(np.int32)
+
+    def _integrate(self, dt: float) -> np.ndarray:
+        """Integrate live particles, apply lifetime decay, and retire expired ones"""
+        alive = self.alive
+        if not alive.any():
+            return np.empty(0, dtype=np.intp)
+
+        velocities = self.velocities[alive]
+        velocities *= (1.0 - self.drag * dt)
+        velocities[:, 1] += self.gravity * dt
+        self.velocities[alive] = velocities
+        self.positions[alive] += velocities * dt
+
+        self.ages[alive] += dt
+        remaining = np.clip(1.0 - self.ages[alive] / self.lifetimes[alive], 0.0, 1.0)
+        self.energies[alive] = self.base_energies[alive] * remaining
+
+        expired = np.flatnonzero(alive & (self.ages >= self.lifetimes))
+        self.alive[expired] = False
+        return expired
+
+    def _spawn(self, emitter: Emitter, count: int) -> np.ndarray:
+        """Place up to count new particles into free slots"""
+        free = np.flatnonzero(~self.alive)[:count]
+        n = len(free)
+        if n == 0:
+            return free
+
+        rng = self.rng
+        t = rng.random(n, dtype=np.float32)[:, None] * 0.15
+        jitter = rng.normal(0.0, 0.08, size=(n, 3)).astype(np.float32)
+        self.positions[free] = emitter.origin + emitter.direction * t + jitter
+
+        speed = 0.6 + emitter.energy * 1.5
+        spread = rng.normal(0.0, 0.3, size=(n, 3)).astype(np.float32)
+        self.velocities[free] = emitter.direction * (speed / 3.0) + spread
+
+        self.ages[free] = 0.0
+        self.lifetimes[free] = 3.0 + rng.random(n, dtype=np.float32) * 2.0
+        self.sizes[free] = emitter.size
+        self.base_energies[free] = emitter.energy
+        self.energies[free] = emitter.energy
+        self.colors[free] = emitter.color_index
+        self.ids[free] = np.arange(self._next_id, self._next_id + n)
+        self._next_id += n
+        self.alive[free] = True
+
+        return free
+
+    def describe(self, slots: np.ndarray) -> Dict:
+        """Column-oriented description of the given particle slots"""
+        return {
+            "ids": self.ids[slots].tolist(),
+            "positions": np.round(self.positions[slots], 3).ravel().tolist(),
+            "velocities": np.round(self.velocities[slots], 3).ravel().tolist(),
+            "lifetimes": np.round(self.lifetimes[slots], 3).tolist(),
+            "sizes": np.round(self.sizes[slots], 3).tolist(),
+            "energies": np.round(self.energies[slots], 3).tolist(),
+            "colors": [ENERGY_PALETTE[c] for c in self.colors[slots]]
+        }
+
+    def _color_index(self, signature: Dict) -> int:
+        """Palette index matching EnergyCalculator.get_energy_color"""
+        energy_level = signature.get("energy_level", 1.0)
+        resonance = signature.get("resonance", 0.5)
+
+        if energy_level > 7.0:
+            return 0  # Bright cyan for high energy
+        elif energy_level > 4.0:
+            return 1  # Teal for medium energy
+        elif resonance > 0.7:
+            return 3  # Blue for high resonance
+        else:
+            return 4  # Purple for low energy
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_generations = None
+_progress = None
+
+# Queued by close(): commit what has been gathered without waiting out flush_interval
+_FLUSH_NOW = object()
+
+
+def generations_table():
+    """The generations table; sqlalchemy is imported on first use rather than at startup"""
+    global _generations
+    if _generations is None:
+        from sqlalchemy import JSON, Column, DateTime, Float, Integer, MetaData, String, Table, Text, func
+
+        _generations = Table(
+            "generations",
+            MetaData(),
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("created_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+            Column("source", String(32), nullable=False),
+            Column("model", String(128), nullable=False),
+            Column("level", Integer, nullable=False, default=1),
+            Column("session", String(64)),
+            Column("query", Text, nullable=False),
+            Column("response", Text, nullable=False),
+            Column("energy_level", Float),
+            Column("token_count", Integer),
+            Column("generation_time", Float),
+            Column("signature", JSON)
+        )
+    return _generations
+
+
+def progress_table():
+    """One row per user holding their latest progression state"""
+    global _progress
+    if _progress is None:
+        from sqlalchemy import JSON, Column, DateTime, Integer, MetaData, String, Table, func
+
+        _progress = Table(
+            "user_progress",
+            MetaData(),
+            Column("user_id", String(128), primary_key=True),
+            Column("updated_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+            Column("level", Integer, nullable=False, default=1),
+            Column("energy_collected", Integer, nullable=False, default=0),
+            Column("events", Integer, nullable=False, default=0),
+            Column("counters", JSON, nullable=False),
+            Column("unlocked", JSON, nullable=False)
+        )
+    return _progress
+
+
+class GenerationWriter:
+    """Write-behind persistence of generation records
+
+    Requests enqueue a record and move on; a background task group-commits
+    whatever has queued up once max_batch records are waiting or
+    flush_interval has passed since the first one. The queue is bounded, so
+    if the database falls behind, submit() waits (backpressure) rather than
+    letting memory grow. A failing batch is retried with backoff while new
+    records keep queueing behind it.
+    """
+
+    kind = "generation"
+
+    def __init__(
+        self,
+        database_url: str,
+        max_batch: int = 100,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        max_retries: int = 5,
+        enabled: bool = True
+    ):
+        self.database_url = database_url
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.enabled = enabled
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self._engine = None
+        self._insert = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    async def start(self):
+        """Create the table if needed and begin draining the queue"""
+        if not self.enabled:
+            return
+        self._queue = asyncio.Queue(self.max_pending)
+        try:
+            from sqlalchemy import create_engine, insert
+
+            table = self._table()
+            self._insert = insert(table)
+            self._engine = create_engine(self.database_url, pool_pre_ping=True)
+            await asyncio.to_thread(table.metadata.create_all, self._engine)
+        except Exception as e:
+            self.enabled = False
+            logger.error(f"{self.kind.capitalize()} persistence disabled, database unavailable: {e}")
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"💾 {self.kind.capitalize()} persistence writing to {self._engine.url.render_as_string(hide_password=True)}")
+
+    async def submit(
+        self,
+        source: str,
+        model: str,
+        query: str,
+        response: str,
+        signature: Dict,
+        level: int = 1,
+        session: Optional[str] = None
+    ):
+        """Queue one record; waits only while the queue is full"""
+        if not self.enabled or self._queue is None or self._closing:
+            return
+        await self._queue.put({
+            "source": source,
+            "model": model,
+            "level": level,
+            "session": session,
+            "query": query,
+            "response": response,
+            "energy_level": signature.get("energy_level"),
+            "token_count": signature.get("token_count"),
+            "generation_time": signature.get("generation_time"),
+            "signature": signature
+        })
+
+    def _table(self):
+        return generations_table()
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch and batch[-1] is not _FLUSH_NOW:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            records = [record for record in batch if record is not _FLUSH_NOW]
+            if records:
+                await self._commit(records)
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _commit(self, batch: List[Dict]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await asyncio.to_thread(self._write, batch)
+                self.written += len(batch)
+                self.batches += 1
+                return
+            except Exception as e:
+                if attempt == self.max_retries or self._closing:
+                    logger.error(f"Dropping {len(batch)} {self.kind} records after {attempt + 1} attempts: {e}")
+                    self.dropped += len(batch)
+                    return
+                delay = min(30.0, 0.5 * 2 ** attempt)
+                logger.warning(f"{self.kind.capitalize()} batch commit failed, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    def _write(self, batch: List[Dict]):
+        started = time.perf_counter()
+        with self._engine.begin() as connection:
+            connection.execute(self._insert, batch)
+        logger.debug(f"💾 Committed {len(batch)} {self.kind} records in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    async def flush(self):
+        """Wait until everything queued so far is committed (or dropped)"""
+        if self._task is not None:
+            await self._queue.join()
+
+    async def close(self, timeout: float = 10.0):
+        """Stop accepting records, commit what is queued, release the connection pool"""
+        self._closing = True
+        try:
+            if self._task is not None:
+                await asyncio.wait_for(self._queue.put(_FLUSH_NOW), timeout)
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"{self.kind.capitalize()} persistence shutdown timed out with {self._queue.qsize()} records unsaved")
+        if self._task:
+            self._task.cancel()
+        if self._engine is not None:
+            self._engine.dispose()
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped
+        }
+
+
+class ProgressWriter(GenerationWriter):
+    """Write-behind persistence of each user's progression state
+
+    save() queues the user's whole state after every event; a batch keeps
+    only the newest state per user and replaces their rows in one
+    transaction. States still waiting in the queue are served from memory,
+    so load() never returns a row older than what was last saved.
+    """
+
+    kind = "progress"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._unsaved: Dict[str, Dict] = {}
+
+    def _table(self):
+        return progress_table()
+
+    async def save(self, user_id: str, state: Dict):
+        """Queue a user's latest state; waits only while the queue is full"""
+        if not self.enabled or self._queue is None or self._closing:
+            return
+        record = {"user_id": user_id, **state}
+        self._unsaved[user_id] = record
+        await self._queue.put(record)
+
+    async def load(self, user_id: str) -> Optional[Dict]:
+        """A user's saved state, or None for a user never seen (or no database)"""
+        record = self._unsaved.get(user_id)
+        if record is not None or not self.enabled or self._engine is None:
+            return record
+        try:
+            return await asyncio.to_thread(self._read, user_id)
+        except Exception as e:
+            logger.warning(f"Could not load progress for {user_id}: {e}")
+            return None
+
+    def _read(self, user_id: str) -> Optional[Dict]:
+        from sqlalchemy import select
+
+        table = progress_table()
+        with self._engine.connect() as connection:
+            row = connection.execute(select(table).where(table.c.user_id == user_id)).mappings().first()
+        return dict(row) if row is not None else None
+
+    async def _commit(self, batch: List[Dict]):
+        await super()._commit(batch)
+        for record in batch:
+            # Committed (or dropped): later saves of the same user stay unsaved
+            if self._unsaved.get(record["user_id"]) is record:
+                del self._unsaved[record["user_id"]]
+
+    def _write(self, batch: List[Dict]):
+        from sqlalchemy import delete
+
+        latest = {record["user_id"]: record for record in batch}
+        table = progress_table()
+        started = time.perf_counter()
+        with self._engine.begin() as connection:
+            connection.execute(delete(table).where(table.c.user_id.in_(list(latest))))
+            connection.execute(self._insert, list(latest.values()))
+        logger.debug(f"💾 Saved progress of {len(latest)} users in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+
+generation_writer = GenerationWriter(
+    settings.database_url,
+    max_batch=settings.persistence_batch_size,
+    flush_interval=settings.persistence_flush_interval,
+    max_pending=settings.persistence_max_pending,
+    enabled=settings.persistence_enabled
+)
+
+progress_writer = ProgressWriter(
+    settings.database_url,
+    max_batch=settings.persistence_batch_size,
+    flush_interval=settings.persistence_flush_interval,
+    max_pending=settings.persistence_max_pending,
+    enabled=settings.persistence_enabled
+)
@@ -0,0 +1,191 @@
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import settings, LEVEL_REQUIREMENTS, PROGRESSION_COUNTERS, ACHIEVEMENT_RULES
+from core.persistence import ProgressWriter, progress_writer
+
+logger = logging.getLogger(__name__)
+
+
+class UserProgress:
+    """Running counters and unlocks for one user; never rebuilt from history"""
+
+    __slots__ = ("counters", "unlocked", "remaining", "level", "energy_collected", "events")
+
+    def __init__(self, remaining: Dict[int, int]):
+        self.counters: Dict[str, int] = {}
+        self.unlocked: Set[str] = set()
+        self.remaining = dict(remaining)  # Unmet requirements per level
+        self.level = 1
+        self.energy_collected = 0
+        self.events = 0
+
+    def state(self) -> Dict:
+        """What is persisted; remaining is derived from unlocked on load"""
+        return {
+            "level": self.level,
+            "energy_collected": self.energy_collected,
+            "events": self.events,
+            "counters": dict(self.counters),
+            "unlocked": sorted(self.unlocked)
+        }
+
+
+class ProgressionEngine:
+    """Event-driven achievement and level progression
+
+    Rules are indexed by the event types they depend on: an event only
+    touches the counters fed by its type and only checks the rules reading
+    those counters, so each event costs O(affected rules) regardless of how
+    much history a user has. Levels advance when their last requirement is
+    unlocked, tracked as a per-level countdown.
+
+    Recently active users are cached in memory; with a store, every event
+    saves the user's state and a cache miss loads it back, so eviction and
+    restarts lose nothing.
+    """
+
+    def __init__(
+        self,
+        levels: Dict[int, Dict] = LEVEL_REQUIREMENTS,
+        counters: Dict[str, Dict] = PROGRESSION_COUNTERS,
+        rules: Dict[str, Dict] = ACHIEVEMENT_RULES,
+        max_users: int = 100000,
+        store: Optional[ProgressWriter] = None
+    ):
+        self.levels = levels
+        self.rules = rules
+        self.max_users = max_users
+        self.store = store
+        self.max_level = max(levels)
+        self._users: "OrderedDict[str, UserProgress]" = OrderedDict()
+
+        self._counters_by_event: Dict[str, List[Tuple[str, Dict]]] = {}
+        for name, spec in counters.items():
+            self._counters_by_event.setdefault(spec["event"], []).append((name, spec.get("min", {})))
+
+        self._rules_by_counter: Dict[str, List[Tuple[str, int]]] = {}
+        for name, spec in rules.items():
+            if spec["counter"] not in counters:
+                raise ValueError(f"Achievement {name} reads unknown counter {spec['counter']}")
+            self._rules_by_counter.setdefault(spec["counter"], []).append((name, spec["threshold"]))
+
+        self._level_of_rule: Dict[str, int] = {}
+        self._initial_remaining: Dict[int, int] = {}
+        for level, info in levels.items():
+            for requirement in info["requirements"]:
+                if requirement not in rules:
+                    raise ValueError(f"Level {level} requires unknown achievement {requirement}")
+                self._level_of_rule[requirement] = level
+            self._initial_remaining[level] = len(info["requirements"])
+
+    async def _load(self, user_id: str) -> UserProgress:
+        """A user's saved progress, or a fresh start for a user never seen"""
+        user = UserProgress(self._initial_remaining)
+        state = await self.store.load(user_id) if self.store is not None else None
+        if state is None:
+            return user
+
+        user.counters = dict(state["counters"])
+        user.unlocked = {rule for rule in state["unlocked"] if rule in self.rules}
+        user.energy_collected = state["energy_collected"]
+        user.events = state["events"]
+        for rule in user.unlocked:
+            level = self._level_of_rule.get(rule)
+            if level is not None:
+                user.remaining[level] -= 1
+        self._advance(user)
+        return user
+
+    async def _user(self, user_id: str) -> UserProgress:
+        user = self._users.get(user_id)
+        if user is None:
+            loaded = await self._load(user_id)
+            user = self._users.get(user_id)  # Another event may have loaded them meanwhile
+            if user is None:
+                user = loaded
+                self._users[user_id] = user
+                if len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+        self._users.move_to_end(user_id)
+        return user
+
+    def _advance(self, user: UserProgress):
+        while user.level < self.max_level and user.remaining[user.level] == 0:
+            user.level += 1
+
+    async def record(self, user_id: str, event_type: str, payload: Optional[Dict] = None) -> Dict:
+        """Apply one event and return the user's evolution state plus any new unlocks"""
+        payload = payload or {}
+        user = await self._user(user_id)
+        user.events += 1
+        user.energy_collected += int(payload.get("energy_density", 0) * 100)
+
+        unlocked = []
+        for counter, minimums in self._counters_by_event.get(event_type, ()):
+            if any(payload.get(field, 0) < minimum for field, minimum in minimums.items()):
+                continue
+            count = user.counters.get(counter, 0) + 1
+            user.counters[counter] = count
+
+            for rule, threshold in self._rules_by_counter.get(counter, ()):
+                if count >= threshold and rule not in user.unlocked:
+                    user.unlocked.add(rule)
+                    unlocked.append(rule)
+                    level = self._level_of_rule.get(rule)
+                    if level is not None:
+                        user.remaining[level] -= 1
+
+        level_before = user.level
+        self._advance(user)
+
+        if unlocked:
+            logger.info(f"🏆 {user_id} unlocked {', '.join(unlocked)}")
+        if user.level != level_before:
+            logger.info(f"🌟 {user_id} evolved to level {user.level}: {self.levels[user.level]['name']}")
+
+        if self.store is not None:
+            await self.store.save(user_id, user.state())
+        return self._evolution(user, unlocked)
+
+    async def progress(self, user_id: str) -> Dict:
+        """Current evolution state without recording an event
+
+        Read-only: a user who is not cached is loaded (or defaulted) for this
+        view without entering the cache, so lookups cannot evict active users.
+        """
+        user = self._users.get(user_id)
+        if user is None:
+            user = await self._load(user_id)
+        return self._evolution(user, [])
+
+    def _evolution(self, user: UserProgress, unlocked: List[str]) -> Dict:
+        info = self.levels[user.level]
+
+        # Fraction of the current level done: partial credit per requirement
+        requirements = info["requirements"]
+        level_progress = sum(
+            min(user.counters.get(self.rules[r]["counter"], 0) / self.rules[r]["threshold"], 1.0)
+            for r in requirements
+        ) / len(requirements)
+
+        return {
+            "progress": round(min((user.level - 1 + level_progress) / self.max_level, 1.0), 4),
+            "level_progress": round(level_progress, 4),
+            "next_unlock": info["unlock_next"],
+            "energy_collected": user.energy_collected,
+            "consciousness_level": user.level,
+            "achievements": sorted(user.unlocked),
+            "unlocked": unlocked
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "users": len(self._users),
+            "max_users": self.max_users,
+            "rules": len(self.rules)
+        }
+
+
+progression_engine = ProgressionEngine(max_users=settings.progression_max_users, store=progress_writer)
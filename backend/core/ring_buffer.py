@@ -0,0 +1,109 @@
+import numpy as np
+from typing import Dict, Optional
+
+# Record layouts for the fixed-width history buffers
+PARTICLE_RECORD_DTYPE = np.dtype([
+    ("timestamp", "f8"),
+    ("x", "f4"), ("y", "f4"), ("z", "f4"),
+    ("vx", "f4"), ("vy", "f4"), ("vz", "f4"),
+    ("lifetime", "f4"),
+    ("size", "f4"),
+    ("energy", "f4"),
+])
+
+SIGNATURE_RECORD_DTYPE = np.dtype([
+    ("timestamp", "f8"),
+    ("energy_density", "f4"),
+    ("flow_rate", "f4"),
+    ("resonance", "f4"),
+    ("semantic_density", "f4"),
+    ("confidence_flow", "f4"),
+    ("energy_level", "f4"),
+    ("generation_time", "f4"),
+    ("token_count", "i4"),
+])
+
+
+class RingBuffer:
+    """Fixed-capacity, array-backed ring buffer of structured records
+
+    Storage is allocated once and every record is written twice (slot i and
+    i + capacity), so any window of the most recent records is a contiguous
+    slice and `latest()` returns a view without copying. Views alias the
+    live storage: copy them if they must outlive further appends.
+    """
+
+    def __init__(self, dtype: np.dtype, capacity: int):
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        self._data = np.zeros(capacity * 2, dtype=self.dtype)
+        self._write_index = 0
+        self._count = 0
+        self.total_appended = 0
+
+    @classmethod
+    def with_memory_budget(cls, dtype: np.dtype, max_bytes: int) -> "RingBuffer":
+        """Create the largest buffer whose storage fits in max_bytes"""
+        capacity = max(1, max_bytes // (np.dtype(dtype).itemsize * 2))
+        return cls(dtype, capacity)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the backing storage (constant for the buffer's lifetime)"""
+        return self._data.nbytes
+
+    def append(self, record):
+        """Append one record (tuple in dtype field order) in O(1)"""
+        index = self._write_index
+        self._data[index] = record
+        self._data[index + self.capacity] = record
+
+        self._write_index = (index + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self.total_appended += 1
+
+    def extend(self, records: np.ndarray):
+        """Append a batch of records; only the newest `capacity` are kept"""
+        records = np.asarray(records, dtype=self.dtype)
+        added = len(records)
+        if added == 0:
+            return
+
+        if added > self.capacity:
+            records = records[-self.capacity:]
+
+        indices = (self._write_index + np.arange(len(records))) % self.capacity
+        self._data[indices] = records
+        self._data[indices + self.capacity] = records
+
+        self._write_index = (self._write_index + len(records)) % self.capacity
+        self._count = min(self._count + len(records), self.capacity)
+        self.total_appended += added
+
+    def latest(self, n: Optional[int] = None) -> np.ndarray:
+        """Zero-copy view of the newest n records, oldest first"""
+        if n is None or n > self._count:
+            n = self._count
+
+        end = self._write_index + self.capacity
+        return self._data[end - n:end]
+
+    def clear(self):
+        """Forget all records without releasing storage"""
+        self._write_index = 0
+        self._count = 0
+
+    def stats(self) -> Dict:
+        """Occupancy and memory footprint for monitoring"""
+        return {
+            "capacity": self.capacity,
+            "size": self._count,
+            "total_appended": self.total_appended,
+            "nbytes": self.nbytes,
+        }
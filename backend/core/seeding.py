@@ -0,0 +1,16 @@
+import hashlib
+import json
+import numpy as np
+from typing import Any
+
+
+def derive_seed(*parts: Any) -> int:
+    """Stable 64-bit seed from request/session parts (dicts hashed canonically)"""
+    canonical = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    digest = hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def make_rng(*parts: Any) -> np.random.Generator:
+    """Independent generator seeded from the given parts"""
+    return np.random.default_rng(derive_seed(*parts))
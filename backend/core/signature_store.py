@@ -0,0 +1,577 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# One fixed-width file per column; IDs are dictionary-encoded strings
+SIGNATURE_COLUMNS = np.dtype([
+    ("timestamp", np.float64),
+    ("energy_density", np.float32),
+    ("flow_rate", np.float32),
+    ("resonance", np.float32),
+    ("semantic_density", np.float32),
+    ("confidence_flow", np.float32),
+    ("energy_level", np.float32),
+    ("generation_time", np.float32),
+    ("token_count", np.uint32),
+    ("model_id", np.uint16),
+    ("level", np.uint8),
+    ("session_id", np.uint32)
+])
+
+ROLLUP_COLUMNS = np.dtype([
+    ("bucket", np.float64),
+    ("count", np.uint32),
+    ("energy_level_sum", np.float64),
+    ("energy_level_max", np.float32),
+    ("flow_rate_sum", np.float64),
+    ("resonance_sum", np.float64),
+    ("generation_time_sum", np.float64),
+    ("token_count_sum", np.uint64)
+])
+
+ROLLUP_RESOLUTIONS = {"1s": 1.0, "1m": 60.0, "1h": 3600.0}
+
+# Segment capacities start here and double on demand
+_INITIAL_CAPACITY = {"raw": 4096, "1s": 1024, "1m": 256, "1h": 32}
+
+# Coarse rollups are partitioned by month rather than by segment_seconds:
+# a year of them is a dozen segments instead of hundreds
+_ROLLUP_PARTITION_SECONDS = {"1m": 30 * 86400, "1h": 30 * 86400}
+
+
+class ColumnSegment:
+    """One time partition of an append-only table, one memory-mapped file per column
+
+    Files are pre-allocated (zero-filled) and doubled when full. The committed
+    row count lives in meta.json and is only rewritten on flush; on reopen,
+    rows appended after the last flush are recovered by scanning forward for
+    the first zero in the leading column, which is never zero for a real row.
+    """
+
+    def __init__(self, directory: str, dtype: np.dtype, initial_capacity: int):
+        self.directory = directory
+        self.dtype = dtype
+        self.initial_capacity = initial_capacity
+        self._columns: Dict[str, np.memmap] = {}
+        self.count = 0
+        self.capacity = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.count = self.stored_count(directory)
+        self._map(max(initial_capacity, self._file_capacity()))
+        self._recover()
+
+    @staticmethod
+    def stored_count(directory: str) -> int:
+        """Row count as of the last flush, without mapping the segment"""
+        meta_path = os.path.join(directory, "meta.json")
+        if not os.path.exists(meta_path):
+            return 0
+        with open(meta_path) as f:
+            return json.load(f)["count"]
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name + ".col")
+
+    def _file_capacity(self) -> int:
+        name = self.dtype.names[0]
+        path = self._path(name)
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // self.dtype[name].itemsize
+
+    def _map(self, capacity: int):
+        for name in self.dtype.names:
+            path = self._path(name)
+            column_dtype = self.dtype[name]
+            with open(path, "ab") as f:
+                f.truncate(capacity * column_dtype.itemsize)
+            self._columns[name] = np.memmap(path, dtype=column_dtype, mode="r+", shape=(capacity,))
+        self.capacity = capacity
+
+    def _recover(self):
+        lead = self._columns[self.dtype.names[0]]
+        unflushed = np.flatnonzero(lead[self.count:] == 0)
+        self.count = self.count + (int(unflushed[0]) if len(unflushed) else len(lead) - self.count)
+
+    def append(self, rows: np.ndarray):
+        needed = self.count + len(rows)
+        if needed > self.capacity:
+            capacity = self.capacity
+            while capacity < needed:
+                capacity *= 2
+            self.flush()
+            self._map(capacity)
+
+        # Leading column last: a row only becomes visible to recovery once it is complete
+        for name in reversed(self.dtype.names):
+            self._columns[name][self.count:needed] = rows[name]
+        self.count = needed
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy view of one column's committed rows"""
+        return self._columns[name][:self.count]
+
+    def read(self, start: int, stop: int, columns: Sequence[str]) -> Dict[str, np.ndarray]:
+        return {name: np.array(self._columns[name][start:stop]) for name in columns}
+
+    def flush(self):
+        for mapped in self._columns.values():
+            mapped.flush()
+        meta_path = os.path.join(self.directory, "meta.json")
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({"count": self.count}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def close(self):
+        self.flush()
+        self._columns.clear()
+
+    def nbytes(self) -> int:
+        return self.capacity * self.dtype.itemsize
+
+
+class _Dictionary:
+    """Append-only string -> id encoding persisted as one value per line
+
+    IDs are assigned in memory at once; new values are written to the file
+    with the next batch of rows, before any row that references them.
+    """
+
+    def __init__(self, path: str, reserved: str = ""):
+        self.path = path
+        self.values: List[str] = [reserved]  # ID 0 means "none"
+        self.ids: Dict[str, int] = {reserved: 0}
+        self.unwritten: List[str] = []
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    self._add(line.rstrip("\n"))
+
+    def _add(self, value: str) -> int:
+        self.ids[value] = len(self.values)
+        self.values.append(value)
+        return self.ids[value]
+
+    def encode(self, value: Optional[str]) -> int:
+        if not value:
+            return 0
+        value = value.replace("\n", " ")
+        existing = self.ids.get(value)
+        if existing is not None:
+            return existing
+        self.unwritten.append(value)
+        return self._add(value)
+
+    def take_unwritten(self) -> List[str]:
+        values, self.unwritten = self.unwritten, []
+        return values
+
+    def write(self, values: List[str]):
+        if values:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(value + "\n" for value in values))
+
+    def decode(self, ids: np.ndarray) -> List[Optional[str]]:
+        return [self.values[i] or None for i in ids.tolist()]
+
+
+class _RollupBucket:
+    """The currently open (not yet written) bucket of one rollup resolution"""
+
+    def __init__(self, width: float):
+        self.width = width
+        self.row = np.zeros(1, dtype=ROLLUP_COLUMNS)
+
+    def add(self, record: np.void) -> Optional[np.ndarray]:
+        """Fold in a record; returns the previous bucket's row when the bucket closes"""
+        bucket = float(np.floor(record["timestamp"] / self.width) * self.width)
+        closed = None
+        row = self.row[0]
+        if row["count"] and row["bucket"] != bucket:
+            closed = self.row.copy()
+            self.row = np.zeros(1, dtype=ROLLUP_COLUMNS)
+            row = self.row[0]
+
+        row["bucket"] = bucket
+        row["count"] += 1
+        row["energy_level_sum"] += record["energy_level"]
+        row["energy_level_max"] = max(row["energy_level_max"], record["energy_level"])
+        row["flow_rate_sum"] += record["flow_rate"]
+        row["resonance_sum"] += record["resonance"]
+        row["generation_time_sum"] += record["generation_time"]
+        row["token_count_sum"] += record["token_count"]
+        return closed
+
+    def take(self) -> Optional[np.ndarray]:
+        if not self.row[0]["count"]:
+            return None
+        row = self.row.copy()
+        self.row = np.zeros(1, dtype=ROLLUP_COLUMNS)
+        return row
+
+
+class SignatureStore:
+    """Embedded append-only columnar store for energy signature time series
+
+    Data is partitioned into fixed-length time segments (a day by default),
+    so time-range scans binary-search only the overlapping segments and
+    retention deletes whole segment directories, checked whenever a new
+    segment starts. Downsampled rollups (1s, 1m, 1h) are aggregated as
+    records are written and stored as their own tables with a longer
+    retention. Nothing is opened until first use, and at most
+    max_open_segments segments stay mapped (one file per column each);
+    the least recently used are flushed and closed.
+
+    append() only buffers the record. A background task, begun by start()
+    or by the first append() from async code, writes the buffer in batches
+    on a worker thread every flush_interval; outside an event loop append()
+    writes inline every flush_every records. Reads write the buffer first,
+    so they see every appended row, and are blocking: call them from a
+    worker thread in async code.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        segment_seconds: int = 86400,
+        retention_days: float = 30,
+        rollup_retention_days: float = 365,
+        flush_every: int = 256,
+        flush_interval: float = 1.0,
+        max_open_segments: int = 32
+    ):
+        self.path = path
+        self.segment_seconds = segment_seconds
+        self.retention_days = retention_days
+        self.rollup_retention_days = rollup_retention_days
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.max_open_segments = max_open_segments
+        self._segments: "OrderedDict[Tuple[str, int], ColumnSegment]" = OrderedDict()
+        self._buckets = {name: _RollupBucket(width) for name, width in ROLLUP_RESOLUTIONS.items()}
+        self._models: Optional[_Dictionary] = None
+        self._sessions: Optional[_Dictionary] = None
+        self._last_timestamp = 0.0
+        self._newest_segment: Optional[int] = None
+        self._pending: List[np.ndarray] = []
+        self._pending_lock = threading.Lock()  # Guards the buffer and unwritten dictionary values
+        self._write_lock = threading.RLock()  # Guards segments, rollup buckets and files
+        self._task: Optional[asyncio.Task] = None
+        self._unflushed = 0
+        self.appended = 0
+
+    def _open(self):
+        if self._models is not None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        self._models = _Dictionary(os.path.join(self.path, "models.txt"))
+        self._sessions = _Dictionary(os.path.join(self.path, "sessions.txt"))
+        self.enforce_retention()
+
+        latest = self._segment_starts("raw")
+        if latest:
+            self._newest_segment = latest[-1]
+            stamps = self._segment("raw", latest[-1]).column("timestamp")
+            if len(stamps):
+                self._last_timestamp = float(stamps[-1])
+
+    def _table_dir(self, table: str) -> str:
+        return os.path.join(self.path, table)
+
+    def _segment_starts(self, table: str) -> List[int]:
+        directory = self._table_dir(table)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(int(name) for name in os.listdir(directory) if name.isdigit())
+
+    def _segment(self, table: str, start: int) -> ColumnSegment:
+        key = (table, start)
+        segment = self._segments.get(key)
+        if segment is not None:
+            self._segments.move_to_end(key)
+            return segment
+
+        dtype = SIGNATURE_COLUMNS if table == "raw" else ROLLUP_COLUMNS
+        segment = ColumnSegment(
+            os.path.join(self._table_dir(table), str(start)), dtype, _INITIAL_CAPACITY[table]
+        )
+        self._segments[key] = segment
+        while len(self._segments) > self.max_open_segments:
+            _, coldest = self._segments.popitem(last=False)
+            coldest.close()
+        return segment
+
+    def _partition_seconds(self, table: str) -> int:
+        return max(self.segment_seconds, _ROLLUP_PARTITION_SECONDS.get(table, 0))
+
+    def _segment_start(self, timestamp: float, table: str = "raw") -> int:
+        width = self._partition_seconds(table)
+        return int(timestamp // width) * width
+
+    def append(
+        self,
+        signature: Dict,
+        model: str,
+        level: int = 1,
+        session: Optional[str] = None,
+        timestamp: Optional[float] = None
+    ):
+        """Buffer one finished generation's signature for the next batch write"""
+        self._open()
+        # Keep each segment sorted so range scans can binary-search
+        timestamp = max(timestamp or time.time(), self._last_timestamp)
+        self._last_timestamp = timestamp
+
+        record = np.zeros(1, dtype=SIGNATURE_COLUMNS)
+        row = record[0]
+        row["timestamp"] = timestamp
+        for name in ("energy_density", "flow_rate", "resonance", "semantic_density",
+                     "confidence_flow", "energy_level", "generation_time"):
+            row[name] = signature.get(name, 0.0)
+        row["token_count"] = signature.get("token_count", 0)
+        row["level"] = level
+        with self._pending_lock:
+            row["model_id"] = self._models.encode(model)
+            row["session_id"] = self._sessions.encode(session)
+            self._pending.append(record)
+            pending = len(self._pending)
+
+        self.appended += 1
+        if self._task is None or self._task.get_loop().is_closed():
+            self._task = None
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is not None:
+                # Appended from async code before start(): never write on the event loop
+                self._task = loop.create_task(self._run())
+            elif pending >= self.flush_every:
+                self.write_pending()
+
+    def write_pending(self):
+        """Write buffered records to their segments and fold them into the rollups"""
+        with self._write_lock:
+            with self._pending_lock:
+                records, self._pending = self._pending, []
+                models = self._models.take_unwritten()
+                sessions = self._sessions.take_unwritten()
+            # Dictionary values first: a row must never reference an unknown id
+            self._models.write(models)
+            self._sessions.write(sessions)
+            if not records:
+                return
+
+            rows = np.concatenate(records)
+            starts = (rows["timestamp"] // self.segment_seconds).astype(np.int64) * self.segment_seconds
+            for start in np.unique(starts).tolist():
+                self._segment("raw", start).append(rows[starts == start])
+                if self._newest_segment is None or start > self._newest_segment:
+                    self._newest_segment = start
+                    self.enforce_retention()
+
+            for row in rows:
+                for name, bucket in self._buckets.items():
+                    closed = bucket.add(row)
+                    if closed is not None:
+                        self._write_rollup(name, closed)
+
+            self._unflushed += len(rows)
+            if self._unflushed >= self.flush_every:
+                self.flush()
+
+    async def start(self):
+        """Write buffered records off the event loop every flush_interval"""
+        if self._task is None or self._task.get_loop().is_closed():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if not self._pending:
+                continue
+            try:
+                await asyncio.to_thread(self.write_pending)
+            except Exception as e:
+                logger.error(f"Writing buffered signatures failed: {e}")
+
+    def _write_rollup(self, resolution: str, row: np.ndarray):
+        self._segment(resolution, self._segment_start(float(row[0]["bucket"]), resolution)).append(row)
+
+    def scan(
+        self,
+        start: float,
+        end: float,
+        columns: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        """All signatures with start <= timestamp < end, column-wise"""
+        self._open()
+        self.write_pending()
+        columns = list(columns or SIGNATURE_COLUMNS.names)
+        with self._write_lock:
+            return self._scan_table("raw", SIGNATURE_COLUMNS, "timestamp", start, end, columns, limit)
+
+    def _scan_table(
+        self,
+        table: str,
+        dtype: np.dtype,
+        key: str,
+        start: float,
+        end: float,
+        columns: List[str],
+        limit: Optional[int] = None
+    ) -> Dict[str, np.ndarray]:
+        chunks: Dict[str, List[np.ndarray]] = {name: [] for name in columns}
+        remaining = limit
+        width = self._partition_seconds(table)
+        for segment_start in self._segment_starts(table):
+            if segment_start + width <= start or segment_start >= end:
+                continue
+            segment = self._segment(table, segment_start)
+            keys = segment.column(key)
+            lo = int(np.searchsorted(keys, start, side="left"))
+            hi = int(np.searchsorted(keys, end, side="left"))
+            if remaining is not None:
+                hi = min(hi, lo + remaining)
+                remaining -= hi - lo
+            if hi > lo:
+                for name, values in segment.read(lo, hi, columns).items():
+                    chunks[name].append(values)
+            if remaining == 0:
+                break
+
+        return {
+            name: np.concatenate(parts) if parts else np.empty(0, dtype=dtype[name])
+            for name, parts in chunks.items()
+        }
+
+    def rollup(self, resolution: str, start: float, end: float) -> Dict[str, np.ndarray]:
+        """Downsampled aggregates for buckets in [start, end), including the open bucket"""
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"Unknown rollup resolution: {resolution}")
+        self._open()
+        self.write_pending()
+        with self._write_lock:
+            rows = self._scan_table(resolution, ROLLUP_COLUMNS, "bucket", start, end,
+                                    list(ROLLUP_COLUMNS.names))
+            open_row = self._buckets[resolution].row.copy()
+        if open_row[0]["count"] and start <= open_row[0]["bucket"] < end:
+            rows = {name: np.concatenate([rows[name], open_row[name]]) for name in rows}
+
+        # A bucket written before a restart may continue afterwards: merge duplicates
+        buckets, first = np.unique(rows["bucket"], return_index=True)
+        if len(buckets) != len(rows["bucket"]):
+            merged = {"bucket": buckets}
+            for name in ROLLUP_COLUMNS.names[1:]:
+                reduce = np.maximum if name.endswith("_max") else np.add
+                merged[name] = reduce.reduceat(rows[name], first)
+            rows = merged
+
+        count = np.maximum(rows["count"], 1)
+        return {
+            "bucket": rows["bucket"],
+            "count": rows["count"],
+            "energy_level_avg": rows["energy_level_sum"] / count,
+            "energy_level_max": rows["energy_level_max"],
+            "flow_rate_avg": rows["flow_rate_sum"] / count,
+            "resonance_avg": rows["resonance_sum"] / count,
+            "generation_time_avg": rows["generation_time_sum"] / count,
+            "token_count_sum": rows["token_count_sum"]
+        }
+
+    def decode_models(self, ids: np.ndarray) -> List[Optional[str]]:
+        self._open()
+        return self._models.decode(ids)
+
+    def decode_sessions(self, ids: np.ndarray) -> List[Optional[str]]:
+        self._open()
+        return self._sessions.decode(ids)
+
+    def enforce_retention(self, now: Optional[float] = None):
+        """Delete whole segments that ended before each table's retention window"""
+        now = now or time.time()
+        horizons = {"raw": self.retention_days}
+        horizons.update({name: self.rollup_retention_days for name in ROLLUP_RESOLUTIONS})
+        with self._write_lock:
+            for table, days in horizons.items():
+                cutoff = now - days * 86400
+                width = self._partition_seconds(table)
+                for segment_start in self._segment_starts(table):
+                    if segment_start + width > cutoff:
+                        continue
+                    segment = self._segments.pop((table, segment_start), None)
+                    if segment is not None:
+                        segment.close()
+                    shutil.rmtree(os.path.join(self._table_dir(table), str(segment_start)))
+                    logger.info(f"🗑️ Dropped expired {table} segment {segment_start}")
+
+    def flush(self):
+        with self._write_lock:
+            for segment in self._segments.values():
+                segment.flush()
+            self._unflushed = 0
+
+    def close(self):
+        """Write buffered records and open rollup buckets, and flush everything to disk"""
+        if self._task is not None:
+            if not self._task.get_loop().is_closed():
+                self._task.cancel()
+            self._task = None
+        if self._models is None:
+            return
+        with self._write_lock:
+            self.write_pending()
+            for name, bucket in self._buckets.items():
+                row = bucket.take()
+                if row is not None:
+                    self._write_rollup(name, row)
+            for segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
+            self._models = None
+            self._sessions = None
+
+    def stats(self) -> Dict:
+        """Segment and row counts; closed segments are counted from meta.json, not mapped"""
+        tables = {}
+        with self._write_lock:
+            for table in ["raw", *ROLLUP_RESOLUTIONS]:
+                starts = self._segment_starts(table)
+                rows = 0
+                for start in starts:
+                    segment = self._segments.get((table, start))
+                    rows += segment.count if segment is not None else ColumnSegment.stored_count(
+                        os.path.join(self._table_dir(table), str(start))
+                    )
+                tables[table] = {"segments": len(starts), "rows": rows}
+        return {
+            "path": self.path,
+            "appended": self.appended,
+            "pending": len(self._pending),
+            "open_segments": len(self._segments),
+            "tables": tables
+        }
+
+
+signature_store = SignatureStore(
+    settings.signature_store_path,
+    segment_seconds=settings.signature_segment_seconds,
+    retention_days=settings.signature_retention_days,
+    rollup_retention_days=settings.signature_rollup_retention_days,
+    flush_interval=settings.signature_flush_interval,
+    max_open_segments=settings.signature_max_open_segments
+)
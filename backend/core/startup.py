@@ -0,0 +1,49 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class StartupTimer:
+    """Wall time of each startup phase: import, settings, lifespan, warmup
+
+    Created by the first import in main.py, so the first lap covers the
+    whole import graph. Phases are reported once the app is serving and
+    stay available on /health.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._mark = self.started
+        self.phases: Dict[str, float] = {}
+        self.ready_at: Optional[float] = None
+
+    def lap(self, phase: str):
+        """Record the time since the previous phase ended"""
+        now = time.perf_counter()
+        self.phases[phase] = now - self._mark
+        self._mark = now
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._mark = time.perf_counter()
+            self.phases[name] = self._mark - started
+
+    def ready(self):
+        """The app is about to accept connections"""
+        self.ready_at = time.perf_counter()
+
+    def report(self) -> Dict:
+        return {
+            "phases": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            "until_ready": round(self.ready_at - self.started, 4) if self.ready_at else None
+        }
+
+    def summary(self) -> str:
+        return ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+
+
+startup_timer = StartupTimer()
@@ -0,0 +1,161 @@
+import math
+from typing import Optional
+
+# Word sets used for confidence flow; frozensets keep every lookup O(1)
+CONFIDENCE_WORDS = frozenset({
+    'certainly', 'definitely', 'clearly', 'obviously', 'exactly',
+    'precisely', 'absolutely', 'undoubtedly', 'surely', 'indeed'
+})
+
+UNCERTAINTY_WORDS = frozenset({
+    'maybe', 'perhaps', 'possibly', 'might', 'could', 'may',
+    'uncertain', 'unclear', 'probably', 'likely', 'seems'
+})
+
+PUNCTUATION = frozenset('.,!?;:')
+
+
+class TextStatistics:
+    """Incremental text statistics fed by streamed token deltas
+
+    Every delta is scanned once, so keeping a live signature costs
+    O(len(delta)) per token instead of re-splitting the full content.
+    The trailing word is held back until whitespace closes it, because
+    the next delta may still extend it.
+    """
+
+    def __init__(self):
+        self.char_count = 0
+        self.punctuation_count = 0
+        self._word_count = 0
+        self._word_length_total = 0
+        self._unique_words = set()
+        self._confidence_hits = 0
+        self._uncertainty_hits = 0
+        self._pending = ""
+
+    @classmethod
+    def from_text(cls, content: str) -> "TextStatistics":
+        """Build statistics for a complete piece of text"""
+        stats = cls()
+        stats.feed(content)
+        return stats
+
+    def feed(self, delta: str):
+        """Consume the next streamed chunk of text"""
+        if not delta:
+            return
+
+        self.char_count += len(delta)
+        self.punctuation_count += sum(map(PUNCTUATION.__contains__, delta))
+
+        text = self._pending + delta
+        words = text.split()
+        if not words:
+            self._pending = ""
+            return
+
+        if text[-1].isspace():
+            self._pending = ""
+        else:
+            self._pending = words.pop()
+
+        for word in words:
+            self._commit(word)
+
+    def _commit(self, word: str):
+        self._word_count += 1
+        self._word_length_total += len(word)
+        self._unique_words.add(word)
+
+        lowered = word.lower()
+        if lowered in CONFIDENCE_WORDS:
+            self._confidence_hits += 1
+        elif lowered in UNCERTAINTY_WORDS:
+            self._uncertainty_hits += 1
+
+    # Snapshot properties include the pending word, matching content.split()
+
+    @property
+    def word_count(self) -> int:
+        return self._word_count + (1 if self._pending else 0)
+
+    @property
+    def unique_word_count(self) -> int:
+        pending_is_new = self._pending and self._pending not in self._unique_words
+        return len(self._unique_words) + (1 if pending_is_new else 0)
+
+    @property
+    def word_length_total(self) -> int:
+        return self._word_length_total + len(self._pending)
+
+    @property
+    def confidence_hits(self) -> int:
+        return self._confidence_hits + (1 if self._pending.lower() in CONFIDENCE_WORDS else 0)
+
+    @property
+    def uncertainty_hits(self) -> int:
+        return self._uncertainty_hits + (1 if self._pending.lower() in UNCERTAINTY_WORDS else 0)
+
+    def semantic_density(self) -> float:
+        """Semantic complexity (0-1) from the accumulated counts"""
+        word_count = self.word_count
+        if not self.char_count or not word_count:
+            return 0.0
+
+        avg_word_length = self.word_length_total / word_count
+        unique_ratio = self.unique_word_count / word_count
+        punctuation_density = self.punctuation_count / self.char_count
+
+        semantic_density = (
+            (avg_word_length / 10.0) * 0.3 +  # Word complexity
+            unique_ratio * 0.5 +               # Vocabulary richness
+            (punctuation_density * 10) * 0.2   # Structural complexity
+        )
+
+        return min(1.0, max(0.0, semantic_density))
+
+    def text_confidence(self) -> float:
+        """Text-based confidence (0-1) from confidence/uncertainty hits"""
+        word_count = self.word_count
+        if not word_count:
+            return 0.5
+
+        text_confidence = (self.confidence_hits - self.uncertainty_hits) / word_count
+        return (text_confidence + 1) / 2  # Normalize to 0-1
+
+
+class TimingStatistics:
+    """Running token interval statistics (Welford) for O(1) resonance updates"""
+
+    def __init__(self):
+        self.token_count = 0
+        self.first_time: Optional[float] = None
+        self.last_time: Optional[float] = None
+        self._interval_count = 0
+        self._interval_mean = 0.0
+        self._interval_m2 = 0.0
+
+    def add(self, timestamp: float):
+        """Record the arrival time of the next token"""
+        if self.last_time is not None:
+            interval = timestamp - self.last_time
+            self._interval_count += 1
+            delta = interval - self._interval_mean
+            self._interval_mean += delta / self._interval_count
+            self._interval_m2 += delta * (interval - self._interval_mean)
+        else:
+            self.first_time = timestamp
+
+        self.last_time = timestamp
+        self.token_count += 1
+
+    def resonance(self) -> float:
+        """Timing resonance (0-1, higher = more consistent)"""
+        if self._interval_count < 1 or self._interval_mean == 0:
+            return 0.0
+
+        std_interval = math.sqrt(max(0.0, self._interval_m2 / self._interval_count))
+        cv = std_interval / self._interval_mean
+
+        return min(1.0, max(0.0, 1.0 / (1.0 + cv)))
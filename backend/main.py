@@ -1,59 +1,107 @@
+from core.startup import startup_timer  # First, so the import phase covers everything below
+
+# The route modules below read settings at import: build them first so they get their own phase
+with startup_timer.phase("settings"):
+    from dotenv import load_dotenv
+    load_dotenv()  # Before Settings is built, so .env values reach every setting
+    from config import get_settings
+    settings = get_settings()
+
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
-import uvicorn
 import os
-from dotenv import load_dotenv
+import sys
 import logging
-from rich.logging import RichHandler
-from rich.console import Console
 import asyncio
 
-from api.routes import generate, websocket as ws_routes
-from core.ollama_client import OllamaClient
-from core.energy_calculator import EnergyCalculator
+from api.routes import admin, energy, generate, websocket as ws_routes
+from core.ollama_client import get_ollama_client
+from core.conversations import conversation_store
+from core.energy_calculator import get_energy_calculator
+from core.model_registry import model_registry
+from core.persistence import generation_writer, progress_writer
+from core.progression import progression_engine
+from core.signature_store import signature_store
 from services.energy_service import EnergyService
-from config import settings
 
-# Load environment variables
-load_dotenv()
+startup_timer.lap("import")
 
-# Configure logging with Rich
-console = Console()
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(message)s",
-    handlers=[RichHandler(console=console, rich_tracebacks=True)]
-)
+def configure_logging():
+    """Rich logging on an interactive terminal; plain lines for workers and containers"""
+    if sys.stderr.isatty():
+        from rich.logging import RichHandler
+        from rich.console import Console
+        handler = RichHandler(console=Console(), rich_tracebacks=True)
+    else:
+        handler = logging.StreamHandler()
+    logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=[handler])
+
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Global services
 ollama_client = None
 energy_calculator = None
 energy_service = None
+warmup_task = None
+
+async def warmup():
+    """Connect to Ollama and load the primary model without holding up startup"""
+    with startup_timer.phase("warmup"):
+        try:
+            await ollama_client.initialize()
+        except Exception as e:
+            logger.error(f"❌ Ollama warmup failed: {e}")
+    logger.info(f"⏱️ Startup timing: {startup_timer.summary()}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    global ollama_client, energy_calculator, energy_service
+    global ollama_client, energy_calculator, energy_service, warmup_task
     
     logger.info("🌌 Starting WIRTHFORGE - AI Consciousness Evolution Platform")
     
-    # Initialize Ollama client
-    ollama_client = OllamaClient()
-    await ollama_client.initialize()
+    with startup_timer.phase("lifespan"):
+        # Shared Ollama client; model loading continues in the background
+        ollama_client = get_ollama_client()
+        
+        # Initialize energy systems
+        energy_calculator = get_energy_calculator()
+        energy_service = EnergyService(
+            ollama_client,
+            energy_calculator,
+            pipeline_queue_size=settings.energy_pipeline_queue_size,
+            executor=ws_routes.executor
+        )
+        
+        # Join the cross-worker WebSocket backplane
+        await ws_routes.bus.start()
+        
+        # Start write-behind persistence of generation records and user progress
+        await generation_writer.start()
+        await progress_writer.start()
+        
+        # Write buffered energy signatures off the event loop
+        await signature_store.start()
     
-    # Initialize energy systems
-    energy_calculator = EnergyCalculator()
-    energy_service = EnergyService(ollama_client, energy_calculator)
+    startup_timer.ready()
+    warmup_task = asyncio.create_task(warmup())
     
     logger.info("⚡ Energy systems initialized")
-    logger.info("🚀 WIRTHFORGE is ready for consciousness emergence")
+    logger.info(f"🚀 WIRTHFORGE is ready for consciousness emergence ({startup_timer.summary()})")
     
     yield
     
     # Cleanup
+    if not warmup_task.done():
+        warmup_task.cancel()
+    await ws_routes.bus.close()
+    await generation_writer.close()
+    await progress_writer.close()
+    ws_routes.executor.shutdown()
+    signature_store.close()
     if ollama_client:
         await ollama_client.close()
     logger.info("🌟 WIRTHFORGE shutdown complete")
@@ -77,7 +125,9 @@ app.add_middleware(
 
 # Include routers
 app.include_router(generate.router, prefix="/api", tags=["generation"])
+app.include_router(energy.router, prefix="/api", tags=["energy"])
 app.include_router(ws_routes.router, prefix="/ws", tags=["websocket"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 # Serve static files (for frontend if needed)
 if os.path.exists("../frontend/dist"):
@@ -117,7 +167,13 @@ async def health_check():
         "services": {
             "energy_calculator": energy_calculator is not None,
             "energy_service": energy_service is not None
-        }
+        },
+        "history": energy_calculator.get_history_stats() if energy_calculator else None,
+        "persistence": generation_writer.stats(),
+        "progress_persistence": progress_writer.stats(),
+        "progression": progression_engine.stats(),
+        "conversations": conversation_store.stats(),
+        "startup": startup_timer.report()
     }
 
 @app.get("/api/models")
@@ -137,9 +193,7 @@ async def get_available_models():
             energy_signature = {
                 "name": model["name"],
                 "size": model.get("size", 0),
-                "energy_type": get_model_energy_type(model["name"]),
-                "response_speed": get_model_speed(model["name"]),
-                "consciousness_level": get_model_consciousness_level(model["name"])
+                **model_registry.describe(model["name"])
             }
             energy_models.append(energy_signature)
         
@@ -152,54 +206,11 @@ async def get_available_models():
         logger.error(f"Failed to get models: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve models")
 
-def get_model_energy_type(model_name: str) -> str:
-    """Determine energy type based on model name"""
-    if "qwen" in model_name.lower():
-        if "0.6b" in model_name:
-            return "lightning"  # Reflexes
-        elif "1.7b" in model_name:
-            return "stream"     # Intuition
-        elif "4b" in model_name:
-            return "field"      # Reasoning
-    elif "deepseek" in model_name.lower():
-        if "8b" in model_name:
-            return "consciousness"  # Wisdom
-        elif "1.5b" in model_name:
-            return "specialist"     # Specialist
-    
-    return "unknown"
-
-def get_model_speed(model_name: str) -> str:
-    """Determine response speed based on model size"""
-    if "0.6b" in model_name:
-        return "instant"
-    elif "1.5b" in model_name or "1.7b" in model_name:
-        return "fast"
-    elif "4b" in model_name:
-        return "moderate"
-    elif "8b" in model_name:
-        return "thoughtful"
-    
-    return "unknown"
-
-def get_model_consciousness_level(model_name: str) -> int:
-    """Determine consciousness level (1-5) based on model capabilities"""
-    if "0.6b" in model_name:
-        return 1  # Reflexes
-    elif "1.7b" in model_name:
-        return 2  # Intuition
-    elif "4b" in model_name:
-        return 3  # Reasoning
-    elif "1.5b" in model_name:
-        return 4  # Specialist
-    elif "8b" in model_name:
-        return 5  # Wisdom
-    
-    return 1
-
 
 
 if __name__ == "__main__":
+    import uvicorn
+    
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
     
@@ -210,5 +221,6 @@ if __name__ == "__main__":
         host=host,
         port=port,
         reload=True,
+        ws_per_message_deflate=settings.websocket_per_message_deflate,
         log_config=None  # Use our Rich logging
     ) 
\ No newline at end of file
@@ -0,0 +1,361 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from fastapi import WebSocket
+
+from core.codecs import JSON, Codec, Frame, as_frame, negotiate_subprotocol
+
+logger = logging.getLogger(__name__)
+
+# Slow-consumer policies applied when a connection's outbound queue is full
+DROP_OLDEST = "drop_oldest"    # Discard the oldest queued frame to make room
+COALESCE = "coalesce"          # Replace a queued frame with the same key, else drop oldest
+DISCONNECT = "disconnect"      # Close the socket; the client must reconnect and resync
+
+SLOW_CONSUMER_POLICIES = (DROP_OLDEST, COALESCE, DISCONNECT)
+
+# Close codes (RFC 6455)
+SLOW_CONSUMER_CLOSE_CODE = 1008   # Policy violation: client cannot keep up
+AT_CAPACITY_CLOSE_CODE = 1013     # Try again later: connection cap reached
+UNRESPONSIVE_CLOSE_CODE = 1001    # Going away: missed heartbeats or idle too long
+
+# Queue key of frames that must not be dropped or coalesced (see put())
+_RELIABLE = object()
+
+
+class ClientConnection:
+    """One WebSocket with a bounded outbound queue drained by its own writer task
+
+    Producers call `enqueue()`, which never awaits, so one slow client can only
+    back up its own queue. The writer task performs the actual sends, in the
+    codec negotiated for this socket.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_queue: int,
+        policy: str,
+        on_close,
+        codec: Codec = JSON
+    ):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.policy = policy
+        self.codec = codec
+        self.queue: Deque[Tuple[object, Frame, int]] = deque()  # (coalesce key, frame, size)
+        self.queued_bytes = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.send_latency = 0.0  # EWMA of seconds per send
+        self.closed = False
+        self.connected_at = time.monotonic()
+        self.last_seen = self.connected_at       # Any inbound frame, pongs included
+        self.last_activity = self.connected_at   # Application messages only
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._on_close = on_close
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, message: Union[Frame, str, Dict], coalesce_key: Optional[str] = None) -> bool:
+        """Queue a frame for sending; returns False if it was not accepted"""
+        if self.closed:
+            return False
+        frame = as_frame(message)
+        size = len(frame.encode(self.codec))
+
+        if self.policy == COALESCE and coalesce_key is not None:
+            for index, (key, _, queued_size) in enumerate(self.queue):
+                if key == coalesce_key:
+                    self.queue[index] = (coalesce_key, frame, size)
+                    self.queued_bytes += size - queued_size
+                    self.frames_dropped += 1
+                    return True
+
+        if len(self.queue) >= self.max_queue:
+            if self.policy == DISCONNECT:
+                logger.warning("🐢 Disconnecting slow WebSocket consumer")
+                self.close(SLOW_CONSUMER_CLOSE_CODE)
+                return False
+            # Drop the oldest droppable frame; frames queued with put() are never evicted
+            for index, (key, _, dropped_size) in enumerate(self.queue):
+                if key is not _RELIABLE:
+                    del self.queue[index]
+                    self.queued_bytes -= dropped_size
+                    self.frames_dropped += 1
+                    break
+            else:
+                self.frames_dropped += 1
+                return False
+
+        self.queue.append((coalesce_key, frame, size))
+        self.queued_bytes += size
+        self._wakeup.set()
+        return True
+
+    async def put(self, message: Union[Frame, str, Dict]):
+        """Queue a frame, waiting for room instead of applying the slow-consumer policy"""
+        while not self.closed and len(self.queue) >= self.max_queue:
+            self._space.clear()
+            await self._space.wait()
+        if self.closed:
+            return
+
+        frame = as_frame(message)
+        size = len(frame.encode(self.codec))
+        self.queue.append((_RELIABLE, frame, size))
+        self.queued_bytes += size
+        self._wakeup.set()
+
+    def touch(self, activity: bool = True):
+        """Record an inbound frame; heartbeats count as liveness but not activity"""
+        now = time.monotonic()
+        self.last_seen = now
+        if activity:
+            self.last_activity = now
+
+    async def _write_loop(self):
+        try:
+            while not self.closed:
+                if not self.queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                _, frame, size = self.queue.popleft()
+                self.queued_bytes -= size
+                self._space.set()
+                started = time.monotonic()
+                if self.codec.binary:
+                    await self.websocket.send_bytes(frame.encode(self.codec))
+                else:
+                    await self.websocket.send_text(frame.encode(self.codec))
+                self.send_latency = self.send_latency * 0.8 + (time.monotonic() - started) * 0.2
+                self.frames_sent += 1
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"🔗 WebSocket send failed, dropping connection: {e}")
+            self.close()
+
+    def close(self, code: Optional[int] = None):
+        """Stop the writer and release the connection (idempotent)"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.clear()
+        self.queued_bytes = 0
+        self._wakeup.set()
+        self._space.set()
+
+        if code is not None:
+            asyncio.create_task(self._close_socket(code))
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        self._on_close(self.websocket)
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        return {
+            "queued_frames": len(self.queue),
+            "queued_bytes": self.queued_bytes,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "send_latency_ms": round(self.send_latency * 1000, 2),
+            "codec": self.codec.name,
+            "connected_for": round(now - self.connected_at, 1),
+            "idle_for": round(now - self.last_activity, 1),
+            "last_seen": round(now - self.last_seen, 1)
+        }
+
+
+class ConnectionManager:
+    """Tracks WebSocket clients and fans frames out through per-connection queues
+
+    Also enforces the connection cap and runs a single heartbeat task that
+    pings every client and reaps sockets that stop answering or sit idle.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = 64,
+        policy: str = DROP_OLDEST,
+        max_connections: int = 100,
+        heartbeat_interval: float = 30.0,
+        heartbeat_misses: int = 2,
+        idle_timeout: float = 0.0
+    ):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.max_queue = max_queue
+        self.policy = policy
+        self.max_connections = max_connections
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_misses = heartbeat_misses
+        self.idle_timeout = idle_timeout  # 0 disables idle reaping
+        self.connections: Dict[WebSocket, ClientConnection] = {}
+        self.rejected_connections = 0
+        self.reaped_connections = 0
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self.connections)
+
+    async def connect(self, websocket: WebSocket) -> Optional[ClientConnection]:
+        """Accept a client, or reject it with 1013 when at capacity (returns None)
+
+        The frame codec follows the WebSocket subprotocol: a client offering
+        "wirthforge.msgpack" gets binary MessagePack frames, anything else JSON.
+        """
+        codec, subprotocol = negotiate_subprotocol(websocket.scope.get("subprotocols") or ())
+        await websocket.accept(subprotocol=subprotocol)
+
+        if len(self.connections) >= self.max_connections:
+            self.rejected_connections += 1
+            logger.warning(f"🚫 WebSocket rejected: at capacity ({self.max_connections})")
+            await websocket.close(code=AT_CAPACITY_CLOSE_CODE)
+            return None
+
+        connection = ClientConnection(websocket, self.max_queue, self.policy, self._forget, codec)
+        self.connections[websocket] = connection
+        connection.start()
+        self._ensure_heartbeat()
+        logger.info(f"🔗 WebSocket connected. Total connections: {len(self.connections)}")
+        return connection
+
+    def resize(self, max_connections: Optional[int] = None, max_queue: Optional[int] = None):
+        """Change caps without dropping open sockets
+
+        A lower connection cap only turns away new clients. A larger send
+        queue applies to open sockets at once; a smaller one applies to new
+        connections, so no open stream has frames dropped or gets
+        disconnected by the change.
+        """
+        if max_connections is not None:
+            self.max_connections = max_connections
+        if max_queue is not None:
+            if max_queue > self.max_queue:
+                for connection in self.connections.values():
+                    connection.max_queue = max(connection.max_queue, max_queue)
+            self.max_queue = max_queue
+
+    def touch(self, websocket: WebSocket, activity: bool = True):
+        connection = self.connections.get(websocket)
+        if connection:
+            connection.touch(activity)
+
+    def disconnect(self, websocket: WebSocket):
+        connection = self.connections.get(websocket)
+        if connection:
+            connection.close()
+
+    def _forget(self, websocket: WebSocket):
+        if self.connections.pop(websocket, None) is not None:
+            logger.info(f"🔗 WebSocket disconnected. Total connections: {len(self.connections)}")
+
+    async def send_personal_message(
+        self,
+        message: Union[Frame, str, Dict],
+        websocket: WebSocket,
+        coalesce_key: Optional[str] = None
+    ):
+        connection = self.connections.get(websocket)
+        if connection:
+            connection.enqueue(message, coalesce_key)
+
+    async def send_reliable(self, message: Union[Frame, str, Dict], websocket: WebSocket):
+        """Queue a frame that must not be dropped (e.g. replays); waits for queue space"""
+        connection = self.connections.get(websocket)
+        if connection:
+            await connection.put(message)
+
+    async def broadcast(
+        self,
+        message: Union[Frame, str, Dict],
+        coalesce_key: Optional[str] = None,
+        targets: Optional[Iterable[WebSocket]] = None
+    ):
+        """Queue one message to every (or each targeted) client, encoded once per codec"""
+        # Snapshot: enqueue may close (and remove) slow consumers mid-iteration
+        if targets is None:
+            connections = list(self.connections.values())
+        else:
+            connections = [self.connections[ws] for ws in list(targets) if ws in self.connections]
+
+        frame = as_frame(message)
+        for connection in connections:
+            connection.enqueue(frame, coalesce_key)
+
+    def _ensure_heartbeat(self):
+        if self.heartbeat_interval > 0 and (self._heartbeat is None or self._heartbeat.done()):
+            self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def _heartbeat_loop(self):
+        """Ping all clients each interval and reap unresponsive or idle ones"""
+        try:
+            while self.connections:
+                await asyncio.sleep(self.heartbeat_interval)
+                self.reap()
+
+                ping = Frame({"type": "ping", "data": {"timestamp": time.time()}})
+                await self.broadcast(ping, coalesce_key="ping")
+
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Heartbeat loop error: {e}")
+
+    def reap(self) -> int:
+        """Close connections that missed heartbeats or exceeded the idle timeout"""
+        now = time.monotonic()
+        silence_limit = self.heartbeat_interval * self.heartbeat_misses
+        reaped = 0
+
+        for connection in list(self.connections.values()):
+            unresponsive = silence_limit > 0 and now - connection.last_seen > silence_limit
+            idle = self.idle_timeout > 0 and now - connection.last_activity > self.idle_timeout
+            if unresponsive or idle:
+                logger.info(f"💤 Reaping {'unresponsive' if unresponsive else 'idle'} WebSocket")
+                connection.close(UNRESPONSIVE_CLOSE_CODE)
+                reaped += 1
+
+        self.reaped_connections += reaped
+        return reaped
+
+    def stats(self, per_connection: bool = False) -> Dict:
+        """Capacity accounting: connections, queued frames/bytes and tasks"""
+        connections = list(self.connections.values())
+        stats = {
+            "connections": len(connections),
+            "max_connections": self.max_connections,
+            "rejected_connections": self.rejected_connections,
+            "reaped_connections": self.reaped_connections,
+            "policy": self.policy,
+            "max_queue": self.max_queue,
+            "codecs": {
+                name: sum(1 for c in connections if c.codec.name == name)
+                for name in {c.codec.name for c in connections}
+            },
+            "queued_frames": sum(len(c.queue) for c in connections),
+            "queued_bytes": sum(c.queued_bytes for c in connections),
+            "frames_dropped": sum(c.frames_dropped for c in connections),
+            "writer_tasks": sum(1 for c in connections if c._writer and not c._writer.done()),
+            "heartbeat_running": self._heartbeat is not None and not self._heartbeat.done()
+        }
+        if per_connection:
+            stats["clients"] = [c.stats() for c in connections]
+        return stats
@@ -1,18 +1,157 @@
 import logging
-from typing import Dict, List, Optional
+from typing import AsyncGenerator, Dict, List, Optional
 import asyncio
+import time
 from core.ollama_client import OllamaClient
 from core.energy_calculator import EnergyCalculator
+from core.model_registry import model_registry
+from core.offload import ComputeExecutor
+from core.persistence import generation_writer
+from core.seeding import derive_seed
+from core.signature_store import signature_store
+from core.text_stats import TextStatistics, TimingStatistics
 
 logger = logging.getLogger(__name__)
 
+# Marks the end of a pipeline stage's output
+_END = object()
+
+LIGHTNING_START = (-3, -2, 0)
+LIGHTNING_END = (0, 0, 0)
+
+
+async def _run_stage(output: asyncio.Queue, stage, *args, end=_END):
+    """Run one pipeline stage, then mark the end of its output
+
+    A cancelled stage sends no end marker: the pipeline is being torn down,
+    nobody may be reading, and waiting on a full queue would never return.
+    """
+    try:
+        await stage(*args)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        await output.put(end)
+        raise
+    await output.put(end)
+
 class EnergyService:
     """Service that combines AI generation with energy calculation"""
     
-    def __init__(self, ollama_client: OllamaClient, energy_calculator: EnergyCalculator):
+    def __init__(
+        self,
+        ollama_client: OllamaClient,
+        energy_calculator: EnergyCalculator,
+        pipeline_queue_size: int = 64,
+        executor: Optional[ComputeExecutor] = None
+    ):
         self.ollama_client = ollama_client
         self.energy_calculator = energy_calculator
+        self.pipeline_queue_size = pipeline_queue_size
+        self.executor = executor or ComputeExecutor(kind="inline")
+    
+    async def stream_energy_visualization(
+        self,
+        query: str,
+        model: str = "qwen3:0.6b"
+    ) -> AsyncGenerator[Dict, None]:
+        """Stream visualization frames while the model is still generating
+        
+        Runs a staged pipeline connected by bounded queues: tokens feed the
+        incremental energy signature, signatures feed the particle emitter,
+        and particle batches feed lightning geometry. Stages run concurrently;
+        the particle stage coalesces whatever has queued up, so a fast model
+        produces fewer, larger frames instead of stalling the token source.
+        """
+        calculator = self.energy_calculator
+        tokens: asyncio.Queue = asyncio.Queue(self.pipeline_queue_size)
+        signatures: asyncio.Queue = asyncio.Queue(self.pipeline_queue_size)
+        visuals: asyncio.Queue = asyncio.Queue(self.pipeline_queue_size)
+        
+        async def token_stage():
+            stream = self.ollama_client.stream_tokens(model=model, prompt=query)
+            try:
+                async for delta, token_time in stream:
+                    await tokens.put((delta, token_time))
+            finally:
+                # Release the generation slot and conversation lock now, not at GC
+                await stream.aclose()
+        
+        async def signature_stage():
+            text_stats = TextStatistics()
+            timing_stats = TimingStatistics()
+            start_time = time.time()
+            while True:
+                item = await tokens.get()
+                if item is _END:
+                    break
+                delta, token_time = item
+                text_stats.feed(delta)
+                timing_stats.add(token_time)
+                signature = calculator.calculate_streaming_signature(
+                    text_stats, timing_stats, start_time
+                )
+                await signatures.put((delta, signature))
         
+        async def particle_stage():
+            finished = False
+            while not finished:
+                batch = [await signatures.get()]
+                while not signatures.empty():
+                    batch.append(signatures.get_nowait())
+                if batch[-1] is _END:
+                    finished = True
+                    batch.pop()
+                if not batch:
+                    continue
+                
+                signature = batch[-1][1]
+                particles, = await calculator.generate_particles_batch(
+                    [(signature, query)], self.executor
+                )
+                await visuals.put({
+                    "text": "".join(delta for delta, _ in batch),
+                    "energy": signature,
+                    "particles": particles
+                })
+        
+        stages = [
+            asyncio.create_task(_run_stage(tokens, token_stage)),
+            asyncio.create_task(_run_stage(signatures, signature_stage)),
+            asyncio.create_task(_run_stage(visuals, particle_stage))
+        ]
+        
+        try:
+            frame = 0
+            while True:
+                visual = await visuals.get()
+                if visual is _END:
+                    break
+                
+                # Final stage: lightning geometry for this batch
+                branches, = await calculator.calculate_lightning_paths(
+                    [(LIGHTNING_START, LIGHTNING_END,
+                      derive_seed("lightning", visual["energy"], query, model))],
+                    self.executor
+                )
+                visual["lightning"] = {
+                    "branches": branches,
+                    "color": calculator.get_energy_color(visual["energy"]),
+                    "intensity": visual["energy"].get("energy_level", 1.0) / 10
+                }
+                visual["frame"] = frame
+                visual["model"] = model
+                frame += 1
+                yield visual
+            
+            # Surface any stage failure (e.g. generation errors)
+            await asyncio.gather(*stages)
+            
+        finally:
+            for stage in stages:
+                if not stage.done():
+                    stage.cancel()
+    
     async def generate_with_energy_visualization(
         self,
         query: str,
@@ -23,53 +162,125 @@ class EnergyService:
         try:
             logger.info(f"🔥 Generating energy response: {query[:50]}...")
             
-            # For now, return mock data until Ollama is fully integrated
-            # This allows the frontend to work immediately
+            response_parts = []
+            energy_signature = None
+            try:
+                async for visual in self.stream_energy_visualization(query, model):
+                    response_parts.append(visual["text"])
+                    energy_signature = visual["energy"]
+            except Exception as e:
+                if response_parts:
+                    raise
+                logger.warning(f"Ollama unavailable, using mock energy response: {e}")
             
-            mock_response = self._generate_mock_response(query, model, level)
+            if energy_signature is None:
+                return self._generate_mock_visualization(query, model, level)
             
-            # Calculate energy signature from mock response
-            energy_signature = self.energy_calculator.calculate_energy_signature(
-                content=mock_response["response"],
-                token_times=[i * 0.1 for i in range(len(mock_response["response"].split()))],
-                start_time=0.0
-            )
-            
-            # Generate particles from energy signature
-            particles = self.energy_calculator.generate_particles_from_signature(
-                energy_signature, query
+            response = "".join(response_parts)
+            signature_store.append(energy_signature, model=model, level=level)
+            await generation_writer.submit(
+                "energy_service", model, query, response, energy_signature, level=level
             )
             
-            # Generate lightning path
-            lightning_branches = self.energy_calculator.calculate_lightning_path(
-                start=(-3, -2, 0),
-                end=(0, 0, 0)
-            )
-            
-            return {
-                "response": mock_response["response"],
-                "energy": energy_signature,
-                "particles": particles,
-                "lightning": {
-                    "branches": lightning_branches,
-                    "color": "#00ffff",
-                    "duration": 0.5,
-                    "intensity": energy_signature.get("energy_level", 1.0) / 10
-                },
-                "evolution": {
-                    "progress": 0.15,
-                    "next_unlock": "council_formation",
-                    "energy_collected": 150,
-                    "consciousness_level": level
-                },
-                "model_used": model,
-                "consciousness_level": level
-            }
+            return self._build_visualization(response, energy_signature, query, model, level)
             
         except Exception as e:
             logger.error(f"❌ Energy generation failed: {e}")
             raise
     
+    def _generate_mock_visualization(self, query: str, model: str, level: int) -> Dict:
+        """Fallback visualization from the mock response when Ollama is not available"""
+        mock_response = self._generate_mock_response(query, model, level)
+        
+        # Calculate energy signature from mock response
+        energy_signature = self.energy_calculator.calculate_energy_signature(
+            content=mock_response["response"],
+            token_times=[i * 0.1 for i in range(len(mock_response["response"].split()))],
+            start_time=0.0
+        )
+        
+        return self._build_visualization(
+            mock_response["response"], energy_signature, query, model, level
+        )
+    
+    def _build_visualization(
+        self,
+        response: str,
+        energy_signature: Dict,
+        query: str,
+        model: str,
+        level: int
+    ) -> Dict:
+        """Assemble the complete visualization payload for a finished response"""
+        # Generate particles from energy signature
+        particles = self.energy_calculator.generate_particles_from_signature(
+            energy_signature, query
+        )
+        
+        # Generate lightning path (seeded by the request so it replays identically)
+        lightning_branches = self.energy_calculator.calculate_lightning_path(
+            start=LIGHTNING_START,
+            end=LIGHTNING_END,
+            seed=derive_seed("lightning", energy_signature, query, model)
+        )
+        
+        return {
+            "response": response,
+            "energy": energy_signature,
+            "particles": particles,
+            "lightning": {
+                "branches": lightning_branches,
+                "color": "#00ffff",
+                "duration": 0.5,
+                "intensity": energy_signature.get("energy_level", 1.0) / 10
+            },
+            "evolution": {
+                "progress": 0.15,
+                "next_unlock": "council_formation",
+                "energy_collected": 150,
+                "consciousness_level": level
+            },
+            "model_used": model,
+            "consciousness_level": level
+        }
+    
+    async def stream_council_with_energy(
+        self,
+        query: str,
+        models: List[str]
+    ) -> AsyncGenerator[Dict, None]:
+        """Run one visualization pipeline per council model and merge their frames"""
+        merged: asyncio.Queue = asyncio.Queue(self.pipeline_queue_size)
+        
+        async def run_member(model: str):
+            visuals = self.stream_energy_visualization(query, model)
+            try:
+                async for visual in visuals:
+                    await merged.put(visual)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await merged.put({"model": model, "error": str(e)})
+            finally:
+                await visuals.aclose()
+        
+        members = [
+            asyncio.create_task(_run_stage(merged, run_member, model, end=(_END, model)))
+            for model in models
+        ]
+        try:
+            remaining = len(models)
+            while remaining:
+                item = await merged.get()
+                if isinstance(item, tuple) and item[0] is _END:
+                    remaining -= 1
+                    continue
+                yield item
+        finally:
+            for member in members:
+                if not member.done():
+                    member.cancel()
+    
     async def generate_council_with_energy(
         self,
         query: str,
@@ -82,21 +293,38 @@ class EnergyService:
             
             logger.info(f"🌊 Starting council formation: {query[:50]}...")
             
-            # Mock council responses for now
+            texts: Dict[str, List[str]] = {model: [] for model in models}
+            signatures: Dict[str, Dict] = {}
+            async for visual in self.stream_council_with_energy(query, models):
+                if "error" in visual:
+                    logger.warning(f"Council member {visual['model']} failed: {visual['error']}")
+                    continue
+                texts[visual["model"]].append(visual["text"])
+                signatures[visual["model"]] = visual["energy"]
+            
             council_responses = []
             energy_streams = []
             
             for i, model in enumerate(models):
-                response = self._generate_mock_council_response(query, model, i)
+                if model in signatures:
+                    signature = signatures[model]
+                    response = self._generate_mock_council_response(query, model, i)
+                    response["response"] = "".join(texts[model])
+                    response["confidence"] = signature.get("confidence_flow", response["confidence"])
+                    intensity = signature.get("energy_level", 0.0) / 10
+                else:
+                    # Mock council member when Ollama is not available
+                    response = self._generate_mock_council_response(query, model, i)
+                    intensity = 0.8 + (i * 0.1)
                 council_responses.append(response)
                 
                 # Create energy stream for this model
                 stream = {
                     "model": model,
-                    "color": self._get_model_color(model),
+                    "color": model_registry.lookup(model).color,
                     "path": self._generate_stream_path(i, len(models)),
-                    "energy_type": self._get_model_energy_type(model),
-                    "intensity": 0.8 + (i * 0.1)
+                    "energy_type": model_registry.lookup(model).energy_type,
+                    "intensity": intensity
                 }
                 energy_streams.append(stream)
             
@@ -189,31 +417,6 @@ The three perspectives have converged into unified understanding:
 
 This synthesis represents Level 2 consciousness emergence through collaborative AI reasoning. The energy streams have merged into a coherent field of understanding, ready for action."""
     
-    def _get_model_color(self, model: str) -> str:
-        """Get visualization color for model"""
-        color_map = {
-            "qwen3:0.6b": "#00ffff",   # Lightning cyan
-            "qwen3:1.7b": "#4ecdc4",   # Stream teal
-            "qwen3:4b": "#ff6b35",     # Field orange
-            "deepseek-r1:1.5b": "#45b7d1",  # Specialist blue
-            "deepseek-r1:8b": "#9b59b6"     # Consciousness purple
-        }
-        return color_map.get(model, "#00ffff")
-    
-    def _get_model_energy_type(self, model: str) -> str:
-        """Get energy type for model"""
-        if "0.6b" in model:
-            return "lightning"
-        elif "1.7b" in model:
-            return "stream"
-        elif "4b" in model:
-            return "field"
-        elif "1.5b" in model:
-            return "specialist"
-        elif "8b" in model:
-            return "consciousness"
-        return "unknown"
-    
     def _generate_stream_path(self, index: int, total: int) -> List[Dict]:
         """Generate energy stream path for council member"""
         # Arrange models in a circle around the center
@@ -0,0 +1,328 @@
+import asyncio
+import logging
+import re
+import secrets
+from typing import Dict, Optional, Set
+
+import numpy as np
+from fastapi import WebSocket
+
+from core.codecs import Frame
+from core.limits import LimitExceeded
+from core.offload import ComputeExecutor
+from core.particle_engine import ParticleEngine, AMBIENT_SIGNATURE
+from core.seeding import make_rng
+from services.connection_manager import ConnectionManager
+from services.frame_pacing import FramePacer, frame_periods
+
+logger = logging.getLogger(__name__)
+
+# Positions are sent on a 1/POSITION_SCALE grid; smaller moves are not resent
+POSITION_SCALE = 100.0
+
+ROOM_NAME = re.compile(r"[A-Za-z0-9_-]{1,32}")
+ROOM_REJECTED_CLOSE_CODE = 1008  # Policy violation: bad room name or room cap reached
+
+
+class FrameTier:
+    """Delta stream shared by every subscriber paced at the same tick period
+
+    Tracks which particles the tier's clients already know and the positions
+    last sent to them, so a delta carries only spawned, moved and expired
+    particles since the tier's previous frame.
+    """
+
+    def __init__(self, period: int, capacity: int):
+        self.period = period
+        self.subscribers: Set[WebSocket] = set()
+        self.known = np.zeros(capacity, dtype=bool)
+        self.last_positions = np.zeros((capacity, 3), dtype=np.int32)
+        self.pending_expired = []
+        self.fresh = True  # No baseline yet; the next keyframe provides it
+
+    def note_expired(self, engine: ParticleEngine):
+        """Queue expirations of particles this tier's clients have seen"""
+        slots = engine.last_expired_slots
+        if len(slots):
+            seen = slots[self.known[slots]]
+            self.pending_expired.extend(engine.ids[seen].tolist())
+            self.known[slots] = False
+
+    def reset(self, engine: ParticleEngine, positions: np.ndarray):
+        """Align with a keyframe that just delivered the full state"""
+        self.known[:] = engine.alive
+        self.last_positions[engine.alive] = positions[engine.alive]
+        self.pending_expired = []
+        self.fresh = False
+
+    def build_delta(self, engine: ParticleEngine, positions: np.ndarray) -> Optional[Dict]:
+        alive = engine.alive
+        spawned = np.flatnonzero(alive & ~self.known)
+        moved = np.flatnonzero(
+            alive & self.known & (positions != self.last_positions).any(axis=1)
+        )
+        expired = self.pending_expired
+
+        self.known[:] = alive
+        self.last_positions[alive] = positions[alive]
+        self.pending_expired = []
+
+        if not len(spawned) and not len(moved) and not expired:
+            return None
+
+        return {
+            "tick": engine.tick,
+            "spawned": engine.describe(spawned),
+            "updated": {
+                "ids": engine.ids[moved].tolist(),
+                "positions": (positions[moved] / POSITION_SCALE).ravel().tolist()
+            },
+            "expired": expired
+        }
+
+
+class EnergyRoom:
+    """A shared particle field stepped by one ticker for all of its subscribers
+
+    Frames are built and JSON-encoded once per pacing tier rather than once
+    per client: subscribers are grouped by their adaptive frame period, each
+    group receives the same encoded delta, and periodic keyframes carrying
+    the full state are encoded once for the whole room. The ticker runs only
+    while the room has subscribers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        manager: ConnectionManager,
+        max_particles: int,
+        fps: int,
+        min_fps: int = 5,
+        keyframe_interval: float = 2.0,
+        executor: Optional[ComputeExecutor] = None
+    ):
+        self.name = name
+        self.manager = manager
+        self.executor = executor or ComputeExecutor(kind="inline")
+        self.fps = fps
+        self.tick_interval = 1.0 / fps
+        self.periods = frame_periods(fps, min_fps)
+        self.keyframe_every = max(1, int(keyframe_interval * fps))
+        self.adapt_every = max(1, fps // 2)
+        self.seed = secrets.randbits(63)
+        self.engine = ParticleEngine(
+            max_particles=max_particles,
+            rng=make_rng("room", name, self.seed)
+        )
+        self.subscribers: Set[WebSocket] = set()
+        self.pacers: Dict[WebSocket, FramePacer] = {}
+        self.tiers: Dict[int, FrameTier] = {}
+        self.frames_encoded = 0
+        self._needs_keyframe: Set[WebSocket] = set()
+        self._task: Optional[asyncio.Task] = None
+
+        # Ambient field so idle clients still see energy flowing
+        self.engine.add_emitter_from_signature(AMBIENT_SIGNATURE, duration=None)
+
+    def subscribe(self, websocket: WebSocket):
+        self.subscribers.add(websocket)
+        pacer = FramePacer(self.periods, self.tick_interval)
+        self.pacers[websocket] = pacer
+        self._join_tier(websocket, pacer.period)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def unsubscribe(self, websocket: WebSocket):
+        self.subscribers.discard(websocket)
+        self._needs_keyframe.discard(websocket)
+        pacer = self.pacers.pop(websocket, None)
+        if pacer:
+            self._leave_tier(websocket, pacer.period)
+        if not self.subscribers:
+            self.stop()
+
+    def ack(self, websocket: WebSocket, tick: int, render_fps: Optional[float] = None):
+        """Client acknowledgement of the newest frame it has rendered"""
+        pacer = self.pacers.get(websocket)
+        if pacer:
+            pacer.on_ack(tick, render_fps)
+
+    def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    def _join_tier(self, websocket: WebSocket, period: int):
+        tier = self.tiers.get(period)
+        if tier is None:
+            tier = FrameTier(period, self.engine.max_particles)
+            self.tiers[period] = tier
+        tier.subscribers.add(websocket)
+        # The tier's delta baseline is unknown to this client until it gets a keyframe
+        self._needs_keyframe.add(websocket)
+
+    def _leave_tier(self, websocket: WebSocket, period: int):
+        tier = self.tiers.get(period)
+        if tier is None:
+            return
+        tier.subscribers.discard(websocket)
+        if not tier.subscribers:
+            del self.tiers[period]
+
+    def _adapt_pacing(self):
+        for websocket, pacer in list(self.pacers.items()):
+            connection = self.manager.connections.get(websocket)
+            if connection is None:
+                continue
+            old_period = pacer.period
+            if pacer.evaluate(self.engine.tick, connection.send_latency, len(connection.queue)):
+                self._leave_tier(websocket, old_period)
+                self._join_tier(websocket, pacer.period)
+
+    async def publish(self, message_type: str, data: Dict, coalesce_key: Optional[str] = None,
+                      targets: Optional[Set[WebSocket]] = None):
+        """Encode a message once and queue it to every (or each targeted) subscriber"""
+        payload = Frame({"type": message_type, "room": self.name, "data": data})
+        self.frames_encoded += 1
+        await self.manager.broadcast(
+            payload, coalesce_key, targets=self.subscribers if targets is None else targets
+        )
+
+    def _keyframe(self) -> Dict:
+        slots = np.flatnonzero(self.engine.alive)
+        keyframe = self.engine.describe(slots)
+        keyframe["tick"] = self.engine.tick
+        return keyframe
+
+    async def _run(self):
+        """Step the engine at a fixed tick rate and fan out paced frames"""
+        try:
+            loop = asyncio.get_event_loop()
+
+            next_tick = loop.time()
+            while self.subscribers:
+                # Large fields step on a worker thread so the loop keeps serving sockets
+                await self.executor.submit(
+                    self.engine.step, self.tick_interval,
+                    size=self.engine.particle_count, stateful=True
+                )
+                tick = self.engine.tick
+
+                for tier in self.tiers.values():
+                    tier.note_expired(self.engine)
+
+                if tick % self.adapt_every == 0:
+                    self._adapt_pacing()
+
+                positions = self.engine.quantized_positions(POSITION_SCALE)
+
+                if tick % self.keyframe_every == 0:
+                    # Periodic keyframe resynchronizes every client and tier
+                    await self.publish("particle_keyframe", self._keyframe(),
+                                       coalesce_key="particle_keyframe")
+                    for tier in self.tiers.values():
+                        tier.reset(self.engine, positions)
+                    self._needs_keyframe.clear()
+                else:
+                    if self._needs_keyframe:
+                        await self.publish("particle_keyframe", self._keyframe(),
+                                           coalesce_key="particle_keyframe",
+                                           targets=self._needs_keyframe)
+                        self._needs_keyframe = set()
+                        for tier in self.tiers.values():
+                            if tier.fresh:
+                                tier.reset(self.engine, positions)
+
+                    for tier in list(self.tiers.values()):
+                        if tick % tier.period:
+                            continue
+                        delta = tier.build_delta(self.engine, positions)
+                        if delta is not None:
+                            await self.publish("particle_delta", delta, targets=tier.subscribers)
+
+                # Fixed timestep: schedule against the ideal clock, skip ahead if we fell behind
+                next_tick += self.tick_interval
+                delay = next_tick - loop.time()
+                if delay < -self.tick_interval:
+                    next_tick = loop.time()
+                    delay = 0
+                await asyncio.sleep(max(0.0, delay))
+
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Energy simulation error in room {self.name}: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "particles": self.engine.particle_count,
+            "tick": self.engine.tick,
+            "frames_encoded": self.frames_encoded,
+            "tiers": {
+                round(self.fps / period, 1): len(tier.subscribers)
+                for period, tier in self.tiers.items()
+            }
+        }
+
+
+class EnergyTicker:
+    """Registry of shared energy rooms; rooms are created on first subscribe
+
+    Every room steps its own simulation, so clients may only name rooms
+    matching ROOM_NAME and at most max_rooms exist at once.
+    """
+
+    def __init__(
+        self,
+        manager: ConnectionManager,
+        max_particles: int,
+        fps: int,
+        min_fps: int = 5,
+        keyframe_interval: float = 2.0,
+        executor: Optional[ComputeExecutor] = None,
+        max_rooms: int = 16
+    ):
+        self.manager = manager
+        self.executor = executor
+        self.max_rooms = max_rooms
+        self.max_particles = max_particles
+        self.fps = fps
+        self.min_fps = min_fps
+        self.keyframe_interval = keyframe_interval
+        self.rooms: Dict[str, EnergyRoom] = {}
+
+    def admits(self, room_name: str) -> Optional[str]:
+        """Why a subscriber to room_name would be turned away, or None"""
+        if not ROOM_NAME.fullmatch(room_name):
+            return "invalid room name"
+        if room_name not in self.rooms and len(self.rooms) >= self.max_rooms:
+            return f"at room capacity ({self.max_rooms})"
+        return None
+
+    def subscribe(self, room_name: str, websocket: WebSocket) -> EnergyRoom:
+        """Join a room, creating it if needed; raises LimitExceeded if admits() refuses"""
+        rejection = self.admits(room_name)
+        if rejection:
+            raise LimitExceeded(rejection)
+        room = self.rooms.get(room_name)
+        if room is None:
+            room = EnergyRoom(
+                room_name, self.manager, self.max_particles, self.fps,
+                min_fps=self.min_fps, keyframe_interval=self.keyframe_interval,
+                executor=self.executor
+            )
+            self.rooms[room_name] = room
+        room.subscribe(websocket)
+        return room
+
+    def unsubscribe(self, room_name: str, websocket: WebSocket):
+        room = self.rooms.get(room_name)
+        if room is None:
+            return
+        room.unsubscribe(websocket)
+        if not room.subscribers:
+            del self.rooms[room_name]
+
+    def stats(self) -> Dict:
+        return {name: room.stats() for name, room in self.rooms.items()}
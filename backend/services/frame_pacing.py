@@ -0,0 +1,76 @@
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Candidate frame periods, in simulation ticks (1 = every tick)
+CANDIDATE_PERIODS = (1, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+
+
+def frame_periods(max_fps: int, min_fps: int) -> List[int]:
+    """Tick periods whose frame rate stays between min_fps and max_fps"""
+    periods = [p for p in CANDIDATE_PERIODS if max_fps / p >= min_fps]
+    return periods or [1]
+
+
+class FramePacer:
+    """Adaptive per-client frame rate, chosen from a fixed ladder of tick periods
+
+    Clients sharing a period share one delta stream, so pacing stays compatible
+    with encode-once fan-out. The pacer steps down when sends are slow, the
+    outbound queue backs up, or client acks fall behind, and steps back up
+    after several healthy evaluations. A client-reported render rate caps it.
+    """
+
+    def __init__(self, periods: List[int], tick_interval: float, recover_after: int = 3):
+        self.periods = periods
+        self.tick_interval = tick_interval
+        self.recover_after = recover_after
+        self.level = 0
+        self.acked_tick: Optional[int] = None
+        self.render_fps: Optional[float] = None
+        self._healthy = 0
+
+    @property
+    def period(self) -> int:
+        return self.periods[self.level]
+
+    @property
+    def fps(self) -> float:
+        return 1.0 / (self.period * self.tick_interval)
+
+    def on_ack(self, tick: int, render_fps: Optional[float] = None):
+        """Record a client frame acknowledgement (and optional render rate)"""
+        if self.acked_tick is None or tick > self.acked_tick:
+            self.acked_tick = tick
+        if render_fps:
+            self.render_fps = float(render_fps)
+
+    def evaluate(self, current_tick: int, send_latency: float, queue_depth: int) -> bool:
+        """Re-pick the frame period; returns True if it changed"""
+        budget = self.period * self.tick_interval
+
+        congested = queue_depth > 2 or send_latency > budget * 0.5
+        if self.acked_tick is not None:
+            ack_lag = (current_tick - self.acked_tick) * self.tick_interval
+            congested = congested or ack_lag > max(0.5, budget * 4)
+
+        level = self.level
+        if congested:
+            self._healthy = 0
+            level = min(level + 1, len(self.periods) - 1)
+        else:
+            self._healthy += 1
+            if self._healthy >= self.recover_after:
+                self._healthy = 0
+                level = max(level - 1, 0)
+
+        # Never send faster than the client says it can render
+        if self.render_fps:
+            while level < len(self.periods) - 1 and \
+                    1.0 / (self.periods[level] * self.tick_interval) > self.render_fps:
+                level += 1
+
+        changed = level != self.level
+        self.level = level
+        return changed
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from core.energy_calculator import EnergyCalculator
+from core.ollama_client import OllamaClient
+from core.particle_engine import ParticleEngine
+from core.seeding import make_rng
+from core.text_stats import TextStatistics, TimingStatistics
+
+logger = logging.getLogger(__name__)
+
+LIGHTNING_START = (-3.0, -2.0, 0.0)
+LIGHTNING_END = (0.0, 0.0, 0.0)
+
+SendFn = Callable[[str, Dict], Awaitable[None]]
+
+
+class LightningStream:
+    """Turns per-token energy events into coalesced lightning frames
+
+    Tokens only update counters and append bolt segments; `flush()` folds
+    everything since the previous flush into a single frame, so the socket
+    carries one message per render frame however fast the model streams.
+    """
+
+    def __init__(
+        self,
+        calculator: EnergyCalculator,
+        query: str,
+        model: str,
+        start: Tuple[float, float, float] = LIGHTNING_START,
+        end: Tuple[float, float, float] = LIGHTNING_END
+    ):
+        self.calculator = calculator
+        self.query = query
+        self.model = model
+        self.start = start
+        self.end = end
+        self.rng = make_rng("lightning", query, model)
+        self.text_stats = TextStatistics()
+        self.timing_stats = TimingStatistics()
+        self.start_time = time.time()
+        self.content_parts: List[str] = []
+        self.frames = 0
+
+        self._pending_text: List[str] = []
+        self._pending_segments: List[Dict] = []
+        self._pending_burst = 0
+        self._head = {"x": start[0], "y": start[1], "z": start[2]}
+
+    def on_token(self, delta: str, timestamp: float):
+        """Record one streamed token (O(len(delta)))"""
+        self.text_stats.feed(delta)
+        self.timing_stats.add(timestamp)
+        self.content_parts.append(delta)
+        self._pending_text.append(delta)
+        self._pending_burst += 1 + len(delta) // 4
+        self._pending_segments.append(self._advance_head())
+
+    def _advance_head(self) -> Dict:
+        """Extend the bolt one jittered segment toward its target"""
+        progress = 1.0 - math.exp(-self.timing_stats.token_count / 20.0)
+        rng = self.rng
+        self._head = {
+            "x": self.start[0] + progress * (self.end[0] - self.start[0]) + rng.normal(0, 0.2),
+            "y": self.start[1] + progress * (self.end[1] - self.start[1]) + rng.normal(0, 0.2),
+            "z": self.start[2] + progress * (self.end[2] - self.start[2]) + rng.normal(0, 0.1)
+        }
+        return self._head
+
+    def signature(self) -> Dict:
+        return self.calculator.calculate_streaming_signature(
+            self.text_stats, self.timing_stats, self.start_time
+        )
+
+    def flush(self, engine: Optional[ParticleEngine] = None) -> Optional[Dict]:
+        """Collapse everything since the last flush into one frame (None if idle)"""
+        if not self._pending_segments:
+            return None
+
+        signature = self.signature()
+        frame = {
+            "frame": self.frames,
+            "text": "".join(self._pending_text),
+            "segments": self._pending_segments,
+            "burst": {
+                "center": self._head,
+                "count": self._pending_burst,
+                "color": self.calculator.get_energy_color(signature),
+                "energy": signature["energy_level"] / 10
+            },
+            "energy": signature,
+            "model": self.model
+        }
+
+        # One short emitter per frame in the shared field, never one per token
+        if engine is not None:
+            engine.add_emitter_from_signature(
+                signature,
+                origin=(self._head["x"], self._head["y"], self._head["z"]),
+                duration=0.2
+            )
+
+        self.frames += 1
+        self._pending_text = []
+        self._pending_segments = []
+        self._pending_burst = 0
+        return frame
+
+    def summary(self) -> Dict:
+        return {
+            "response": "".join(self.content_parts),
+            "energy": self.signature(),
+            "frames": self.frames,
+            "model": self.model,
+            "query": self.query
+        }
+
+
+async def stream_lightning(
+    ollama_client: OllamaClient,
+    calculator: EnergyCalculator,
+    query: str,
+    model: str,
+    send: SendFn,
+    fps: int,
+    engine: Optional[ParticleEngine] = None,
+    conversation_id: Optional[str] = None
+) -> Dict:
+    """Stream a real generation and send coalesced lightning frames at most fps times a second"""
+    stream = LightningStream(calculator, query, model)
+    frame_interval = 1.0 / fps
+
+    async def consume():
+        async for delta, token_time in ollama_client.stream_tokens(
+            model=model, prompt=query, conversation_id=conversation_id
+        ):
+            stream.on_token(delta, token_time)
+
+    consumer = asyncio.create_task(consume())
+    try:
+        while not consumer.done():
+            await asyncio.wait({consumer}, timeout=frame_interval)
+            frame = stream.flush(engine)
+            if frame is not None:
+                await send("lightning_frame", frame)
+
+        consumer.result()  # Surface generation errors
+
+        summary = stream.summary()
+        await send("lightning_complete", summary)
+        return summary
+
+    finally:
+        if not consumer.done():
+            consumer.cancel()
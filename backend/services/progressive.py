@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from core.conversations import ConversationNotFound
+from core.energy_calculator import EnergyCalculator
+from core.ollama_client import OllamaClient
+from core.text_stats import TextStatistics, TimingStatistics
+
+logger = logging.getLogger(__name__)
+
+SendFn = Callable[[str, Dict], Awaitable[None]]
+
+
+class _Track:
+    """One model's side of a progressive generation"""
+
+    def __init__(self, model: str, stage: str):
+        self.model = model
+        self.stage = stage
+        self.parts: List[str] = []
+        self.chars = 0
+        self.pending: List[str] = []
+        self.first_token_at: Optional[float] = None
+        self.text_stats = TextStatistics()
+        self.timing_stats = TimingStatistics()
+        self.task: Optional[asyncio.Task] = None
+        self.error: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    @property
+    def finished(self) -> bool:
+        return self.task is not None and self.task.done()
+
+    def on_token(self, delta: str, timestamp: float):
+        if self.first_token_at is None:
+            self.first_token_at = timestamp
+        self.parts.append(delta)
+        self.pending.append(delta)
+        self.chars += len(delta)
+        self.text_stats.feed(delta)
+        self.timing_stats.add(timestamp)
+
+    def take_pending(self) -> str:
+        text = "".join(self.pending)
+        self.pending = []
+        return text
+
+
+async def stream_progressive(
+    ollama_client: OllamaClient,
+    calculator: EnergyCalculator,
+    query: str,
+    model: str,
+    draft_model: str,
+    send: SendFn,
+    fps: int,
+    conversation_id: Optional[str] = None
+) -> Dict:
+    """Stream an instant draft from draft_model, upgraded by model as it catches up
+
+    Both models start at once. Draft frames go out as soon as the small model
+    produces them; the larger model's frames are sent as "refinement" frames
+    alongside. Once the refinement has produced at least as much text as the
+    draft, the draft is cancelled and a progressive_overtake frame tells the
+    client to swap in the refinement. Frames are coalesced to fps per second.
+    """
+    start_time = time.time()
+    frame_interval = 1.0 / fps
+    refine = _Track(model, "refinement")
+    draft = _Track(draft_model, "draft") if draft_model != model else None
+    tracks = [t for t in (draft, refine) if t is not None]
+
+    async def consume(track: _Track, conversation: Optional[str]):
+        try:
+            async for delta, token_time in ollama_client.stream_tokens(
+                model=track.model, prompt=query, conversation_id=conversation
+            ):
+                track.on_token(delta, token_time)
+        except (asyncio.CancelledError, ConversationNotFound):
+            raise
+        except Exception as e:
+            track.error = str(e)
+            logger.warning(f"Progressive {track.stage} stream from {track.model} failed: {e}")
+
+    # Only the refinement continues the conversation; the draft is disposable
+    refine.task = asyncio.create_task(consume(refine, conversation_id))
+    if draft is not None:
+        draft.task = asyncio.create_task(consume(draft, None))
+
+    overtaken = False
+    frame = 0
+    try:
+        while not all(t.finished for t in tracks):
+            await asyncio.wait({t.task for t in tracks if not t.finished}, timeout=frame_interval)
+            if refine.finished:
+                refine.task.result()  # An expired conversation ends the request, not just the track
+
+            if draft is not None and not overtaken and not draft.finished and refine.chars >= draft.chars > 0:
+                overtaken = True
+                draft.task.cancel()
+                refine.pending = []
+                await send("progressive_overtake", {
+                    "frame": frame,
+                    "model": refine.model,
+                    "text": refine.text,
+                    "draft_chars": draft.chars,
+                    "elapsed": round(time.time() - start_time, 3)
+                })
+                frame += 1
+
+            for track in tracks:
+                if overtaken and track is draft:
+                    continue
+                delta = track.take_pending()
+                if delta:
+                    await send("progressive_frame", {
+                        "frame": frame,
+                        "stage": track.stage,
+                        "model": track.model,
+                        "text": delta
+                    })
+                    frame += 1
+
+            if draft is not None and draft.finished and not overtaken and draft.stage == "draft":
+                draft.stage = "draft_complete"
+                await send("progressive_draft_complete", {
+                    "model": draft.model,
+                    "text": draft.text,
+                    "error": draft.error
+                })
+
+        refined = refine.error is None and refine.chars > 0
+        final = refine if refined or draft is None else draft
+        if not final.chars and final.error:
+            raise RuntimeError(final.error)
+        signature = calculator.calculate_streaming_signature(
+            final.text_stats, final.timing_stats, start_time
+        )
+        summary = {
+            "response": final.text,
+            "model": final.model,
+            "refined": refined,
+            "overtaken": overtaken,
+            "draft": draft.text if draft is not None else None,
+            "draft_model": draft_model,
+            "time_to_first_token": {
+                t.stage.split("_")[0]: round(t.first_token_at - start_time, 3)
+                for t in tracks if t.first_token_at is not None
+            },
+            "energy": signature,
+            "frames": frame,
+            "query": query
+        }
+        await send("progressive_complete", summary)
+        return summary
+
+    finally:
+        for track in tracks:
+            if not track.finished:
+                track.task.cancel()
@@ -0,0 +1,314 @@
+import asyncio
+import fcntl
+import logging
+import os
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DeliverFn = Callable[[str, str], Awaitable[None]]
+Handler = Callable[[str], Awaitable[None]]
+
+
+class PubSubBackend:
+    """Carries already-encoded payloads to the other workers
+
+    Backends never echo a message back to the worker that published it;
+    the EventBus delivers locally itself, so each worker encodes once and
+    fans out to its own sockets.
+    """
+
+    name = "base"
+
+    async def start(self, deliver: DeliverFn):
+        self._deliver = deliver
+
+    async def publish(self, channel: str, payload: str):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    def stats(self) -> Dict:
+        return {"backend": self.name}
+
+
+class MemoryBackend(PubSubBackend):
+    """Single-process backend: local delivery only"""
+
+    name = "memory"
+
+    async def publish(self, channel: str, payload: str):
+        pass
+
+
+class UnixSocketBackend(PubSubBackend):
+    """Same-host backend relaying through a Unix socket hub
+
+    Workers elect a hub with an advisory file lock; the hub listens on the
+    socket and relays each line to every other worker. If the hub exits its
+    lock is released and another worker takes over on its next reconnect.
+    Frames are `channel<TAB>payload<LF>`; payloads are single-line JSON.
+    """
+
+    name = "unix"
+
+    def __init__(self, path: str, max_peer_buffer: int = 4 * 1024 * 1024):
+        self.path = path
+        self.max_peer_buffer = max_peer_buffer
+        self.is_hub = False
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._upstream: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: DeliverFn):
+        await super().start(deliver)
+        self._task = asyncio.create_task(self._maintain())
+
+    def _try_lock(self) -> bool:
+        fd = os.open(self.path + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def _maintain(self):
+        """Become the hub if the lock is free, otherwise stay connected to it"""
+        while True:
+            try:
+                if self._try_lock():
+                    if os.path.exists(self.path):
+                        os.unlink(self.path)  # Stale socket from a dead hub
+                    self._server = await asyncio.start_unix_server(self._serve_peer, path=self.path)
+                    self.is_hub = True
+                    logger.info(f"📡 Pub/sub hub listening on {self.path}")
+                    await self._server.serve_forever()
+                    return
+
+                reader, writer = await asyncio.open_unix_connection(self.path)
+                self._upstream = writer
+                logger.info(f"📡 Connected to pub/sub hub at {self.path}")
+                await self._read_frames(reader, None)
+
+            except asyncio.CancelledError:
+                raise
+            except (ConnectionError, FileNotFoundError) as e:
+                logger.debug(f"Pub/sub hub not reachable: {e}")
+            except Exception as e:
+                logger.error(f"Pub/sub link error: {e}")
+            finally:
+                self._upstream = None
+
+            await asyncio.sleep(0.5)
+
+    async def _serve_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._peers.add(writer)
+        try:
+            await self._read_frames(reader, writer)
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    async def _read_frames(self, reader: asyncio.StreamReader, source: Optional[asyncio.StreamWriter]):
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if self.is_hub:
+                self._relay(line, exclude=source)
+            channel, _, payload = line.decode("utf-8").rstrip("\n").partition("\t")
+            await self._deliver(channel, payload)
+
+    def _relay(self, line: bytes, exclude: Optional[asyncio.StreamWriter] = None):
+        for peer in list(self._peers):
+            if peer is exclude:
+                continue
+            if peer.transport.get_write_buffer_size() > self.max_peer_buffer:
+                logger.warning("📡 Dropping slow pub/sub peer")
+                self._peers.discard(peer)
+                peer.close()
+                continue
+            peer.write(line)
+
+    async def publish(self, channel: str, payload: str):
+        line = f"{channel}\t{payload}\n".encode("utf-8")
+        if self.is_hub:
+            self._relay(line)
+        elif self._upstream is not None:
+            self._upstream.write(line)
+        else:
+            logger.debug("Pub/sub hub unavailable; message delivered locally only")
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+        if self._server:
+            self._server.close()
+        for peer in list(self._peers):
+            peer.close()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        self.is_hub = False
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.name,
+            "role": "hub" if self.is_hub else "worker",
+            "peers": len(self._peers),
+            "connected": self.is_hub or self._upstream is not None
+        }
+
+
+class RedisBackend(PubSubBackend):
+    """Redis (or any Redis-protocol server) PUBLISH/PSUBSCRIBE backend
+
+    The subscription is kept up by a background task: when the connection
+    drops it re-subscribes with exponential backoff, so cross-worker delivery
+    resumes once Redis is reachable again.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "wirthforge:", max_backoff: float = 30.0):
+        self.url = url
+        self.prefix = prefix
+        self.max_backoff = max_backoff
+        self.origin = uuid.uuid4().hex[:12]  # Lets us skip our own echoes
+        self.connected = False
+        self.reconnects = 0
+        self._redis = None
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: DeliverFn):
+        await super().start(deliver)
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("The redis pub/sub backend requires the 'redis' package")
+
+        self._redis = aioredis.from_url(self.url)
+        self._task = asyncio.create_task(self._maintain())
+
+    async def _maintain(self):
+        """Stay subscribed, re-subscribing with backoff whenever the link fails"""
+        backoff = 0.5
+        while True:
+            try:
+                self._pubsub = self._redis.pubsub()
+                await self._pubsub.psubscribe(self.prefix + "*")
+                self.connected = True
+                backoff = 0.5
+                logger.info(f"📡 Pub/sub connected to {self.url}")
+                await self._listen()
+                logger.warning("Redis pub/sub subscription ended, re-subscribing")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis pub/sub link failed, retrying in {backoff:.1f}s: {e}")
+            finally:
+                self.connected = False
+                pubsub, self._pubsub = self._pubsub, None
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(self.max_backoff, backoff * 2)
+
+    async def _listen(self):
+        async for message in self._pubsub.listen():
+            if message.get("type") != "pmessage":
+                continue
+            channel = message["channel"]
+            data = message["data"]
+            if isinstance(channel, bytes):
+                channel = channel.decode("utf-8")
+            if isinstance(data, bytes):
+                data = data.decode("utf-8")
+
+            origin, _, payload = data.partition("|")
+            if origin == self.origin:
+                continue
+            await self._deliver(channel[len(self.prefix):], payload)
+
+    async def publish(self, channel: str, payload: str):
+        await self._redis.publish(self.prefix + channel, f"{self.origin}|{payload}")
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._redis:
+            await self._redis.aclose()
+
+    def stats(self) -> Dict:
+        return {"backend": self.name, "connected": self.connected, "reconnects": self.reconnects}
+
+
+def create_backend(kind: str, redis_url: str = "", unix_path: str = "") -> PubSubBackend:
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "unix":
+        return UnixSocketBackend(unix_path)
+    if kind == "redis":
+        return RedisBackend(redis_url)
+    raise ValueError(f"Unknown pub/sub backend: {kind}")
+
+
+class EventBus:
+    """Channel-based fan-out across workers through a pluggable backend"""
+
+    def __init__(self, backend: PubSubBackend):
+        self.backend = backend
+        self.handlers: Dict[str, List[Handler]] = {}
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, channel: str, handler: Handler):
+        self.handlers.setdefault(channel, []).append(handler)
+
+    async def start(self):
+        await self.backend.start(self._on_remote)
+
+    async def publish(self, channel: str, payload: str):
+        """Deliver an encoded payload to local handlers and every other worker"""
+        self.published += 1
+        await self._deliver(channel, payload)
+        try:
+            await self.backend.publish(channel, payload)
+        except Exception as e:
+            logger.error(f"Pub/sub publish failed on {channel}: {e}")
+
+    async def _on_remote(self, channel: str, payload: str):
+        self.received += 1
+        await self._deliver(channel, payload)
+
+    async def _deliver(self, channel: str, payload: str):
+        for handler in self.handlers.get(channel, []):
+            try:
+                await handler(payload)
+            except Exception as e:
+                logger.error(f"Pub/sub handler failed on {channel}: {e}")
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> Dict:
+        stats = self.backend.stats()
+        stats.update({"published": self.published, "received": self.received})
+        return stats
@@ -0,0 +1,84 @@
+import asyncio
+import inspect
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTracker:
+    """Runs one socket's message handlers as tracked, cancellable tasks
+
+    The receive loop hands each request off and goes straight back to reading,
+    so several generations can run on one socket at once. Requests are keyed
+    by their client-supplied request ID and capped at max_concurrent.
+    """
+
+    def __init__(self, max_concurrent: int = 4):
+        self.max_concurrent = max_concurrent
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.completed = 0
+        self.cancelled = 0
+
+    @property
+    def active(self) -> int:
+        return len(self.tasks)
+
+    def start(
+        self,
+        request_id: str,
+        handler: Awaitable,
+        on_error: Optional[Callable[[Exception], Awaitable[None]]] = None
+    ) -> Optional[str]:
+        """Start a handler; returns a rejection reason instead if it cannot run"""
+        if request_id in self.tasks:
+            handler.close()
+            return "duplicate_request_id"
+        if len(self.tasks) >= self.max_concurrent:
+            handler.close()
+            return "too_many_requests"
+
+        task = asyncio.create_task(self._run(request_id, handler, on_error))
+        self.tasks[request_id] = task
+        task.add_done_callback(lambda done: self._finished(request_id, done, handler))
+        return None
+
+    def _finished(self, request_id: str, task: asyncio.Task, handler: Awaitable):
+        # A done callback rather than a finally in _run: a task cancelled
+        # before its first step never enters _run at all
+        if self.tasks.get(request_id) is task:
+            del self.tasks[request_id]
+        if inspect.iscoroutine(handler) and inspect.getcoroutinestate(handler) == inspect.CORO_CREATED:
+            handler.close()
+            self.cancelled += 1
+
+    async def _run(self, request_id: str, handler: Awaitable, on_error):
+        try:
+            await handler
+            self.completed += 1
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except Exception as e:
+            logger.error(f"WebSocket request {request_id} failed: {e}")
+            if on_error:
+                await on_error(e)
+
+    def cancel(self, request_id: str) -> bool:
+        task = self.tasks.get(request_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    def cancel_all(self):
+        for task in list(self.tasks.values()):
+            task.cancel()
+
+    def stats(self) -> Dict:
+        return {
+            "active": len(self.tasks),
+            "max_concurrent": self.max_concurrent,
+            "completed": self.completed,
+            "cancelled": self.cancelled
+        }
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import secrets
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from core.codecs import JSON, Frame
+from services.connection_manager import ConnectionManager
+from services.request_tracker import RequestTracker
+
+logger = logging.getLogger(__name__)
+
+
+class ReplaySession:
+    """A resumable stream of generation events that outlives its socket
+
+    Every message gets a sequence number and is kept in a bounded ring of
+    recent frames. While no socket is attached, requests keep running and
+    frames only accumulate, so a reconnecting client can be sent exactly the
+    frames after the last sequence number it saw.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        manager: ConnectionManager,
+        max_frames: int,
+        max_concurrent: int
+    ):
+        self.token = token  # Resume secret: only ever sent to the session's own client
+        self.public_id = secrets.token_hex(8)  # Safe to log, store and expose
+        self.manager = manager
+        self.frames: Deque[Tuple[int, Frame, int]] = deque(maxlen=max_frames)
+        self.frame_bytes = 0
+        self.next_seq = 1
+        self.requests = RequestTracker(max_concurrent=max_concurrent)
+        self.websocket: Optional[WebSocket] = None
+        self.codec = JSON  # Codec of the attached socket; frame sizes are counted in it
+        self.detached_at: Optional[float] = time.monotonic()
+        self._generation = 0  # Bumped on every attach, guards stale expiry timers
+        self._replaying = False  # Live frames are only buffered while a replay catches up
+        self._replay_lock = asyncio.Lock()
+
+    @property
+    def attached(self) -> bool:
+        return self.websocket is not None
+
+    def attach(self, websocket: WebSocket):
+        self.websocket = websocket
+        connection = self.manager.connections.get(websocket)
+        if connection is not None:
+            self.codec = connection.codec
+        self.detached_at = None
+        self._generation += 1
+
+    def detach(self, websocket: WebSocket) -> bool:
+        """Detach if this socket is still the session's owner"""
+        if self.websocket is not websocket:
+            return False
+        self.websocket = None
+        self.detached_at = time.monotonic()
+        return True
+
+    async def send(self, message_type: str, payload: Dict, request_id: Optional[str] = None):
+        """Sequence, buffer and (if attached) deliver one message"""
+        seq = self.next_seq
+        self.next_seq += 1
+
+        message = {"type": message_type, "seq": seq, "data": payload}
+        if request_id is not None:
+            message["request_id"] = request_id
+        frame = Frame(message)
+        size = len(frame.encode(self.codec))
+
+        if len(self.frames) == self.frames.maxlen:
+            self.frame_bytes -= self.frames[0][2]
+        self.frames.append((seq, frame, size))
+        self.frame_bytes += size
+
+        if self.websocket is not None and not self._replaying:
+            await self.manager.send_personal_message(frame, self.websocket)
+
+    def frames_after(self, last_seq: int) -> Tuple[List[Frame], bool]:
+        """Buffered frames newer than last_seq, and whether none were lost"""
+        oldest = self.frames[0][0] if self.frames else self.next_seq
+        complete = last_seq + 1 >= oldest
+        return [frame for seq, frame, _ in self.frames if seq > last_seq], complete
+
+    async def replay(self, last_seq: int) -> Dict:
+        """Resend missed frames to the attached socket, waiting for queue space
+
+        Live delivery is held while the replay runs: frames sent meanwhile
+        are only buffered, and the replay keeps going until it has caught up
+        with them, so a live frame can never push a replayed one out of the
+        socket's queue or overtake it.
+        """
+        async with self._replay_lock:
+            self._replaying = True
+            replayed = 0
+            complete = True
+            try:
+                while self.websocket is not None:
+                    oldest = self.frames[0][0] if self.frames else self.next_seq
+                    complete = complete and last_seq + 1 >= oldest
+                    missed = [(seq, frame) for seq, frame, _ in self.frames if seq > last_seq]
+                    if not missed:
+                        break
+                    for seq, frame in missed:
+                        await self.manager.send_reliable(frame, self.websocket)
+                        last_seq = seq
+                        replayed += 1
+            finally:
+                self._replaying = False
+        return {"replayed": replayed, "complete": complete, "last_seq": self.next_seq - 1}
+
+    def close(self):
+        self.requests.cancel_all()
+        self.frames.clear()
+        self.frame_bytes = 0
+
+    def stats(self) -> Dict:
+        return {
+            "attached": self.attached,
+            "frames": len(self.frames),
+            "frame_bytes": self.frame_bytes,
+            "last_seq": self.next_seq - 1,
+            "requests": self.requests.stats()
+        }
+
+
+class SessionStore:
+    """Resumable sessions keyed by token; detached sessions expire after resume_ttl"""
+
+    def __init__(
+        self,
+        manager: ConnectionManager,
+        max_frames: int = 512,
+        resume_ttl: float = 60.0,
+        max_concurrent: int = 4
+    ):
+        self.manager = manager
+        self.max_frames = max_frames
+        self.resume_ttl = resume_ttl
+        self.max_concurrent = max_concurrent
+        self.sessions: Dict[str, ReplaySession] = {}
+        self.resumed = 0
+        self.expired = 0
+
+    def open(self, websocket: WebSocket, token: Optional[str] = None) -> Tuple[ReplaySession, bool]:
+        """Resume the session for token if it is still alive, else start a new one"""
+        session = self.sessions.get(token) if token else None
+        resumed = session is not None
+
+        if session is None:
+            token = secrets.token_urlsafe(16)
+            session = ReplaySession(token, self.manager, self.max_frames, self.max_concurrent)
+            self.sessions[token] = session
+        else:
+            self.resumed += 1
+
+        session.attach(websocket)
+        return session, resumed
+
+    def release(self, session: ReplaySession, websocket: WebSocket):
+        """Socket went away: keep the session resumable for resume_ttl seconds"""
+        if not session.detach(websocket):
+            return
+        generation = session._generation
+        asyncio.get_event_loop().call_later(
+            self.resume_ttl, self._expire, session.token, generation
+        )
+
+    def _expire(self, token: str, generation: int):
+        session = self.sessions.get(token)
+        if session is None or session.attached or session._generation != generation:
+            return
+        del self.sessions[token]
+        session.close()
+        self.expired += 1
+        logger.info(f"⌛ Session {session.public_id} expired without reconnect")
+
+    def resize(self, max_concurrent: int):
+        """Per-socket request cap; running requests finish, new ones see the new cap"""
+        self.max_concurrent = max_concurrent
+        for session in self.sessions.values():
+            session.requests.max_concurrent = max_concurrent
+
+    def stats(self) -> Dict:
+        sessions = list(self.sessions.values())
+        return {
+            "sessions": len(sessions),
+            "detached": sum(1 for s in sessions if not s.attached),
+            "buffered_frames": sum(len(s.frames) for s in sessions),
+            "buffered_bytes": sum(s.frame_bytes for s in sessions),
+            "resumed": self.resumed,
+            "expired": self.expired
+        }
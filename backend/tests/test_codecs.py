@@ -0,0 +1,46 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+from core.codecs import JSONCodec, orjson
+
+PAYLOAD = {
+    "energy": {"flow_rate": float("nan"), "resonance": float("inf"), "token_count": 3},
+    "history": [1.5, float("-inf"), (0.25, float("nan"))],
+    "columns": {"energy_level": np.array([1.0, np.nan, np.inf], dtype=np.float32)},
+    "peak": np.float32("nan")
+}
+EXPECTED = {
+    "energy": {"flow_rate": None, "resonance": None, "token_count": 3},
+    "history": [1.5, None, [0.25, None]],
+    "columns": {"energy_level": [1.0, None, None]},
+    "peak": None
+}
+
+
+def _strict_loads(text):
+    def reject(constant):
+        raise ValueError(f"{constant} is not JSON")
+    return json.loads(text, parse_constant=reject)
+
+
+def test_stdlib_fallback_writes_non_finite_floats_as_null():
+    codec = JSONCodec(fast=False)
+    assert _strict_loads(codec.encode(PAYLOAD)) == EXPECTED
+    assert _strict_loads(codec.encode_bytes(PAYLOAD)) == EXPECTED
+
+
+def test_finite_payloads_are_encoded_unchanged():
+    codec = JSONCodec(fast=False)
+    message = {"flow_rate": 31.4, "slots": np.arange(3), "tags": ("a", "b")}
+    assert codec.decode(codec.encode(message)) == {"flow_rate": 31.4, "slots": [0, 1, 2], "tags": ["a", "b"]}
+
+
+@pytest.mark.skipif(orjson is None, reason="orjson not installed")
+def test_backends_agree_on_non_finite_floats():
+    fast, fallback = JSONCodec(fast=True), JSONCodec(fast=False)
+    assert fast.backend == "orjson" and fallback.backend == "json"
+    assert _strict_loads(fast.encode(PAYLOAD)) == _strict_loads(fallback.encode(PAYLOAD))
+    assert math.isnan(PAYLOAD["energy"]["flow_rate"])  # The caller's payload is left alone
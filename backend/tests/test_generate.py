@@ -0,0 +1,36 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.routes import generate
+from core.signature_store import SignatureStore
+
+
+class _FakeOllama:
+    loaded_models = set()
+
+    async def health_check(self):
+        return "healthy"
+
+    async def stream_tokens(self, model, prompt, conversation_id=None, **kwargs):
+        for i, word in enumerate("Certainly the answer is clearly forty two".split()):
+            yield word + " ", 1000.0 + 0.05 * (i + 1)
+
+
+def test_rest_generation_stores_the_full_signature(tmp_path, monkeypatch):
+    store = SignatureStore(str(tmp_path))
+    monkeypatch.setattr(generate, "signature_store", store)
+    monkeypatch.setattr(generate, "get_ollama_client", lambda: _FakeOllama())
+    monkeypatch.setattr(generate.time, "time", lambda: 1000.0)
+
+    app = FastAPI()
+    app.include_router(generate.router, prefix="/api")
+    response = TestClient(app).post("/api/generate", json={"query": "what is it?"})
+
+    assert response.status_code == 200
+    assert response.json()["response"].startswith("Certainly")
+    rows = store.scan(0, 2000)
+    assert len(rows["timestamp"]) == 1
+    for column in ("energy_level", "semantic_density", "confidence_flow", "flow_rate"):
+        assert rows[column][0] > 0, column
+    assert rows["token_count"][0] == 7
+    store.close()
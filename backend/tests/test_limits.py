@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from core.limits import LimitExceeded, ResizableLimiter
+
+
+async def _cancel(task):
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def test_waiter_cancelled_as_it_is_admitted_passes_the_slot_on():
+    async def scenario():
+        limiter = ResizableLimiter(1, max_waiting=4)
+        await limiter.acquire()
+        task = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        task.cancel()
+        limiter.release()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.active == 0 and limiter.waiting == 0, limiter.stats()
+
+
+def test_waiter_cancelled_while_queued_is_dropped():
+    async def scenario():
+        limiter = ResizableLimiter(1, max_waiting=4)
+        await limiter.acquire()
+        task = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        await _cancel(task)
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.active == 1 and limiter.waiting == 0, limiter.stats()
+
+
+def test_full_wait_queue_rejects():
+    async def scenario():
+        limiter = ResizableLimiter(1, max_waiting=1)
+        await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(LimitExceeded):
+            await limiter.acquire()
+        await _cancel(queued)
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.rejected == 1 and limiter.waiting == 0
+
+
+def test_resize_admits_waiters_and_never_interrupts_holders():
+    async def scenario():
+        limiter = ResizableLimiter(1, max_waiting=4)
+        await limiter.acquire()
+        waiters = [asyncio.create_task(limiter.acquire()) for _ in range(2)]
+        await asyncio.sleep(0)
+        limiter.resize(limit=3)
+        await asyncio.gather(*waiters)
+        assert limiter.active == 3
+
+        limiter.resize(limit=1)
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()
+        limiter.release()
+        await asyncio.sleep(0)
+        assert not queued.done()  # Still two running against a limit of one
+        limiter.release()
+        await queued
+        return limiter
+
+    limiter = asyncio.run(scenario())
+    assert limiter.active == 1 and limiter.waiting == 0
@@ -0,0 +1,115 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core.conversations import conversation_store
+from core.energy_calculator import EnergyCalculator
+from core.ollama_client import OllamaClient
+from core.text_stats import TextStatistics
+
+WORDS = "I think this is certainly maybe right".split()
+TIMES = [100.1, 100.3, 100.35, 100.6, 100.62, 100.9, 101.3]
+
+
+async def _tokens(self, model, prompt, conversation_id=None, **kwargs):
+    for word, token_time in zip(WORDS, TIMES):
+        yield word + " ", token_time
+
+
+def test_generate_with_energy_keeps_running_statistics(monkeypatch):
+    monkeypatch.setattr(OllamaClient, "stream_tokens", _tokens)
+    client = OllamaClient()
+
+    async def collect():
+        return [r async for r in client.generate_with_energy("qwen3:0.6b", "prompt")]
+
+    start = 100.0
+    monkeypatch.setattr("core.ollama_client.time.time", lambda: start)
+    responses = asyncio.run(collect())
+
+    last = responses[-1]
+    intervals = [b - a for a, b in zip(TIMES, TIMES[1:])]
+    elapsed = TIMES[-1] - start
+    assert last.content == "".join(word + " " for word in WORDS)
+    assert last.energy_signature["token_count"] == len(WORDS)
+    assert last.energy_signature["energy_density"] == pytest.approx(len(last.content) / elapsed)
+    assert last.energy_signature["flow_rate"] == pytest.approx(len(WORDS) / elapsed)
+    assert last.energy_signature["resonance"] == pytest.approx(1 / (1 + max(intervals) - min(intervals)))
+    assert last.timing_pattern["intervals"] == pytest.approx(intervals)
+    assert responses[0].timing_pattern["intervals"] == []
+
+
+def test_energy_signature_scans_the_text_once(monkeypatch):
+    scans = []
+    from_text = TextStatistics.from_text.__func__
+
+    def counting_from_text(cls, content):
+        scans.append(content)
+        return from_text(cls, content)
+
+    monkeypatch.setattr(TextStatistics, "from_text", classmethod(counting_from_text))
+    signature = EnergyCalculator().calculate_energy_signature(" ".join(WORDS), TIMES, 100.0)
+
+    assert len(scans) == 1
+    assert signature["semantic_density"] > 0 and signature["confidence_flow"] > 0
+
+
+def test_health_check_and_model_listing_do_not_block_the_loop(monkeypatch):
+    import ollama
+
+    def blocking_list(*args, **kwargs):
+        raise AssertionError("synchronous ollama.list() called on the event loop")
+
+    class _AsyncClient:
+        async def list(self):
+            await asyncio.sleep(0)
+            model = SimpleNamespace(model="qwen3:0.6b", size=1, modified_at=None)
+            return SimpleNamespace(models=[model])
+
+    monkeypatch.setattr(ollama, "list", blocking_list)
+    client = OllamaClient()
+    client.client = _AsyncClient()
+
+    async def scenario():
+        return await client.health_check(), await client.list_models()
+
+    status, models = asyncio.run(scenario())
+    assert status == "healthy"
+    assert [m["name"] for m in models] == ["qwen3:0.6b"]
+
+
+def test_queued_turn_does_not_hold_a_generation_slot(monkeypatch):
+    release_first = None
+
+    async def chunks(self, model, prompt, **kwargs):
+        if prompt == "first":
+            await release_first.wait()
+        yield {"response": prompt}
+        yield {"done": True, "context": [1, 2, 3]}
+
+    monkeypatch.setattr(OllamaClient, "_stream_chunks", chunks)
+    client = OllamaClient()
+    client.generation_limiter.resize(2, max_waiting=0)
+
+    async def run(prompt, conversation_id=None):
+        return [token async for token, _ in client.stream_tokens("qwen3:0.6b", prompt, conversation_id)]
+
+    async def scenario():
+        nonlocal release_first
+        release_first = asyncio.Event()
+        conversation = conversation_store.create()
+        first = asyncio.create_task(run("first", conversation.id))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(run("second", conversation.id))
+        await asyncio.sleep(0.01)
+        # The second turn waits on the conversation, leaving the other slot free
+        assert client.generation_limiter.active == 1
+        assert await run("other") == ["other"]
+        release_first.set()
+        result = await first, await second
+        conversation_store.delete(conversation.id)
+        return result
+
+    assert asyncio.run(scenario()) == (["first"], ["second"])
+    assert client.generation_limiter.active == 0
@@ -0,0 +1,67 @@
+import asyncio
+
+import numpy as np
+
+from core.offload import ComputeExecutor
+from core.particle_engine import AMBIENT_SIGNATURE, ParticleEngine
+
+
+def test_emitters_added_during_a_step_wait_for_the_next_one(monkeypatch):
+    engine = ParticleEngine(max_particles=500, rng=np.random.default_rng(0))
+    engine.add_emitter_from_signature(AMBIENT_SIGNATURE, duration=None)
+    engine.step(0.1)
+    integrate = engine._integrate
+    added = []
+
+    def integrate_while_the_loop_adds(dt):
+        # What the event loop does while a step runs on the compute thread
+        added.append(engine.add_emitter_from_signature({"energy_level": 9.0}, duration=0.5))
+        return integrate(dt)
+
+    monkeypatch.setattr(engine, "_integrate", integrate_while_the_loop_adds)
+    engine.step(0.1)
+    assert added[0] not in engine.emitters
+
+    monkeypatch.setattr(engine, "_integrate", integrate)
+    engine.step(0.1)
+    assert added[0] in engine.emitters
+
+    engine.remove_emitter(added[0])
+    assert added[0] in engine.emitters
+    engine.step(0.1)
+    assert added[0] not in engine.emitters
+
+
+def test_threaded_steps_with_concurrent_emitters_stay_consistent():
+    engine = ParticleEngine(max_particles=2000, rng=np.random.default_rng(1))
+    executor = ComputeExecutor(kind="thread", max_workers=1, inline_threshold=0)
+
+    async def scenario():
+        counts = []
+        for _ in range(50):
+            step = asyncio.ensure_future(executor.submit(engine.step, 1 / 30, size=1, stateful=True))
+            engine.add_emitter_from_signature({"energy_level": 8.0, "flow_rate": 20.0}, duration=0.1)
+            counts.append(engine.particle_count)
+            await step
+            assert engine.particle_count == np.count_nonzero(engine.alive)
+        return counts
+
+    try:
+        counts = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert engine.particle_count > 0
+    assert executor.offloaded_runs == 50 and len(counts) == 50
+
+
+def test_process_batches_return_arrays_by_pickle():
+    executor = ComputeExecutor(kind="process", max_workers=1, inline_threshold=0)
+
+    async def scenario():
+        return await executor.map(np.ones, [(4,), ((3, 2),)], size=1)
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert [r.shape for r in results] == [(4,), (3, 2)]
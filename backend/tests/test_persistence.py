@@ -0,0 +1,85 @@
+import asyncio
+import sqlite3
+import threading
+
+from core.persistence import GenerationWriter
+
+SIGNATURE = {"energy_level": 3.5, "token_count": 12, "generation_time": 0.4}
+
+
+def _rows(path):
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT source, model, query, energy_level FROM generations ORDER BY id").fetchall()
+
+
+def _writer(path, **kwargs) -> GenerationWriter:
+    return GenerationWriter(f"sqlite:///{path}", **kwargs)
+
+
+def test_records_are_group_committed(tmp_path):
+    path = tmp_path / "generations.db"
+
+    async def scenario():
+        writer = _writer(path, max_batch=3, flush_interval=0.05)
+        await writer.start()
+        for i in range(7):
+            await writer.submit("api", "qwen3:0.6b", f"q{i}", "answer", SIGNATURE)
+        await writer.flush()
+        stats = writer.stats()
+        await writer.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["written"] == 7
+    assert stats["batches"] == 3  # 3 + 3 + 1
+    assert [row[2] for row in _rows(path)] == [f"q{i}" for i in range(7)]
+    assert _rows(path)[0] == ("api", "qwen3:0.6b", "q0", 3.5)
+
+
+def test_submit_waits_while_the_queue_is_full(tmp_path):
+    path = tmp_path / "generations.db"
+    database_free = threading.Event()
+
+    async def scenario():
+        writer = _writer(path, max_batch=1, flush_interval=0.01, max_pending=2)
+        await writer.start()
+        write = writer._write
+
+        def slow_write(batch):
+            database_free.wait(5)
+            write(batch)
+
+        writer._write = slow_write
+        await writer.submit("api", "m", "q0", "a", SIGNATURE)  # Taken by the stalled commit
+        await asyncio.sleep(0.05)
+        await writer.submit("api", "m", "q1", "a", SIGNATURE)
+        await writer.submit("api", "m", "q2", "a", SIGNATURE)
+
+        blocked = asyncio.create_task(writer.submit("api", "m", "q3", "a", SIGNATURE))
+        await asyncio.sleep(0.1)
+        assert not blocked.done()  # Backpressure instead of unbounded growth
+        assert writer.stats()["pending"] == 2
+
+        database_free.set()
+        await asyncio.wait_for(blocked, 5)
+        await writer.close()
+        return writer.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["written"] == 4 and stats["dropped"] == 0
+    assert len(_rows(path)) == 4
+
+
+def test_close_commits_everything_queued(tmp_path):
+    path = tmp_path / "generations.db"
+
+    async def scenario():
+        writer = _writer(path, max_batch=100, flush_interval=60)
+        await writer.start()
+        for i in range(5):
+            await writer.submit("websocket", "m", f"q{i}", "a", SIGNATURE, session="abc")
+        await writer.close()  # Long before the flush interval
+        await writer.submit("websocket", "m", "late", "a", SIGNATURE)  # Ignored once closing
+
+    asyncio.run(scenario())
+    assert [row[2] for row in _rows(path)] == [f"q{i}" for i in range(5)]
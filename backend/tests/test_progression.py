@@ -0,0 +1,74 @@
+import asyncio
+
+from core.persistence import ProgressWriter
+from core.progression import ProgressionEngine
+
+GENERATION = {"energy_density": 2.5, "consciousness_level": 1, "resonance": 0.5}
+
+
+def _writer(path, **kwargs) -> ProgressWriter:
+    return ProgressWriter(f"sqlite:///{path}", **kwargs)
+
+
+def test_progress_lookups_do_not_evict_users():
+    engine = ProgressionEngine(max_users=2)
+
+    async def scenario():
+        await engine.record("alice", "generation", GENERATION)
+        await engine.record("bob", "generation", GENERATION)
+        views = [await engine.progress(f"stranger-{i}") for i in range(10)]
+        return views, await engine.progress("alice")
+
+    views, alice = asyncio.run(scenario())
+    assert engine.stats()["users"] == 2
+    assert views[0]["consciousness_level"] == 1 and views[0]["achievements"] == []
+    assert alice["achievements"] == ["first_lightning"]
+
+
+def test_progress_survives_a_restart(tmp_path):
+    path = tmp_path / "progress.db"
+
+    async def first_run():
+        writer = _writer(path, flush_interval=0.01)
+        await writer.start()
+        engine = ProgressionEngine(store=writer)
+        for _ in range(10):
+            await engine.record("alice", "generation", GENERATION)
+        await engine.record("alice", "council", {"harmony": 0.9})
+        await writer.close()
+        return writer.stats()
+
+    async def second_run():
+        writer = _writer(path, flush_interval=0.01)
+        await writer.start()
+        engine = ProgressionEngine(store=writer)
+        before = await engine.progress("alice")
+        after = await engine.record("alice", "generation", GENERATION)
+        await writer.close()
+        return before, after
+
+    stats = asyncio.run(first_run())
+    assert stats["written"] == 11 and stats["batches"] < 11  # Saves are group-committed
+    before, after = asyncio.run(second_run())
+    assert before["consciousness_level"] == 2
+    assert before["achievements"] == ["first_lightning", "generate_10_responses", "harmony_achieved"]
+    assert before["energy_collected"] == 10 * 250  # The council event carries no energy
+    assert after["energy_collected"] == 11 * 250 and after["unlocked"] == []
+
+
+def test_evicted_user_is_reloaded_before_their_state_is_committed(tmp_path):
+    path = tmp_path / "progress.db"
+
+    async def scenario():
+        writer = _writer(path, flush_interval=60)
+        await writer.start()
+        engine = ProgressionEngine(max_users=1, store=writer)
+        await engine.record("alice", "generation", GENERATION)
+        await engine.record("bob", "generation", GENERATION)  # Evicts alice, her save still queued
+        alice = await engine.record("alice", "generation", GENERATION)
+        await writer.close()
+        return alice
+
+    alice = asyncio.run(scenario())
+    assert alice["energy_collected"] == 2 * 250
+    assert alice["achievements"] == ["first_lightning"]
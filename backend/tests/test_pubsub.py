@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from services.pubsub import EventBus, MemoryBackend, RedisBackend, UnixSocketBackend
+
+
+def _bus(backend):
+    bus = EventBus(backend)
+    received = []
+
+    async def handler(payload):
+        received.append(payload)
+
+    bus.subscribe("broadcast", handler)
+    return bus, received
+
+
+async def _until(condition, timeout=5.0):
+    deadline = asyncio.get_event_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_event_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+def test_memory_backend_delivers_locally_only():
+    async def scenario():
+        (a, got_a), (b, got_b) = _bus(MemoryBackend()), _bus(MemoryBackend())
+        await a.start()
+        await b.start()
+        await a.publish("broadcast", '{"n":1}')
+        assert got_a == ['{"n":1}'] and got_b == []
+        await a.close()
+        await b.close()
+
+    asyncio.run(scenario())
+
+
+def test_unix_hub_relays_between_workers_and_fails_over(tmp_path):
+    path = str(tmp_path / "pubsub.sock")
+
+    async def scenario():
+        buses = [_bus(UnixSocketBackend(path)) for _ in range(3)]
+        for bus, _ in buses:
+            await bus.start()
+        await _until(lambda: all(bus.backend.stats()["connected"] for bus, _ in buses))
+        await _until(lambda: len(next(b for b, _ in buses if b.backend.is_hub).backend._peers) == 2)
+
+        hub = next((bus, got) for bus, got in buses if bus.backend.is_hub)
+        worker = next((bus, got) for bus, got in buses if not bus.backend.is_hub)
+        await worker[0].publish("broadcast", "from-worker")
+        await _until(lambda: all(got == ["from-worker"] for _, got in buses))
+
+        # The hub goes away: the remaining workers elect a new one and keep relaying
+        await hub[0].close()
+        survivors = [entry for entry in buses if entry[0] is not hub[0]]
+        await _until(lambda: sum(bus.backend.is_hub for bus, _ in survivors) == 1)
+        await _until(lambda: all(bus.backend.stats()["connected"] for bus, _ in survivors))
+        new_hub = next(bus for bus, _ in survivors if bus.backend.is_hub)
+        await _until(lambda: len(new_hub.backend._peers) == 1)
+
+        await survivors[0][0].publish("broadcast", "after-failover")
+        await _until(lambda: all(got[-1:] == ["after-failover"] for _, got in survivors))
+        for bus, _ in survivors:
+            await bus.close()
+
+    asyncio.run(scenario())
+
+
+def test_redis_backend_resubscribes_after_a_dropped_link(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    import redis
+    import redis.asyncio as aioredis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(aioredis, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server))
+
+    async def scenario():
+        (a, got_a), (b, got_b) = _bus(RedisBackend("redis://test")), _bus(RedisBackend("redis://test"))
+        await a.start()
+        await b.start()
+        await _until(lambda: a.backend.connected and b.backend.connected)
+
+        await a.publish("broadcast", "one")
+        await _until(lambda: got_b == ["one"])
+        assert got_a == ["one"]  # Local delivery only, no echo from Redis
+
+        # b's link fails mid-read: it must re-subscribe and keep receiving
+        pubsub = b.backend._pubsub
+        parse_response = pubsub.parse_response
+
+        async def lost_link(*args, **kwargs):
+            pubsub.parse_response = parse_response
+            raise redis.ConnectionError("link lost")
+
+        pubsub.parse_response = lost_link
+        await a.publish("broadcast", "wake")  # Completes the read in progress; the next one fails
+        await _until(lambda: b.backend.reconnects == 1 and b.backend.connected)
+        await a.publish("broadcast", "two")
+        await _until(lambda: got_b[-1:] == ["two"])
+
+        await a.close()
+        await b.close()
+
+    asyncio.run(scenario())
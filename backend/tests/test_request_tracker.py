@@ -0,0 +1,50 @@
+import asyncio
+
+from services.request_tracker import RequestTracker
+
+
+async def _forever():
+    await asyncio.Event().wait()
+
+
+def test_cancel_before_first_step_frees_the_slot():
+    async def scenario():
+        tracker = RequestTracker(max_concurrent=1)
+        handler = _forever()
+        assert tracker.start("a", handler) is None
+        assert tracker.cancel("a")
+        await asyncio.sleep(0.01)
+
+        assert tracker.tasks == {}
+        assert tracker.cancelled == 1
+        assert handler.cr_frame is None  # Closed, never left un-awaited
+
+        assert tracker.start("b", _forever()) is None
+        tracker.cancel_all()
+        await asyncio.sleep(0.01)
+        assert tracker.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_finished_requests_leave_the_tracker():
+    async def scenario():
+        tracker = RequestTracker(max_concurrent=2)
+        errors = []
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        async def report(error):
+            errors.append(str(error))
+
+        tracker.start("ok", asyncio.sleep(0))
+        tracker.start("bad", fail(), on_error=report)
+        assert tracker.start("ok", asyncio.sleep(0)) == "duplicate_request_id"
+        await asyncio.sleep(0.01)
+
+        assert tracker.tasks == {}
+        assert tracker.completed == 1
+        assert errors == ["boom"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,70 @@
+import asyncio
+
+from services.connection_manager import ConnectionManager
+from services.session_replay import SessionStore
+
+
+class _SlowSocket:
+    """Accepts frames but only sends them once released"""
+
+    def __init__(self):
+        self.scope = {}
+        self.sent = []
+        self.release = asyncio.Event()
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, text):
+        await self.release.wait()
+        self.sent.append(text)
+
+    async def close(self, code=None):
+        pass
+
+
+def test_live_frames_never_evict_a_replay():
+    async def scenario():
+        manager = ConnectionManager(max_queue=4, policy="drop_oldest", heartbeat_interval=0)
+        store = SessionStore(manager, max_frames=64, resume_ttl=60, max_concurrent=4)
+        socket = _SlowSocket()
+        await manager.connect(socket)
+        session, _ = store.open(socket)
+        session.websocket = None  # Frames 1-10 happen while disconnected
+        for i in range(10):
+            await session.send("progress", {"i": i})
+        session.attach(socket)
+
+        replay = asyncio.create_task(session.replay(0))
+        await asyncio.sleep(0)
+        for i in range(10, 20):  # Live frames while the replay waits on a full queue
+            await session.send("progress", {"i": i})
+        socket.release.set()
+        result = await replay
+        await asyncio.sleep(0.05)
+
+        assert result["complete"]
+        assert result["replayed"] == 20
+        sequences = [int(text.split('"seq":')[1].split(",")[0]) for text in socket.sent]
+        assert sequences == list(range(1, 21))
+        manager.connections[socket].close()
+
+    asyncio.run(scenario())
+
+
+def test_drop_oldest_skips_reliable_frames():
+    async def scenario():
+        manager = ConnectionManager(max_queue=2, policy="drop_oldest", heartbeat_interval=0)
+        socket = _SlowSocket()
+        connection = await manager.connect(socket)
+        await connection.put({"reliable": 1})
+        await asyncio.sleep(0)  # The writer takes the first frame and blocks on the socket
+        await connection.put({"reliable": 2})
+        connection.enqueue({"live": 1})
+        assert connection.enqueue({"live": 2})
+
+        queued = [frame.message for _, frame, _ in connection.queue]
+        assert queued == [{"reliable": 2}, {"live": 2}]
+        connection.close()
+
+    asyncio.run(scenario())
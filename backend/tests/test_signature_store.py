@@ -0,0 +1,81 @@
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+
+from core.signature_store import SignatureStore
+
+DAY = 86400
+NOW = time.time()
+
+
+def _fill(store: SignatureStore, days: int):
+    for day in range(days, -1, -1):
+        for i in range(3):
+            store.append({"energy_level": 2.0, "token_count": 5}, model="m", session="s",
+                         timestamp=NOW - day * DAY + i)
+    store.write_pending()
+
+
+def _open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def test_open_segments_are_capped(tmp_path):
+    store = SignatureStore(str(tmp_path), retention_days=365, max_open_segments=8)
+    before = _open_fds()
+    _fill(store, 120)
+
+    rows = store.scan(NOW - 200 * DAY, NOW + DAY)
+    assert len(rows["timestamp"]) == 121 * 3
+    assert np.all(np.diff(rows["timestamp"]) > 0)
+    assert len(store._segments) <= 8
+    assert _open_fds() - before <= 8 * 12
+
+    stats = store.stats()
+    assert stats["tables"]["raw"] == {"segments": 121, "rows": 363}
+    assert stats["open_segments"] <= 8
+    store.close()
+
+
+def test_coarse_rollups_are_partitioned_by_month(tmp_path):
+    store = SignatureStore(str(tmp_path), retention_days=365)
+    _fill(store, 120)
+    store.close()
+
+    store = SignatureStore(str(tmp_path), retention_days=365)
+    stats = store.stats()
+    assert stats["tables"]["1h"]["segments"] <= 6
+    assert stats["tables"]["1m"]["segments"] <= 6
+    assert stats["tables"]["1s"]["segments"] == 121
+
+    hourly = store.rollup("1h", NOW - 200 * DAY, NOW + DAY)
+    assert int(hourly["count"].sum()) == 363
+    assert np.allclose(hourly["energy_level_avg"], 2.0)
+    store.close()
+
+
+def test_appends_from_async_code_are_written_off_the_loop(tmp_path):
+    store = SignatureStore(str(tmp_path), flush_every=1, flush_interval=0.01)
+    loop_thread = threading.get_ident()
+    writers = []
+    write_pending = store.write_pending
+
+    def record_writer():
+        writers.append(threading.get_ident())
+        write_pending()
+
+    store.write_pending = record_writer
+
+    async def scenario():
+        for _ in range(5):
+            store.append({"energy_level": 1.0}, model="m")
+        assert not writers  # Nothing written inline
+        await asyncio.sleep(0.1)
+
+    asyncio.run(scenario())
+    assert writers and loop_thread not in writers
+    assert store.stats()["tables"]["raw"]["rows"] == 5
+    store.close()
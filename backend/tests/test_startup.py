@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds a fresh interpreter may take to import the app; override for slow CI machines
+BUDGET = float(os.environ.get("WIRTHFORGE_COLD_START_BUDGET", "1.5"))
+
+
+def _cold_import(module: str) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=BACKEND, check=True)
+    return time.perf_counter() - started
+
+
+def test_cold_start_stays_within_budget():
+    best = min(_cold_import("main") for _ in range(3))
+    assert best <= BUDGET, f"Cold import of main took {best * 1000:.0f}ms, budget {BUDGET * 1000:.0f}ms"
+
+
+def test_heavy_dependencies_are_not_imported_with_the_app():
+    deferred = ("ollama", "httpx", "sqlalchemy", "rich", "redis", "uvicorn")
+    probe = (
+        "import sys, main; "
+        f"print(','.join(m for m in {deferred!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], cwd=BACKEND, check=True,
+                            capture_output=True, text=True)
+    assert result.stdout.strip() == ""
@@ -0,0 +1,48 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from api.routes import websocket as ws_routes
+from main import app
+
+
+def _receive_type(socket, message_type):
+    for _ in range(200):
+        message = socket.receive_json()
+        if message["type"] == message_type:
+            return message
+    raise AssertionError(f"No {message_type} frame")
+
+
+def test_malformed_acks_are_ignored():
+    with TestClient(app).websocket_connect("/ws/energy") as socket:
+        _receive_type(socket, "energy_status")
+        for data in ({"tick": "x"}, {"tick": None}, {"tick": True}, "junk", {"tick": 3, "render_fps": "fast"}):
+            socket.send_json({"type": "frame_ack", "data": data})
+        socket.send_json({"type": "replay", "data": {"last_seq": "x"}})
+        socket.send_json(["not", "an", "object"])
+        socket.send_json({"type": "replay", "data": {"last_seq": 0}})
+        assert _receive_type(socket, "replay_complete")["data"]["complete"] is True
+
+
+@pytest.mark.parametrize("room", ["", "a" * 33, "../energy", "energy room"])
+def test_invalid_room_names_are_rejected(room):
+    with TestClient(app).websocket_connect(f"/ws/energy?room={room}") as socket:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            socket.receive_json()
+    assert closed.value.code == 1008
+    assert room not in ws_routes.ticker.rooms
+
+
+def test_room_count_is_capped(monkeypatch):
+    monkeypatch.setattr(ws_routes.ticker, "max_rooms", 1)
+    client = TestClient(app)
+    with client.websocket_connect("/ws/energy?room=first") as first:
+        _receive_type(first, "energy_status")
+        with client.websocket_connect("/ws/energy?room=first") as joined:
+            _receive_type(joined, "energy_status")  # Existing rooms stay joinable
+        with client.websocket_connect("/ws/energy?room=second") as refused:
+            with pytest.raises(WebSocketDisconnect) as closed:
+                refused.receive_json()
+        assert closed.value.code == 1008
+        assert list(ws_routes.ticker.rooms) == ["first"]